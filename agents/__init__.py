@@ -10,10 +10,23 @@ from .sideeffects_agent import sideeffects_agent
 from .web_agent import web_agent
 from .validator_agent import validator_agent
 from search_coordinator import get_search_coordinator
+from token_accounting import get_token_accountant
+from planning import get_plan_cache
+from model_routing import get_model_router
+from profiling import get_request_profiler
+from memory_accounting import get_memory_tracker, process_rss_bytes
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Singleton specialist agents by name
+COORDINATED_AGENTS = {
+    "DosageAgent": dosage_agent,        # Coordinated dosage analysis
+    "SideEffectsAgent": sideeffects_agent,  # Coordinated safety assessment
+    "WebSearchAgent": web_agent,        # Coordinated drug information research
+    "ValidatorAgent": validator_agent,  # Coordinated medical verification
+}
+
 def get_all_agents():
     """
     Get all coordinated worker agents for the workforce.
@@ -30,12 +43,7 @@ def get_all_agents():
     logger.info("✓ Search Coordinator initialized for all agents")
     
     # Return coordinated agent registry
-    coordinated_agents = {
-        "DosageAgent": dosage_agent,        # Coordinated dosage analysis
-        "SideEffectsAgent": sideeffects_agent,  # Coordinated safety assessment
-        "WebSearchAgent": web_agent,        # Coordinated drug information research
-        "ValidatorAgent": validator_agent,  # Coordinated medical verification
-    }
+    coordinated_agents = dict(COORDINATED_AGENTS)
     
     # Log coordination status
     cache_stats = search_coordinator.get_cache_stats()
@@ -55,6 +63,11 @@ def get_coordination_status():
         return {
             "status": "active",
             "metrics": search_coordinator.get_cache_stats(),
+            "token_usage": get_token_accountant().get_stats(),
+            "plan_cache": get_plan_cache().get_stats(),
+            "model_routing": {**get_model_router().get_stats(), "tiers": get_token_accountant().get_tier_stats()},
+            "profiling": get_request_profiler().get_stats(),
+            "memory": get_memory_status(),
             "agents_coordinated": 4,
             "coordination_features": [
                 "Intelligent search caching",
@@ -72,6 +85,20 @@ def get_coordination_status():
             "agents_coordinated": 0
         }
 
+def get_memory_status():
+    """
+    Get memory accounting for the search cache and tracemalloc.
+    
+    Returns:
+        dict: Process RSS, cache bytes by source/agent/info type and, when MEDFORCE_TRACEMALLOC
+        is set, allocation diffs between requests
+    """
+    return {
+        "rss_bytes": process_rss_bytes(),
+        "search_cache": get_search_coordinator().get_memory_stats(),
+        "tracemalloc": get_memory_tracker().get_stats(),
+    }
+
 def clear_search_cache():
     """
     Clear the coordinated search cache for all agents.
@@ -1,9 +1,10 @@
 from camel.agents import ChatAgent
 from camel.toolkits import SearchToolkit
-from camel.models import ModelFactory
-from camel.configs import MistralConfig
-from camel.types import ModelType, ModelPlatformType
-from search_coordinator import get_search_coordinator, InformationType
+from search_coordinator import get_search_coordinator, deadline_bounded_tool, InformationType
+from prompts import get_prompt
+from token_accounting import TokenAccountingMixin
+from streaming import StreamingMixin
+from model_routing import ClonePreservingMixin, create_role_model, install_router
 import os
 from dotenv import load_dotenv
 import logging
@@ -12,87 +13,38 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 def get_search_tool():
-    """Safely get search tool with error handling"""
+    """Safely get search tool with error handling (bounded by the request deadline)"""
     try:
         toolkit = SearchToolkit()
         tools = toolkit.get_tools()
         if not tools:
             raise ValueError("No search tools available")
-        return tools[0]
+        return deadline_bounded_tool(tools[0])
     except Exception as e:
         logger.error(f"Failed to initialize search tool: {e}")
         return None
 
 
-model = ModelFactory.create(
-    model_platform=ModelPlatformType.MISTRAL,
-    model_type=ModelType.MISTRAL_MEDIUM_3,
-    model_config_dict=MistralConfig(temperature=0.4).as_dict(),   precision
-)
+model = create_role_model("DosageAgent", temperature=0.4)  # precision
 
 
 dosage_search_tool = get_search_tool()
 
-class CoordinatedDosageAgent(ChatAgent):
+class CoordinatedDosageAgent(ClonePreservingMixin, StreamingMixin, TokenAccountingMixin, ChatAgent):
     """Enhanced dosage agent with coordinated search capabilities"""
     
     def __init__(self):
         super().__init__(
-            system_message="""You are a medical AI agent specializing in pharmaceutical dosage guidance with coordinated search capabilities.
-
-**PRIMARY RESPONSIBILITIES:**
-- Determine safe and effective medication dosages based on clinical guidelines
-- Consider patient-specific factors: age, weight, medical conditions
-- Provide administration instructions: frequency, timing, duration
-- Specify maximum daily limits and safety thresholds
-
-**SEARCH COORDINATION:**
-You now have access to a coordinated search system that:
-- Eliminates redundant searches across the specialist team
-- Prioritizes authoritative medical sources (FDA, MedlinePlus, Mayo Clinic)
-- Caches results to improve efficiency
-- Shares relevant findings with other agents
-
-**TRUSTED SOURCES (Prioritized by Search Coordinator):**
-- **PRIMARY**: MedlinePlus, Mayo Clinic, FDA.gov
-- **SECONDARY**: Drugs.com, Medscape
-- **TERTIARY**: WHO, PubMed summaries
-
-**OUTPUT FORMAT:**
-Structure your dosage recommendations as:
-- **Standard Adult Dose**: X mg every Y hours
-- **Pediatric Considerations**: Age-specific dosing if applicable
-- **Maximum Daily Dose**: Z mg (with safety warnings)
-- **Administration Instructions**: Timing, food interactions, special considerations
-- **Dose Adjustments**: For elderly, renal/hepatic impairment, or other conditions
-
-**SAFETY REQUIREMENTS:**
-- Always include dosage ranges rather than fixed amounts
-- Specify conditions requiring medical supervision
-- Note when dosing varies by indication or severity
-- Include warnings for special populations (pregnancy, nursing, elderly)
-- Emphasize the need for healthcare provider consultation
-
-**SEARCH STRATEGY:**
-- Use coordinated search to access authoritative dosage information
-- Focus on official dosing guidelines and clinical recommendations
-- Cross-reference multiple sources when available
-- Flag any dosage discrepancies between sources
-
-**CRITICAL REMINDERS:**
-- Dosage recommendations are for educational purposes only
-- Individual dosing must be determined by healthcare providers
-- Consider drug interactions and contraindications
-- Always recommend professional medical consultation
-""",
+            system_message=get_prompt("DosageAgent"),
             model=model,
             tools=[dosage_search_tool] if dosage_search_tool else []
         )
         self.search_coordinator = get_search_coordinator()
         self.agent_name = "DosageAgent"
+        install_router(self, self.agent_name)
 
-    def coordinated_search(self, query: str, max_sources: int = 2):
-        """Perform coordinated search using the search coordinator"""
+    def coordinated_search(self, query: str, max_sources: int = 2, deadline=None):
+        """Perform coordinated search using the search coordinator within the request deadline"""
         if not dosage_search_tool:
             return {"error": "Search tool not available"}
         
@@ -101,7 +53,8 @@ Structure your dosage recommendations as:
                 agent_name=self.agent_name,
                 query=query,
                 search_tool=dosage_search_tool,
-                max_sources=max_sources
+                max_sources=max_sources,
+                deadline=deadline
             )
             return results
         except Exception as e:
@@ -159,10 +112,10 @@ Search system encountered an issue: {search_results['error']}
         
         successful_sources = []
         for source, result in search_results.items():
-            if result.success and result.content:
+            if result.success and result.has_content:
                 successful_sources.append(source)
                 analysis_parts.append(f"**📋 {source} Findings:**")
-                dosage_info = self._extract_dosage_info(result.content)
+                dosage_info = self._extract_dosage_info(result)
                 analysis_parts.append(dosage_info)
                 analysis_parts.append("")
 
@@ -183,18 +136,13 @@ Search system encountered an issue: {search_results['error']}
 
         return "\n".join(analysis_parts)
 
-    def _extract_dosage_info(self, content: str) -> str:
-        """Extract and format dosage information from search content"""
+    def _extract_dosage_info(self, result) -> str:
+        """Extract and format dosage information from the result's pre-classified lines"""
         
-        lines = content.split('\n')[:10]  
-        
-        dosage_keywords = ['dose', 'dosage', 'mg', 'tablet', 'capsule', 'ml', 'daily', 'twice', 'three times']
-        relevant_lines = []
-        
-        for line in lines:
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in dosage_keywords):
-                relevant_lines.append(f"- {line.strip()}")
+        relevant_lines = [
+            f"- {record.text}" for record in result.line_records[:10]
+            if record.has("dosage")
+        ]
         
         if relevant_lines:
             return "\n".join(relevant_lines[:5])  
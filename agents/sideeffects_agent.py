@@ -1,9 +1,10 @@
 from camel.agents import ChatAgent
 from camel.toolkits import SearchToolkit
-from camel.models import ModelFactory
-from camel.configs import MistralConfig
-from camel.types import ModelType, ModelPlatformType
-from search_coordinator import get_search_coordinator, InformationType
+from search_coordinator import get_search_coordinator, deadline_bounded_tool, InformationType
+from prompts import get_prompt
+from token_accounting import TokenAccountingMixin
+from streaming import StreamingMixin
+from model_routing import ClonePreservingMixin, create_role_model, install_router
 import os
 from dotenv import load_dotenv
 import logging
@@ -12,106 +13,38 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 def get_search_tool():
-    """Safely get search tool with error handling"""
+    """Safely get search tool with error handling (bounded by the request deadline)"""
     try:
         toolkit = SearchToolkit()
         tools = toolkit.get_tools()
         if not tools:
             raise ValueError("No search tools available")
-        return tools[0]
+        return deadline_bounded_tool(tools[0])
     except Exception as e:
         logger.error(f"Failed to initialize search tool: {e}")
         return None
 
 
-model = ModelFactory.create(
-    model_platform=ModelPlatformType.MISTRAL,
-    model_type=ModelType.MISTRAL_MEDIUM_3,
-    model_config_dict=MistralConfig(temperature=0.3).as_dict(),   conservative safety assessment
-)
+model = create_role_model("SideEffectsAgent", temperature=0.3)  # conservative safety assessment
 
 
 sideeffects_search_tool = get_search_tool()
 
-class CoordinatedSideEffectsAgent(ChatAgent):
+class CoordinatedSideEffectsAgent(ClonePreservingMixin, StreamingMixin, TokenAccountingMixin, ChatAgent):
     """Enhanced side effects agent with coordinated search capabilities"""
     
     def __init__(self):
         super().__init__(
-            system_message="""You are a pharmaceutical safety expert agent specializing in medication side effects and adverse reactions with advanced coordinated search capabilities.
-
-**PRIMARY RESPONSIBILITIES:**
-- Identify and analyze comprehensive side effects for medications through coordinated searches
-- Categorize adverse reactions by frequency, severity, and patient demographics
-- Assess patient-specific risk factors and contraindications
-- Provide evidence-based safety guidance from authoritative medical sources
-
-**COORDINATED SEARCH CAPABILITIES:**
-You now operate within an intelligent search coordination system that:
-- Prioritizes authoritative safety sources (FDA, MedlinePlus, Mayo Clinic)
-- Eliminates redundant searches across the pharmaceutical specialist team
-- Caches safety information for improved response efficiency
-- Shares critical safety findings with verification and dosage specialists
-
-**TRUSTED SAFETY SOURCES (Coordinated Priority):**
-- **PRIMARY**: FDA.gov, MedlinePlus, Mayo Clinic
-- **SECONDARY**: Drugs.com, Medscape, NHS.uk  
-- **TERTIARY**: WHO, PubMed safety databases
-
-**COMPREHENSIVE ANALYSIS PROCESS:**
-1. **COORDINATED SAFETY SEARCH** from prioritized authoritative sources
-   - Access cached FDA adverse event data when available
-   - Search MedlinePlus for comprehensive side effect profiles
-   - Utilize Mayo Clinic safety databases through coordinated queries
-
-2. **SYSTEMATIC CATEGORIZATION** of findings:
-   - **Common Side Effects**: Occurring in >1% of patients with frequency data
-   - **Serious Side Effects**: Rare but dangerous reactions requiring immediate medical attention
-   - **Age-Specific Risks**: Pediatric, geriatric, and demographic considerations
-   - **Condition-Specific Warnings**: Contraindications for health conditions (pregnancy, liver/kidney disease)
-   - **Drug-Specific Alerts**: Black box warnings, FDA safety communications
-
-3. **EVIDENCE-BASED FORMATTING** with clear safety communication:
-   - Use warning symbols (⚠️) for serious effects requiring medical attention
-   - Organize by severity: Common → Serious → Emergency
-   - Include incidence rates when available from coordinated search data
-   - Specify emergency signs requiring immediate medical care
-
-4. **SAFETY INTEGRATION** with coordinated team:
-   - Share critical safety findings with ValidatorAgent for verification
-   - Coordinate with DosageAgent for dose-related safety considerations
-   - Integrate with WebSearchAgent for current FDA safety alerts
-
-**COORDINATED SEARCH STRATEGY:**
-- Leverage cached FDA safety alerts and adverse event reports
-- Access shared MedlinePlus medication profiles for comprehensive side effect data
-- Utilize coordinated Mayo Clinic searches for clinical safety information
-- Cross-reference findings with other specialist agents to ensure comprehensive coverage
-
-**CRITICAL SAFETY PROTOCOLS:**
-- Always prioritize patient safety over search efficiency
-- Include clear emergency guidance for serious adverse reactions
-- Specify when to discontinue medication and seek immediate care
-- Provide specific symptoms requiring emergency medical attention
-- Include poison control and emergency contact information when appropriate
-
-**PROFESSIONAL SAFETY STANDARDS:**
-- Base all safety assessments on evidence from coordinated authoritative sources
-- Include comprehensive medical disclaimers about individual risk variation
-- Emphasize healthcare provider consultation for safety concerns
-- Never minimize or omit serious safety warnings for efficiency
-- Maintain conservative approach to safety assessment
-
-**COORDINATED DELIVERABLE:**
-Provide comprehensive, evidence-based safety analysis that combines frequency data, severity assessments, and patient-specific considerations using efficiently coordinated search results while maintaining the highest standards of pharmaceutical safety communication.""",
+            system_message=get_prompt("SideEffectsAgent"),
             model=model,
             tools=[sideeffects_search_tool] if sideeffects_search_tool else []
         )
         self.search_coordinator = get_search_coordinator()
         self.agent_name = "SideEffectsAgent"
+        install_router(self, self.agent_name)
 
-    def coordinated_search(self, query: str, max_sources: int = 3):
-        """Perform coordinated search using the search coordinator"""
+    def coordinated_search(self, query: str, max_sources: int = 3, deadline=None):
+        """Perform coordinated search using the search coordinator within the request deadline"""
         if not sideeffects_search_tool:
             return {"error": "Search tool not available"}
         
@@ -120,7 +53,8 @@ Provide comprehensive, evidence-based safety analysis that combines frequency da
                 agent_name=self.agent_name,
                 query=query,
                 search_tool=sideeffects_search_tool,
-                max_sources=max_sources
+                max_sources=max_sources,
+                deadline=deadline
             )
             return results
         except Exception as e:
@@ -181,12 +115,12 @@ Search coordination encountered an issue: {search_results['error']}
         safety_data = {}
         
         for source, result in search_results.items():
-            if result.success and result.content:
+            if result.success and result.has_content:
                 successful_sources.append(source)
                 analysis_parts.append(f"**📋 {source} Safety Data:**")
                 
                 
-                safety_info = self._extract_safety_information(result.content)
+                safety_info = self._extract_safety_information(result)
                 safety_data[source] = safety_info
                 analysis_parts.append(safety_info)
                 analysis_parts.append("")
@@ -225,26 +159,17 @@ Search coordination encountered an issue: {search_results['error']}
 
         return "\n".join(analysis_parts)
 
-    def _extract_safety_information(self, content: str) -> str:
-        """Extract and categorize safety information from search content"""
-        lines = content.split('\n')[:15]  
-        
-        
-        common_keywords = ['common', 'frequent', 'mild', 'minor', 'temporary']
-        serious_keywords = ['serious', 'severe', 'dangerous', 'emergency', 'fatal', 'black box', 'warning']
-        symptom_keywords = ['nausea', 'headache', 'dizziness', 'rash', 'pain', 'swelling', 'bleeding']
-        
+    def _extract_safety_information(self, result) -> str:
+        """Extract and categorize safety information from the result's pre-classified lines"""
         safety_info = []
         
-        for line in lines:
-            line_lower = line.lower().strip()
-            
-            if any(keyword in line_lower for keyword in serious_keywords):
-                safety_info.append(f"⚠️ **SERIOUS**: {line.strip()}")
-            elif any(keyword in line_lower for keyword in common_keywords + symptom_keywords):
-                safety_info.append(f"• {line.strip()}")
-            elif line.strip() and len(line.strip()) > 10:  
-                safety_info.append(f"- {line.strip()}")
+        for record in result.line_records[:15]:
+            if record.has("serious"):
+                safety_info.append(f"⚠️ **SERIOUS**: {record.text}")
+            elif record.has("common") or record.has("symptom"):
+                safety_info.append(f"• {record.text}")
+            elif len(record.text) > 10:  
+                safety_info.append(f"- {record.text}")
         
         if safety_info:
             return "\n".join(safety_info[:8])  
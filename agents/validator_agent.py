@@ -1,9 +1,11 @@
 from camel.agents import ChatAgent
 from camel.toolkits import SearchToolkit
-from camel.models import ModelFactory
-from camel.configs import MistralConfig
-from camel.types import ModelType, ModelPlatformType
-from search_coordinator import get_search_coordinator, InformationType
+from search_coordinator import get_search_coordinator, deadline_bounded_tool, InformationType
+from prompts import get_prompt
+from token_accounting import TokenAccountingMixin
+from streaming import StreamingMixin
+from model_routing import ClonePreservingMixin, create_role_model, install_router
+from search_index import is_numeric_term, tokenize
 import os
 from dotenv import load_dotenv
 import logging
@@ -12,122 +14,38 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 def get_search_tool():
-    """Safely get search tool with error handling"""
+    """Safely get search tool with error handling (bounded by the request deadline)"""
     try:
         toolkit = SearchToolkit()
         tools = toolkit.get_tools()
         if not tools:
             raise ValueError("No search tools available")
-        return tools[0]
+        return deadline_bounded_tool(tools[0])
     except Exception as e:
         logger.error(f"Failed to initialize search tool: {e}")
         return None
 
 
-model = ModelFactory.create(
-    model_platform=ModelPlatformType.MISTRAL,
-    model_type=ModelType.MISTRAL_MEDIUM_3,
-    model_config_dict=MistralConfig(temperature=0.1).as_dict(),  
-)
+model = create_role_model("ValidatorAgent", temperature=0.1)
 
 
 validator_search_tool = get_search_tool()
 
-class CoordinatedValidatorAgent(ChatAgent):
+class CoordinatedValidatorAgent(ClonePreservingMixin, StreamingMixin, TokenAccountingMixin, ChatAgent):
     """Enhanced medical verification agent with coordinated search capabilities and shared result access"""
     
     def __init__(self):
         super().__init__(
-            system_message="""You are a medical fact-checking and verification specialist with advanced coordinated search capabilities and access to shared search results from all pharmaceutical specialist agents.
-
-**PRIMARY VERIFICATION RESPONSIBILITIES:**
-- Cross-verify medical claims from all specialist agents against authoritative sources
-- Access and analyze shared search results from dosage, safety, and interaction specialists
-- Validate consistency of information across multiple medical databases
-- Identify and resolve conflicts between different authoritative sources
-
-**COORDINATED VERIFICATION ADVANTAGES:**
-You operate as the quality assurance specialist with unique access to:
-- **Shared Search Cache**: Results from DosageAgent, SideEffectsAgent, and WebSearchAgent
-- **Cross-Reference Capability**: Compare findings across all specialist searches
-- **Efficiency Optimization**: Verify without redundant searches when cached data exists
-- **Comprehensive Coverage**: Ensure no gaps in medical information verification
-
-**AUTHORITATIVE VERIFICATION SOURCES (Hierarchical Priority):**
-- **TIER 1 (Highest Authority)**: FDA.gov, MedlinePlus (NIH), Mayo Clinic
-- **TIER 2 (High Authority)**: Medscape, Drugs.com, WHO.int
-- **TIER 3 (Supporting Sources)**: NHS.uk, PubMed, Health Canada
-- **REGULATORY**: FDA Safety Communications, Drug Labels, Official Prescribing Information
-
-**COMPREHENSIVE VERIFICATION PROCESS:**
-
-1. **SHARED RESULT ANALYSIS**:
-   - Access cached search results from all specialist agents
-   - Review dosage claims from DosageAgent's authoritative sources
-   - Verify safety information from SideEffectsAgent's FDA and safety database searches
-   - Validate interaction data from WebSearchAgent's regulatory and clinical searches
-
-2. **CROSS-VERIFICATION METHODOLOGY**:
-   - **Consistency Check**: Compare claims across multiple specialist agent findings
-   - **Source Hierarchy**: Prioritize FDA and NIH sources over secondary sources
-   - **Conflict Resolution**: Identify discrepancies and determine most authoritative information
-   - **Gap Analysis**: Identify missing verification for critical safety claims
-
-3. **INDEPENDENT VERIFICATION** (when needed):
-   - Perform targeted searches for unverified or conflicting claims
-   - Access primary regulatory sources for definitive information
-   - Cross-check against official drug labeling and prescribing information
-   - Validate against peer-reviewed medical literature when available
-
-4. **EVIDENCE-BASED VERIFICATION REPORTING**:
-   - **Verified Claims**: ✅ Clear confirmation with source hierarchy
-   - **Partially Verified**: ⚠️ Some sources confirm, others unclear
-   - **Unverified Claims**: ❌ Insufficient evidence or conflicting information
-   - **Conflicting Information**: 🔄 Multiple sources with different findings
-
-**COORDINATED VERIFICATION STRATEGY:**
-- Leverage shared search results to eliminate redundant verification searches
-- Use cached FDA and MedlinePlus data from other agents for cross-validation
-- Focus new searches on resolving conflicts or filling verification gaps
-- Coordinate with other agents to ensure comprehensive coverage
-
-**VERIFICATION QUALITY STANDARDS:**
-- Require minimum of 2 authoritative sources for verification
-- Prioritize FDA and NIH sources for medical claim validation
-- Flag all unverified claims clearly and recommend professional consultation
-- Maintain conservative approach: when in doubt, recommend healthcare provider consultation
-
-**CONFLICT RESOLUTION PROTOCOLS:**
-- **Source Authority Ranking**: FDA > MedlinePlus > Mayo Clinic > Medscape > Others
-- **Recency Priority**: More recent FDA safety communications override older information
-- **Specificity Preference**: Specific drug labeling over general medical information
-- **Conservative Selection**: Choose more conservative recommendation when sources conflict
-
-**SHARED COORDINATION BENEFITS:**
-- Access to 3x more search data through shared results
-- Ability to cross-verify without additional API calls
-- Comprehensive coverage across dosage, safety, and interaction domains
-- Efficient identification of information gaps requiring targeted verification
-
-**VERIFICATION DELIVERABLE STANDARDS:**
-- Clear verification status for each major medical claim
-- Source attribution with authority level indication
-- Conflict identification and resolution explanation
-- Recommendations for professional consultation when verification is incomplete
-
-**CRITICAL VERIFICATION PRINCIPLES:**
-- Patient safety takes priority over verification efficiency
-- Unverified claims are clearly flagged as requiring professional consultation
-- Conservative approach: unclear verification defaults to professional consultation recommendation
-- Comprehensive coverage: all safety-critical claims must be verified or flagged""",
+            system_message=get_prompt("ValidatorAgent"),
             model=model,
             tools=[validator_search_tool] if validator_search_tool else []
         )
         self.search_coordinator = get_search_coordinator()
         self.agent_name = "ValidatorAgent"
+        install_router(self, self.agent_name)
 
-    def coordinated_search(self, query: str, max_sources: int = 2):
-        """Perform coordinated search using the search coordinator"""
+    def coordinated_search(self, query: str, max_sources: int = 2, deadline=None):
+        """Perform coordinated search using the search coordinator within the request deadline"""
         if not validator_search_tool:
             return {"error": "Search tool not available"}
         
@@ -136,7 +54,8 @@ You operate as the quality assurance specialist with unique access to:
                 agent_name=self.agent_name,
                 query=query,
                 search_tool=validator_search_tool,
-                max_sources=max_sources
+                max_sources=max_sources,
+                deadline=deadline
             )
             return results
         except Exception as e:
@@ -162,6 +81,34 @@ You operate as the quality assurance specialist with unique access to:
         
         return verification_report
 
+    def find_supporting_evidence(self, medication: str, claim: str, limit: int = 3):
+        """
+        Find lines of cached search content that support a claim about a medication
+        
+        Args:
+            medication: Name of the medication the claim is about
+            claim: Claim text, e.g. "4000 mg maximum daily dose"
+            limit: Maximum number of supporting lines
+            
+        Returns:
+            List of ContentMatch lines; every number in the claim must appear on the line
+            together with at least half of its other terms
+        """
+        medication_terms = set(tokenize(medication))
+        terms = [term for term in tokenize(claim) if term not in medication_terms]
+        if not terms:
+            return []
+        
+        numbers = tuple(term for term in terms if is_numeric_term(term))
+        min_matched = max(len(numbers), (len(terms) + 1) // 2)
+        return self.search_coordinator.search_cached_content(
+            " ".join(terms),
+            required=numbers,
+            min_matched=min_matched,
+            query_filter=medication,
+            limit=limit
+        )
+
     def comprehensive_verification(self, medication: str, patient_context: str = "") -> str:
         """
         Perform comprehensive verification of all available information for a medication
@@ -208,6 +155,21 @@ You operate as the quality assurance specialist with unique access to:
             verification_parts.append("")
 
         
+        if claims:
+            verification_parts.append("**🔎 CLAIM EVIDENCE FROM CACHED SOURCES:**")
+            
+            for claim_name, claim in claims.items():
+                evidence = self.find_supporting_evidence(medication, str(claim))
+                if evidence:
+                    best = evidence[0]
+                    verification_parts.append(f"   • **{claim_name}**: ✅ Supported by {best.source} "
+                                              f"({len(evidence)} matching line(s)): \"{best.line[:200]}\"")
+                else:
+                    verification_parts.append(f"   • **{claim_name}**: ⚠️ No supporting text found in cached sources")
+            
+            verification_parts.append("")
+
+        
         verification_categories = self._analyze_verification_categories(shared_results)
         
         verification_parts.append("**🔍 VERIFICATION STATUS BY CATEGORY:**")
@@ -274,9 +236,9 @@ Verification search coordination encountered an issue: {verification_searches['e
         
         verification_parts.append("**🔍 INDEPENDENT VERIFICATION RESULTS:**")
         for source, result in verification_searches.items():
-            if result.success and result.content:
+            if result.success and result.has_content:
                 verification_parts.append(f"**{source} Verification:**")
-                verification_info = self._extract_verification_data(result.content)
+                verification_info = self._extract_verification_data(result)
                 verification_parts.append(verification_info)
                 verification_parts.append("")
 
@@ -376,17 +338,12 @@ Verification search coordination encountered an issue: {verification_searches['e
         
         return "\n".join(analysis_parts)
 
-    def _extract_verification_data(self, content: str) -> str:
-        """Extract verification-relevant information from search content"""
-        lines = content.split('\n')[:10]
-        
-        verification_keywords = ['fda', 'approved', 'indicated', 'contraindicated', 'warning', 'dosage']
-        verification_info = []
-        
-        for line in lines:
-            line_lower = line.lower().strip()
-            if any(keyword in line_lower for keyword in verification_keywords) and len(line.strip()) > 10:
-                verification_info.append(f"✓ {line.strip()}")
+    def _extract_verification_data(self, result) -> str:
+        """Extract verification-relevant information from the result's pre-classified lines"""
+        verification_info = [
+            f"✓ {record.text}" for record in result.line_records[:10]
+            if record.has("verification") and len(record.text) > 10
+        ]
         
         if verification_info:
             return "\n".join(verification_info[:6])
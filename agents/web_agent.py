@@ -1,10 +1,19 @@
 from camel.agents import ChatAgent
 from camel.toolkits import SearchToolkit
-from camel.models import ModelFactory
-from camel.configs import MistralConfig
-from camel.types import ModelType, ModelPlatformType
-from search_coordinator import get_search_coordinator, InformationType
+from search_coordinator import get_search_coordinator, classify_content_lines, deadline_bounded_tool
+from prompts import get_prompt
+from token_accounting import TokenAccountingMixin
+from streaming import StreamingMixin
+from model_routing import ClonePreservingMixin, create_role_model, install_router
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import contextvars
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv
 import logging
 
@@ -12,120 +21,80 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 def get_search_tool():
-    """Safely get search tool with error handling"""
+    """Safely get search tool with error handling (bounded by the request deadline)"""
     try:
         toolkit = SearchToolkit()
         tools = toolkit.get_tools()
         if not tools:
             raise ValueError("No search tools available")
-        return tools[0]
+        return deadline_bounded_tool(tools[0])
     except Exception as e:
         logger.error(f"Failed to initialize search tool: {e}")
         return None
 
 
-model = ModelFactory.create(
-    model_platform=ModelPlatformType.MISTRAL,
-    model_type=ModelType.MISTRAL_MEDIUM_3,
-    model_config_dict=MistralConfig(temperature=0.5).as_dict(),  
-)
+model = create_role_model("WebSearchAgent", temperature=0.5)
 
 
 web_search_tool = get_search_tool()
 
-class CoordinatedWebAgent(ChatAgent):
+# Concurrent per-drug searches of an interaction matrix (sources are rate limited by the coordinator)
+MATRIX_SEARCH_WORKERS = 4
+
+# Evidence lines kept per medication pair
+PAIR_EVIDENCE_LIMIT = 3
+
+class InteractionSeverity(Enum):
+    """Severity of a medication pair, from the strongest evidence line found"""
+    MAJOR = "major"
+    MODERATE = "moderate"
+    DOCUMENTED = "documented"   # Mentioned together without a severity
+    NONE_FOUND = "none_found"   # No evidence in the retrieved sources
+
+SEVERITY_RANK = {
+    InteractionSeverity.NONE_FOUND: 0,
+    InteractionSeverity.DOCUMENTED: 1,
+    InteractionSeverity.MODERATE: 2,
+    InteractionSeverity.MAJOR: 3,
+}
+
+SEVERITY_SYMBOLS = {
+    InteractionSeverity.MAJOR: "🚨",
+    InteractionSeverity.MODERATE: "⚠️",
+    InteractionSeverity.DOCUMENTED: "•",
+    InteractionSeverity.NONE_FOUND: "✓",
+}
+
+@dataclass
+class PairInteraction:
+    """Interaction evidence for an unordered medication pair"""
+    drugs: Tuple[str, str]
+    severity: InteractionSeverity = InteractionSeverity.NONE_FOUND
+    evidence: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    checked_at: float = field(default_factory=time.time)
+
+def pair_key(drug_a: str, drug_b: str) -> Tuple[str, str]:
+    """Order-independent cache key of a medication pair"""
+    return tuple(sorted((drug_a.strip().lower(), drug_b.strip().lower())))
+
+class CoordinatedWebAgent(ClonePreservingMixin, StreamingMixin, TokenAccountingMixin, ChatAgent):
     """Enhanced drug information agent with coordinated search capabilities for interactions and regulatory updates"""
     
     def __init__(self):
         super().__init__(
-            system_message="""You are a specialized drug information agent focusing on medication interactions, warnings, and regulatory updates with advanced coordinated search capabilities.
-
-**PRIMARY RESPONSIBILITIES:**
-- Research comprehensive drug interaction profiles through coordinated searches
-- Monitor current FDA warnings, alerts, and regulatory updates
-- Identify drug-food, drug-condition, and drug-supplement interactions
-- Provide evidence-based guidance on medication warnings and precautions
-
-**COORDINATED SEARCH SPECIALIZATION:**
-You operate as the regulatory and interaction specialist within an intelligent search coordination system:
-- Access cached FDA regulatory databases and safety communications
-- Coordinate with safety specialists to avoid duplicate adverse event searches
-- Share interaction findings with dosage and verification specialists
-- Leverage WHO and international regulatory data through optimized searches
-
-**AUTHORITATIVE INTERACTION SOURCES (Coordinated Priority):**
-- **PRIMARY REGULATORY**: FDA.gov, WHO.int, EMA (European Medicines Agency)
-- **CLINICAL DATABASES**: Medscape, PubMed, Clinical Pharmacology databases
-- **PROFESSIONAL RESOURCES**: Drugs.com, Lexicomp, Micromedex (when available)
-- **SECONDARY SOURCES**: NHS.uk, Health Canada, NIH databases
-
-**COMPREHENSIVE INTERACTION ANALYSIS:**
-
-1. **COORDINATED REGULATORY SEARCH**:
-   - Access cached FDA drug interaction databases and safety alerts
-   - Search WHO Global Database for international safety information
-   - Utilize coordinated queries for current regulatory updates and warnings
-   - Cross-reference multiple regulatory authorities for comprehensive coverage
-
-2. **SYSTEMATIC INTERACTION CATEGORIZATION**:
-   - **Major Interactions**: Severe, life-threatening, or contraindicated combinations
-   - **Moderate Interactions**: Clinically significant requiring monitoring or adjustment
-   - **Minor Interactions**: Limited clinical significance but worth noting
-   - **Drug-Food Interactions**: Dietary restrictions, timing considerations
-   - **Drug-Condition Interactions**: Contraindications for specific health conditions
-
-3. **REGULATORY ALERT MONITORING**:
-   - **FDA Safety Communications**: Current warnings, recalls, label changes
-   - **Black Box Warnings**: FDA's strongest safety warnings
-   - **International Alerts**: WHO, EMA, and other regulatory body communications
-   - **Recent Updates**: New safety information, dosing changes, contraindications
-
-4. **EVIDENCE-BASED ANALYSIS FORMAT**:
-   - Severity classification (Major/Moderate/Minor) with clinical significance
-   - Mechanism of interaction and clinical consequences
-   - Management recommendations (avoid, monitor, adjust, separate timing)
-   - Alternative medication suggestions when contraindications exist
-
-**COORDINATED INTEGRATION STRATEGY:**
-- Share critical interaction data with DosageAgent for dose modification recommendations
-- Coordinate with SideEffectsAgent to distinguish interactions from side effects
-- Provide ValidatorAgent with regulatory sources for comprehensive fact-checking
-- Ensure no gaps in regulatory monitoring through efficient search coordination
-
-**SEARCH COORDINATION OPTIMIZATION:**
-- Leverage cached FDA and WHO searches from previous queries
-- Utilize shared regulatory database results across the specialist team
-- Coordinate timing of regulatory searches to respect API limits
-- Cross-reference findings with other agents to ensure comprehensive coverage
-
-**CRITICAL SAFETY PROTOCOLS:**
-- Prioritize major and life-threatening interactions in all analysis
-- Include clear guidance for emergency situations involving dangerous interactions
-- Specify when to discontinue medications due to serious interactions
-- Provide immediate action steps for suspected interaction-related adverse events
-
-**REGULATORY COMPLIANCE:**
-- Base all interaction assessments on evidence from coordinated authoritative sources
-- Include current FDA safety communications and regulatory updates
-- Specify limitations of interaction checking and need for professional consultation
-- Maintain conservative approach to interaction severity classification
-
-**PROFESSIONAL INTEGRATION GUIDANCE:**
-- Emphasize pharmacist consultation for complex interaction analysis
-- Recommend healthcare provider involvement for medication changes
-- Include guidance on interaction monitoring and management
-- Specify when professional intervention is required for safe medication use
-
-**COORDINATED DELIVERABLE:**
-Provide comprehensive, evidence-based drug interaction and regulatory analysis that integrates current FDA alerts, WHO safety data, and clinical interaction databases using efficiently coordinated search results while maintaining the highest standards of pharmaceutical safety and regulatory compliance.""",
+            system_message=get_prompt("WebSearchAgent"),
             model=model,
             tools=[web_search_tool] if web_search_tool else []
         )
         self.search_coordinator = get_search_coordinator()
         self.agent_name = "WebSearchAgent"
+        install_router(self, self.agent_name)
+        self._pair_cache: Dict[Tuple[str, str], PairInteraction] = {}
+        self._pair_cache_lock = threading.Lock()
 
-    def coordinated_search(self, query: str, max_sources: int = 3):
-        """Perform coordinated search using the search coordinator"""
+    def coordinated_search(self, query: str, max_sources: int = 3, deadline=None):
+        """Perform coordinated search using the search coordinator within the request deadline"""
         if not web_search_tool:
             return {"error": "Search tool not available"}
         
@@ -134,25 +103,32 @@ Provide comprehensive, evidence-based drug interaction and regulatory analysis t
                 agent_name=self.agent_name,
                 query=query,
                 search_tool=web_search_tool,
-                max_sources=max_sources
+                max_sources=max_sources,
+                deadline=deadline
             )
             return results
         except Exception as e:
             logger.error(f"Coordinated search failed for {self.agent_name}: {e}")
             return {"error": f"Search failed: {str(e)}"}
 
-    def analyze_interactions(self, medication: str, additional_context: str = "") -> str:
+    def analyze_interactions(self, medication: str, additional_context: str = "",
+                             co_medications: Optional[Sequence[str]] = None) -> str:
         """
         Analyze drug interactions and regulatory information for a medication
         
         Args:
             medication: Name of the medication
             additional_context: Additional medications, conditions, or context
+            co_medications: Other medications the patient takes; when given, every pair
+                is checked in an interaction matrix (see analyze_interaction_matrix)
             
         Returns:
             Comprehensive interaction and regulatory analysis
         """
         
+        if co_medications:
+            return self.analyze_interaction_matrix([medication, *co_medications], additional_context)
+        
         search_query = f"{medication} drug interactions warnings FDA alerts"
         if additional_context:
             search_query += f" {additional_context}"
@@ -165,6 +141,164 @@ Provide comprehensive, evidence-based drug interaction and regulatory analysis t
         
         return interaction_analysis
 
+    def analyze_interaction_matrix(self, medications: Sequence[str], additional_context: str = "",
+                                   max_workers: int = MATRIX_SEARCH_WORKERS) -> str:
+        """
+        Analyze every pair of a multi-medication regimen as an N×N interaction matrix
+        
+        Args:
+            medications: Names of all medications the patient takes
+            additional_context: Conditions or other context
+            max_workers: Concurrent per-drug searches
+            
+        Returns:
+            Interaction matrix with the evidence found for each interacting pair
+        """
+        drugs, pairs, failed = self.build_interaction_matrix(medications, max_workers)
+        if len(drugs) < 2:
+            return self.analyze_interactions(drugs[0] if drugs else "", additional_context)
+        return self._format_interaction_matrix(drugs, pairs, failed, additional_context)
+
+    def build_interaction_matrix(self, medications: Sequence[str], max_workers: int = MATRIX_SEARCH_WORKERS
+                                 ) -> Tuple[List[str], Dict[Tuple[str, str], PairInteraction], List[str]]:
+        """
+        Check every medication pair, searching each drug once and sharing its results across pairs
+        
+        Pair results are cached symmetrically (A+B is B+A) for the search cache TTL, and only
+        drugs that appear in an uncached pair are searched, concurrently. Each pair is
+        evaluated against the results its drugs' searches returned (web, cached or local).
+        
+        Args:
+            medications: Names of all medications the patient takes
+            max_workers: Concurrent per-drug searches
+            
+        Returns:
+            Distinct medications, pair results by pair_key, and medications whose search failed
+        """
+        drugs = []
+        for medication in medications:
+            name = (medication or "").strip()
+            if name and name.lower() not in (drug.lower() for drug in drugs):
+                drugs.append(name)
+        all_pairs = [(a, b) for i, a in enumerate(drugs) for b in drugs[i + 1:]]
+        
+        pairs = {}
+        pending = []
+        now = time.time()
+        with self._pair_cache_lock:
+            for a, b in all_pairs:
+                cached = self._pair_cache.get(pair_key(a, b))
+                if cached is not None and now - cached.checked_at < self.search_coordinator.cache_ttl:
+                    pairs[pair_key(a, b)] = cached
+                else:
+                    pending.append((a, b))
+        
+        # One interaction search per drug, shared by all of its pairs
+        to_search = list(dict.fromkeys(drug for pair in pending for drug in pair))
+        results_by_drug: Dict[str, Dict[str, Any]] = {}
+        failed = []
+        if to_search:
+            # Worker threads do not inherit the request context (deadline, search activity)
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(to_search)),
+                                    thread_name_prefix="interaction-search") as executor:
+                results = list(executor.map(
+                    lambda drug: context.copy().run(
+                        self.coordinated_search, f"{drug} drug interactions warnings FDA alerts", 3
+                    ),
+                    to_search,
+                ))
+            results_by_drug = {drug: ({} if "error" in result else result) for drug, result in zip(to_search, results)}
+            failed = [drug for drug in to_search
+                      if not any(r.success and r.has_content for r in results_by_drug[drug].values())]
+        
+        # Drugs whose every source answered; a source skipped at the deadline may hold evidence
+        complete = {drug for drug, results in results_by_drug.items()
+                    if results and all(r.success for r in results.values())}
+        
+        for a, b in pending:
+            pair = self._evaluate_pair(a, b, results_by_drug)
+            pairs[pair_key(a, b)] = pair
+            # Pairs with a failed or partial search are re-checked next time instead of cached
+            if a in complete and b in complete:
+                with self._pair_cache_lock:
+                    self._pair_cache[pair_key(a, b)] = pair
+        
+        return drugs, pairs, failed
+
+    def _evaluate_pair(self, drug_a: str, drug_b: str, results_by_drug: Dict[str, Dict[str, Any]]) -> PairInteraction:
+        """
+        Find lines of either drug's interaction results that mention the other drug
+        
+        Every line of every result returned for the drug is scanned, whether it came from a
+        web search, the (possibly shared) search cache or the local monograph store.
+        """
+        pair = PairInteraction(drugs=(drug_a, drug_b))
+        for drug, other in ((drug_a, drug_b), (drug_b, drug_a)):
+            mention = re.compile(rf"\b{re.escape(other.lower())}\b")
+            for source, result in results_by_drug.get(drug, {}).items():
+                if not (result.success and result.has_content):
+                    continue
+                for line in str(result.content).splitlines():
+                    line = line.strip()
+                    if not mention.search(line.lower()) or line in pair.evidence:
+                        continue
+                    record = classify_content_lines(line, limit=1)[0]
+                    if record.has("major"):
+                        severity = InteractionSeverity.MAJOR
+                    elif record.has("moderate"):
+                        severity = InteractionSeverity.MODERATE
+                    else:
+                        severity = InteractionSeverity.DOCUMENTED
+                    if SEVERITY_RANK[severity] > SEVERITY_RANK[pair.severity]:
+                        pair.severity = severity
+                    if len(pair.evidence) < PAIR_EVIDENCE_LIMIT:
+                        pair.evidence.append(line)
+                        if source not in pair.sources:
+                            pair.sources.append(source)
+        return pair
+
+    def _format_interaction_matrix(self, drugs: List[str], pairs: Dict[Tuple[str, str], PairInteraction],
+                                   failed: List[str], context: str) -> str:
+        """Format the interaction matrix and the evidence of interacting pairs"""
+        analysis_parts = []
+        analysis_parts.append(f"🔄 **POLYPHARMACY INTERACTION MATRIX ({len(drugs)} MEDICATIONS)**")
+        if context:
+            analysis_parts.append(f"*Additional Context: {context}*")
+        analysis_parts.append("")
+        
+        analysis_parts.append("| | " + " | ".join(f"**{drug}**" for drug in drugs) + " |")
+        analysis_parts.append("|---" * (len(drugs) + 1) + "|")
+        for row in drugs:
+            cells = ["—" if row == col else SEVERITY_SYMBOLS[pairs[pair_key(row, col)].severity] for col in drugs]
+            analysis_parts.append(f"| **{row}** | " + " | ".join(cells) + " |")
+        analysis_parts.append("")
+        analysis_parts.append("🚨 major · ⚠️ moderate · • documented together · ✓ none found in retrieved sources")
+        analysis_parts.append("")
+        
+        interacting = sorted((pair for pair in pairs.values() if pair.evidence),
+                             key=lambda pair: SEVERITY_RANK[pair.severity], reverse=True)
+        if interacting:
+            analysis_parts.append("**🎯 PAIR FINDINGS:**")
+            for pair in interacting:
+                analysis_parts.append(f"{SEVERITY_SYMBOLS[pair.severity]} **{pair.drugs[0]} + {pair.drugs[1]}** "
+                                      f"({pair.severity.value}; {', '.join(pair.sources)})")
+                for line in pair.evidence:
+                    analysis_parts.append(f"   • {line}")
+            analysis_parts.append("")
+        
+        if failed:
+            analysis_parts.append(f"⚠️ **Interaction searches unavailable for:** {', '.join(failed)} - "
+                                  "pairs with these medications could not be fully checked")
+            analysis_parts.append("")
+        
+        analysis_parts.append("📞 **PROFESSIONAL CONSULTATION REQUIRED:**")
+        analysis_parts.append("   • **Pharmacist** - Review of the complete medication list, including supplements")
+        analysis_parts.append("   • **Healthcare Provider** - Before starting, stopping or combining any of these medications")
+        analysis_parts.append("   • ✓ means no interaction was found in the retrieved sources, not that the combination is safe")
+        
+        return "\n".join(analysis_parts)
+
     def search_regulatory_updates(self, medication: str) -> str:
         """Search for current regulatory updates and FDA alerts"""
         regulatory_query = f"{medication} FDA safety alerts regulatory updates recalls"
@@ -201,12 +335,12 @@ Search coordination encountered an issue: {search_results['error']}
         interaction_data = {}
         
         for source, result in search_results.items():
-            if result.success and result.content:
+            if result.success and result.has_content:
                 successful_sources.append(source)
                 analysis_parts.append(f"**📋 {source} Interaction Data:**")
                 
                 
-                interaction_info = self._extract_interaction_information(result.content)
+                interaction_info = self._extract_interaction_information(result)
                 interaction_data[source] = interaction_info
                 analysis_parts.append(interaction_info)
                 analysis_parts.append("")
@@ -250,28 +384,19 @@ Search coordination encountered an issue: {search_results['error']}
 
         return "\n".join(analysis_parts)
 
-    def _extract_interaction_information(self, content: str) -> str:
-        """Extract and categorize interaction information from search content"""
-        lines = content.split('\n')[:12]  
-        
-        
-        major_keywords = ['contraindicated', 'avoid', 'dangerous', 'serious', 'major', 'severe']
-        moderate_keywords = ['moderate', 'monitor', 'caution', 'adjust', 'consider']
-        regulatory_keywords = ['fda', 'warning', 'alert', 'recall', 'update', 'safety']
-        
+    def _extract_interaction_information(self, result) -> str:
+        """Extract and categorize interaction information from the result's pre-classified lines"""
         interaction_info = []
         
-        for line in lines:
-            line_lower = line.lower().strip()
-            
-            if any(keyword in line_lower for keyword in major_keywords):
-                interaction_info.append(f"🚨 **MAJOR**: {line.strip()}")
-            elif any(keyword in line_lower for keyword in regulatory_keywords):
-                interaction_info.append(f"📢 **REGULATORY**: {line.strip()}")
-            elif any(keyword in line_lower for keyword in moderate_keywords):
-                interaction_info.append(f"⚠️ **MODERATE**: {line.strip()}")
-            elif 'interaction' in line_lower or 'drug' in line_lower:
-                interaction_info.append(f"• {line.strip()}")
+        for record in result.line_records[:12]:
+            if record.has("major"):
+                interaction_info.append(f"🚨 **MAJOR**: {record.text}")
+            elif record.has("regulatory"):
+                interaction_info.append(f"📢 **REGULATORY**: {record.text}")
+            elif record.has("moderate"):
+                interaction_info.append(f"⚠️ **MODERATE**: {record.text}")
+            elif record.has("interaction"):
+                interaction_info.append(f"• {record.text}")
         
         if interaction_info:
             return "\n".join(interaction_info[:8])  
@@ -300,9 +425,9 @@ Search coordination encountered an issue: {search_results['error']}
         regulatory_info = []
         
         for source, result in search_results.items():
-            if result.success and result.content:
+            if result.success and result.has_content:
                 regulatory_info.append(f"**{source} Regulatory Updates:**")
-                regulatory_info.append(self._extract_regulatory_updates(result.content))
+                regulatory_info.append(self._extract_regulatory_updates(result))
                 regulatory_info.append("")
         
         if regulatory_info:
@@ -310,17 +435,12 @@ Search coordination encountered an issue: {search_results['error']}
         else:
             return "No current regulatory updates found through coordinated search."
 
-    def _extract_regulatory_updates(self, content: str) -> str:
-        """Extract regulatory updates and alerts from search content"""
-        lines = content.split('\n')[:8]
-        
-        regulatory_keywords = ['fda', 'alert', 'warning', 'recall', 'safety', 'update', 'communication']
-        regulatory_updates = []
-        
-        for line in lines:
-            line_lower = line.lower().strip()
-            if any(keyword in line_lower for keyword in regulatory_keywords):
-                regulatory_updates.append(f"📢 {line.strip()}")
+    def _extract_regulatory_updates(self, result) -> str:
+        """Extract regulatory updates and alerts from the result's pre-classified lines"""
+        regulatory_updates = [
+            f"📢 {record.text}" for record in result.line_records[:8]
+            if record.has("regulatory_update")
+        ]
         
         if regulatory_updates:
             return "\n".join(regulatory_updates[:5])
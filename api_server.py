@@ -0,0 +1,252 @@
+"""
+HTTP API Server for the Pharmacy Multi-Agent System
+
+This module exposes run_pharmacy_query over HTTP, separately from the Streamlit UI, with
+a configurable thread or process worker pool. All workers share one search cache: threads
+share the process-wide SearchCoordinator, and worker processes (or several servers behind
+a load balancer) use a shared cache server (see shared_cache).
+
+Requests are admitted through a priority scheduler in front of the pool: at most --workers
+analyses run at once, up to --max-queued wait (urgent first), and requests beyond that are
+shed at once with 503 and the professional fallback response. Identical requests arriving
+while one is queued or running share its analysis.
+
+Usage:
+    python api_server.py --port 8080 --workers 4 --pool thread
+    python api_server.py --port 8080 --workers 4 --pool process
+    MEDFORCE_CACHE_AUTHKEY=<secret> python api_server.py --port 8080 --pool process --cache-address cachehost:50000
+
+Endpoints:
+    POST /v1/query             {"query": "...", "time_budget": 60, "priority": "urgent"}
+                               -> {"query", "status", "response"}
+    POST /v1/query/structured  same body -> structured analysis
+    GET  /v1/status            coordination status, worker pool, scheduler and coalescing
+    GET  /healthz              liveness check
+"""
+
+import argparse
+import json
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from scheduler import DEFAULT_MAX_QUEUED, Priority, RequestScheduler, SingleFlight, normalize_query
+from search_coordinator import get_search_coordinator
+from shared_cache import connect_cache, start_local_cache
+
+logger = logging.getLogger(__name__)
+
+# Request limits
+MAX_BODY_BYTES = 64 * 1024
+MAX_QUERY_CHARS = 2000
+
+# Retry-After (seconds) sent with shed requests
+SHED_RETRY_AFTER_S = 5
+
+class BadRequest(Exception):
+    """Invalid API request"""
+
+def _init_process_worker(cache_address: str, cache_authkey: Optional[bytes]):
+    """Point the search coordinator of a worker process at the shared cache"""
+    get_search_coordinator().use_cache_backend(connect_cache(cache_address, cache_authkey))
+
+def _run_query(query: str, time_budget: Optional[float], structured: bool) -> Dict[str, Any]:
+    """Run one query in a pool worker (admission is done by the API scheduler)"""
+    from main import analyze_pharmacy_query
+
+    return _response_body(analyze_pharmacy_query(query, time_budget), structured)
+
+def _response_body(analysis: Dict[str, Any], structured: bool) -> Dict[str, Any]:
+    if structured:
+        return analysis
+    return {"query": analysis["query"], "status": analysis["status"], "response": analysis["response"]}
+
+class PharmacyAPI:
+    """Worker pool running pharmacy queries for the HTTP handlers"""
+
+    def __init__(self, workers: int = 4, pool: str = "thread", cache_address: Optional[str] = None,
+                 max_queued: int = DEFAULT_MAX_QUEUED):
+        if pool not in ("thread", "process"):
+            raise ValueError(f"Unknown worker pool type: {pool}")
+        self.workers = workers
+        self.pool = pool
+        self._cache_manager = None
+        cache_authkey = None
+
+        # Imported up front so shedding under load never waits on the model stack import
+        from main import shed_analysis
+        self._shed_analysis = shed_analysis
+
+        # Worker processes need a cache server; threads share this process's coordinator
+        if pool == "process" and cache_address is None:
+            self._cache_manager, cache, cache_authkey = start_local_cache()
+            host, port = self._cache_manager.address
+            cache_address = f"{host}:{port}"
+        elif cache_address is not None:
+            cache = connect_cache(cache_address)
+        else:
+            cache = None
+        self.cache_address = cache_address
+        if cache is not None:
+            get_search_coordinator().use_cache_backend(cache)
+
+        if pool == "process":
+            self.executor: Executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_process_worker, initargs=(cache_address, cache_authkey)
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pharmacy-query")
+
+        self.scheduler = RequestScheduler(max_concurrent=workers, max_queued=max_queued, name="api")
+        self.single_flight = SingleFlight(name="api")
+
+    def run_query(self, query: str, time_budget: Optional[float] = None, structured: bool = False,
+                  priority: Priority = Priority.NORMAL) -> Dict[str, Any]:
+        """Run a query on the worker pool and wait for its analysis (status "shed" under overload)"""
+        future, leader = self.single_flight.submit(
+            (normalize_query(query), time_budget, structured),
+            lambda: self.scheduler.submit(
+                self._execute, query, time_budget, structured, priority=priority,
+                fallback=lambda: _response_body(self._shed_analysis(query), structured),
+            ),
+            priority,
+        )
+        body = future.result()
+        return body if leader else {**body, "query": query}
+
+    def _execute(self, query: str, time_budget: Optional[float], structured: bool) -> Dict[str, Any]:
+        return self.executor.submit(_run_query, query, time_budget, structured).result()
+
+    def status(self) -> Dict[str, Any]:
+        """Get coordination status and worker pool configuration"""
+        try:
+            from agents import get_coordination_status
+            status = get_coordination_status()
+        except Exception as e:
+            logger.warning(f"Agent status unavailable: {e}")
+            status = {"status": "degraded", "metrics": get_search_coordinator().get_cache_stats()}
+        status["worker_pool"] = {
+            "type": self.pool,
+            "workers": self.workers,
+            "shared_cache": self.cache_address,
+        }
+        status["scheduler"] = self.scheduler.get_stats()
+        status["single_flight"] = self.single_flight.get_stats()
+        return status
+
+    def shutdown(self):
+        self.scheduler.shutdown()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._cache_manager is not None:
+            self._cache_manager.shutdown()
+
+class PharmacyRequestHandler(BaseHTTPRequestHandler):
+    """JSON request handler for the pharmacy API"""
+
+    server_version = "MedForceAPI/1.0"
+
+    @property
+    def api(self) -> PharmacyAPI:
+        return self.server.api
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/v1/status":
+            self._send_json(200, self.api.status())
+        else:
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ("/v1/query", "/v1/query/structured"):
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            query, time_budget, priority = self._read_query()
+            result = self.api.run_query(query, time_budget, structured=self.path.endswith("/structured"),
+                                        priority=priority)
+            if result["status"] == "shed":
+                self._send_json(503, result, headers={"Retry-After": str(SHED_RETRY_AFTER_S)})
+            else:
+                self._send_json(200, result)
+        except BadRequest as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Query failed: {e}")
+            self._send_json(500, {"error": "Analysis failed", "detail": str(e)[:200]})
+
+    def _read_query(self) -> Tuple[str, Optional[float], Priority]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            raise BadRequest(f"Request body must be between 1 and {MAX_BODY_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise BadRequest("Request body must be JSON")
+
+        query = body.get("query") if isinstance(body, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            raise BadRequest("'query' must be a non-empty string")
+        if len(query) > MAX_QUERY_CHARS:
+            raise BadRequest(f"'query' must be at most {MAX_QUERY_CHARS} characters")
+
+        time_budget = body.get("time_budget")
+        if time_budget is not None and (not isinstance(time_budget, (int, float)) or time_budget <= 0):
+            raise BadRequest("'time_budget' must be a positive number of seconds")
+
+        priority = body.get("priority", "normal")
+        if not isinstance(priority, str) or priority.upper() not in Priority.__members__:
+            names = ", ".join(p.name.lower() for p in Priority)
+            raise BadRequest(f"'priority' must be one of: {names}")
+        return query.strip(), time_budget, Priority[priority.upper()]
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+def create_server(host: str = "127.0.0.1", port: int = 8080, api: Optional[PharmacyAPI] = None) -> ThreadingHTTPServer:
+    """Create the HTTP server (call serve_forever() to run it)"""
+    server = ThreadingHTTPServer((host, port), PharmacyRequestHandler)
+    server.daemon_threads = True
+    server.api = api or PharmacyAPI()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="MedForce pharmacy analysis API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="number of concurrent analyses")
+    parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+    parser.add_argument("--max-queued", type=int, default=DEFAULT_MAX_QUEUED,
+                        help="queued analyses before new requests are shed")
+    parser.add_argument("--cache-address", default=None,
+                        help="host:port of a shared cache server (python shared_cache.py, "
+                             "needs MEDFORCE_CACHE_AUTHKEY)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    api = PharmacyAPI(workers=args.workers, pool=args.pool, cache_address=args.cache_address,
+                      max_queued=args.max_queued)
+    server = create_server(args.host, args.port, api)
+    logger.info(f"Pharmacy API listening on http://{args.host}:{args.port} "
+                f"({args.workers} {args.pool} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        api.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import streamlit as st
-from main import run_pharmacy_query
+from main import run_pharmacy_query_stream
+from agents import get_all_agents
+from search_coordinator import get_search_coordinator
+from query_state import QueryFields, QueryState, Section, WORKFORCE_SECTIONS
+from streaming import StreamEventType
+from collections import OrderedDict
 import re
 import json
+import threading
+import time
+from dosage_parser import evaluate_dose, parse_dosage, parse_recommended_limits, parse_user_dose
 
 
 st.set_page_config(
@@ -761,92 +769,29 @@ def create_general_summary(sections):
     return "\n".join(summary_parts)
 
 def extract_dosage_numbers(text):
-    """Extract dosage numbers from text for comparison"""
-    import re
-    # Look for patterns like "500mg", "1000 mg", "2 tablets", etc.
-    patterns = [
-        r'(\d+(?:\.\d+)?)\s*mg',
-        r'(\d+(?:\.\d+)?)\s*milligrams?',
-        r'(\d+(?:\.\d+)?)\s*tablets?',
-        r'(\d+(?:\.\d+)?)\s*capsules?'
-    ]
-    
-    numbers = []
-    for pattern in patterns:
-        matches = re.findall(pattern, text.lower())
-        numbers.extend([float(match) for match in matches])
-    
-    return numbers
+    """Extract dosage amounts from text for comparison, normalized to canonical units"""
+    return [quantity.value for quantity in parse_dosage(text or "")]
 
 def check_dosage_safety(user_dosage, analysis_content):
     """Check if user's dosage exceeds recommended amounts"""
     if not user_dosage or not analysis_content:
         return None
     
-    # Extract numbers from user input
-    user_numbers = extract_dosage_numbers(user_dosage)
-    if not user_numbers:
+    # Parse the user's dose (amount, unit, per-dose/per-day and frequency)
+    user_dose = parse_user_dose(user_dosage)
+    if user_dose is None:
         return None
     
-    user_dose = max(user_numbers)  # Take the highest number mentioned
-    
-    # Extract recommended dosages from analysis
-    analysis_text = analysis_content.lower()
-    recommended_numbers = extract_dosage_numbers(analysis_text)
-    
-    # Look for maximum daily dose specifically
-    max_daily_patterns = [
-        r'maximum daily (?:dose|limit)[:\s]*(\d+(?:\.\d+)?)\s*mg',
-        r'max (?:dose|daily)[:\s]*(\d+(?:\.\d+)?)\s*mg',
-        r'do not exceed[:\s]*(\d+(?:\.\d+)?)\s*mg'
-    ]
-    
-    max_daily_dose = None
-    for pattern in max_daily_patterns:
-        matches = re.findall(pattern, analysis_text)
-        if matches:
-            max_daily_dose = float(matches[0])
-            break
-    
-    # Look for single dose limits
-    single_dose_patterns = [
-        r'single dose[:\s]*(?:up to |maximum )?(\d+(?:\.\d+)?)\s*mg',
-        r'per dose[:\s]*(\d+(?:\.\d+)?)\s*mg',
-        r'(?:325|500|650|1000)\s*mg.*every'
-    ]
-    
-    max_single_dose = None
-    for pattern in single_dose_patterns:
-        matches = re.findall(pattern, analysis_text)
-        if matches:
-            max_single_dose = float(matches[0])
-            break
-    
-    # If we find standard dosage ranges like "325-650 mg"
-    if not max_single_dose and recommended_numbers:
-        max_single_dose = max(recommended_numbers)
-    
-    # Check if user dosage is concerning
-    warnings = []
-    
-    if max_single_dose and user_dose > max_single_dose:
-        warnings.append({
-            "type": "single_dose",
-            "user_dose": user_dose,
-            "max_recommended": max_single_dose,
-            "severity": "high" if user_dose > max_single_dose * 1.5 else "moderate"
-        })
-    
-    if max_daily_dose and user_dose > max_daily_dose:
-        warnings.append({
-            "type": "daily_dose",
-            "user_dose": user_dose,
-            "max_recommended": max_daily_dose,
-            "severity": "critical"
-        })
+    # Parse single-dose and daily limits from the analysis and compare in the same units
+    limits = parse_recommended_limits(analysis_content)
+    warnings = evaluate_dose(user_dose, limits)
     
     return warnings if warnings else None
 
+def format_dose(amount, unit):
+    """Format a normalized dose for display"""
+    return f"{amount:g} {unit}"
+
 def display_dosage_warnings(warnings, medication_name):
     """Display dosage warnings to the user"""
     if not warnings:
@@ -857,11 +802,11 @@ def display_dosage_warnings(warnings, medication_name):
             st.error(f"""
 ## 🚨 CRITICAL DOSAGE WARNING 🚨
             
-**Your entered dosage ({warning['user_dose']}mg) exceeds the maximum safe daily limit!**
+**Your entered dosage ({format_dose(warning['user_dose'], warning['unit'])}) exceeds the maximum safe daily limit!**
             
-**Your dosage:** {warning['user_dose']}mg
+**Your dosage:** {format_dose(warning['user_dose'], warning['unit'])}
 
-**Maximum safe daily limit:** {warning['max_recommended']}mg
+**Maximum safe daily limit:** {format_dose(warning['max_recommended'], warning['unit'])}
 
 **Risk:** Potential serious health complications including liver damage
             
@@ -880,9 +825,9 @@ def display_dosage_warnings(warnings, medication_name):
             
 **Your entered dosage appears to exceed standard recommendations.**
             
-**Your dosage:** {warning['user_dose']}mg
+**Your dosage:** {format_dose(warning['user_dose'], warning['unit'])}
 
-**Typical maximum single dose:** {warning['max_recommended']}mg
+**Typical maximum single dose:** {format_dose(warning['max_recommended'], warning['unit'])}
 
 **Concern:** This dosage is significantly higher than standard recommendations
             
@@ -899,9 +844,9 @@ def display_dosage_warnings(warnings, medication_name):
             
 **Your entered dosage is above typical recommendations.**
             
-**Your dosage:** {warning['user_dose']}mg
+**Your dosage:** {format_dose(warning['user_dose'], warning['unit'])}
 
-**Standard dosage range:** Up to {warning['max_recommended']}mg
+**Standard dosage range:** Up to {format_dose(warning['max_recommended'], warning['unit'])}
             
 ### Please confirm:
 
@@ -910,6 +855,149 @@ def display_dosage_warnings(warnings, medication_name):
 - You are not combining with other medications containing the same active ingredient
             """)
 
+# Analyses kept per session so reruns re-render instead of re-running the workforce
+SESSION_ANALYSIS_LIMIT = 10
+
+# Analyses shared by all sessions of this process
+PROCESS_CACHE_TTL_S = 3600
+PROCESS_CACHE_ENTRIES = 256
+
+# Live headings of the workforce sections while they are being produced
+LIVE_SECTION_HEADINGS = {
+    Section.DOSAGE: "💊 Dosage Analysis",
+    Section.SAFETY: "⚠️ Safety Assessment",
+    Section.INTERACTIONS: "🔄 Drug Interactions & Regulatory Information",
+    Section.VERIFICATION: "✅ Medical Verification Status",
+}
+
+class ProcessAnalysisCache:
+    """Analyses shared by all sessions of this process, by query and sections (completed ones only)"""
+    
+    def __init__(self, ttl=PROCESS_CACHE_TTL_S, max_entries=PROCESS_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._analyses = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._analyses.get(key)
+            if entry is None or time.time() - entry[0] >= self.ttl:
+                self._analyses.pop(key, None)
+                return None
+            self._analyses.move_to_end(key)
+            return entry[1]
+    
+    def put(self, key, analysis):
+        with self._lock:
+            self._analyses[key] = (time.time(), analysis)
+            self._analyses.move_to_end(key)
+            while len(self._analyses) > self.max_entries:
+                self._analyses.popitem(last=False)
+
+class LiveSections:
+    """Placeholders that fill in each analysis section while the workforce runs"""
+    
+    def __init__(self, sections):
+        self.area = st.empty()
+        self.texts = {}
+        with self.area.container():
+            self.status = st.empty()
+            self.status.info("🤖 Consulting coordinated AI pharmacy specialists...")
+            self.slots = {section: st.empty() for section in sections}
+    
+    def update(self, event):
+        section = Section(event.section) if event.section else None
+        if section not in self.slots:
+            return
+        heading = LIVE_SECTION_HEADINGS[section]
+        if event.type == StreamEventType.SECTION_STARTED and section not in self.texts:
+            self.slots[section].markdown(f"### {heading}\n\n⏳ *In progress...*")
+        elif event.type in (StreamEventType.TOKEN, StreamEventType.SECTION_DONE):
+            self.texts[section] = event.text
+            self.slots[section].markdown(f"### {heading}\n\n{format_verification_status(event.text)}")
+    
+    def clear(self):
+        self.area.empty()
+
+@st.cache_resource(show_spinner=False)
+def load_shared_resources():
+    """Initialize the specialist agents and search coordinator once per process"""
+    return {"agents": get_all_agents(), "search_coordinator": get_search_coordinator()}
+
+@st.cache_resource(show_spinner=False)
+def get_process_cache():
+    """Get the analysis cache shared by all sessions of this process"""
+    return ProcessAnalysisCache()
+
+def _stream_analysis(query, sections=None):
+    """Run or re-use the analysis of a query, showing its sections live while it runs"""
+    cache = get_process_cache()
+    analysis = cache.get((query, sections))
+    if analysis is not None:
+        return analysis
+    
+    live = LiveSections([Section(name) for name in sections] if sections else WORKFORCE_SECTIONS)
+    try:
+        for event in run_pharmacy_query_stream(query, sections=sections):
+            if event.type == StreamEventType.DONE:
+                analysis = event.analysis
+            else:
+                live.update(event)
+    finally:
+        live.clear()
+    
+    # Only store complete analyses; partial ones and fallbacks (shed, unavailable, errors)
+    # are retried next time
+    if analysis["status"] == "completed":
+        cache.put((query, sections), analysis)
+    return analysis
+
+def get_analysis(fields, previous=None):
+    """
+    Get the analysis of a query, running the workforce only for what is not available yet
+    
+    Looks in this session's analyses, then re-uses the sections of the previous analysis
+    that the changed fields do not affect (a dosage-only change re-runs no specialist),
+    then the process-wide result cache, keyed by the built query string. Sections that
+    have to be produced are shown live as each specialist finishes.
+    
+    Args:
+        fields (QueryFields): Submitted form fields
+        previous (QueryState, optional): Analysis currently shown in this session
+        
+    Returns:
+        QueryState: Analysis to render (a fallback response on failure)
+    """
+    query = fields.to_query()
+    analyses = st.session_state.setdefault("analyses", {})
+    if query in analyses:
+        return analyses[query]
+    
+    refresh = previous.sections_to_refresh(fields) if previous else list(WORKFORCE_SECTIONS)
+    if not refresh:
+        state = previous.with_fields(fields)
+    elif len(refresh) < len(WORKFORCE_SECTIONS):
+        analysis = _stream_analysis(query, tuple(section.value for section in refresh))
+        if analysis["status"] not in ("completed", "partial"):
+            return QueryState(fields, analysis["response"], status="unavailable")
+        state = previous.merge(fields, analysis, refresh)
+    else:
+        analysis = _stream_analysis(query)
+        if analysis["status"] not in ("completed", "partial"):
+            return QueryState(fields, analysis["response"], status="unavailable")
+        state = QueryState.from_analysis(fields, analysis)
+    
+    # A partial analysis is shown but not re-used; submitting the query again retries it
+    if state.status != "completed":
+        return state
+    analyses[query] = state
+    while len(analyses) > SESSION_ANALYSIS_LIMIT:
+        analyses.pop(next(iter(analyses)))
+    return state
+
+load_shared_resources()
+
 # Main header
 st.markdown('<h1 class="main-header">🏥 MedForce-AI </h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">Get expert pharmaceutical guidance powered by Multi-Agent Workforce</p>', unsafe_allow_html=True)
@@ -945,6 +1033,13 @@ with col2:
             help="Specify the dosage amount"
         )
         
+        # Other medications input
+        co_medications = st.text_input(
+            "💊 **Other Medications** (Optional)",
+            placeholder="e.g., warfarin, omeprazole",
+            help="Other medications the patient takes, separated by commas; every pair is checked for interactions"
+        )
+        
         # Reason input
         reason = st.text_input(
             "🎯 **Reason for Use** (Optional)", 
@@ -957,20 +1052,30 @@ with col2:
 
 # Process the form submission
 if submitted and medicine:
-    # Build the query
-    query = f"Medicine: {medicine}, Age: {age}"
-    if dosage:
-        query += f", Dosage: {dosage}"
-    if reason:
-        query += f", Reason: {reason}"
+    fields = QueryFields(medicine=medicine, age=age, dosage=dosage, reason=reason, co_medications=co_medications)
+    previous = st.session_state.get("current_analysis")
+    if previous is not None and previous.status not in ("completed", "partial"):
+        previous = None
     
-    # Show loading state
-    with st.spinner("🤖 Consulting coordinated AI pharmacy specialists..."):
-        result = run_pharmacy_query(query)
+    # Sections fill in live while the specialists run
+    with col2:
+        st.session_state["current_analysis"] = get_analysis(fields, previous)
+
+elif submitted and not medicine:
+    with col2:
+        st.error("⚠️ Please enter a medicine name to analyze.")
+
+# Render the current analysis from session state, so later reruns never re-invoke the workforce
+current_analysis = st.session_state.get("current_analysis")
+if current_analysis:
+    medicine, dosage = current_analysis.fields.medicine, current_analysis.fields.dosage
+    result = current_analysis.response
     
     # Parse and display results WITHOUT TABS
     if result:
         sections = parse_coordinated_response(result)
+        # Sections re-used from earlier analyses of this patient take the place of parsed ones
+        sections.update({section.value: text for section, text in current_analysis.sections.items()})
         
         # Check for dosage warnings BEFORE displaying results
         if dosage and sections["dosage_analysis"]:
@@ -1089,10 +1194,6 @@ if submitted and medicine:
     else:
         st.error("❌ Failed to get analysis results. Please try again.")
 
-elif submitted and not medicine:
-    with col2:
-        st.error("⚠️ Please enter a medicine name to analyze.")
-
 # Footer section with truly dynamic centered CAMEL AI logo
 st.markdown("---")
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -0,0 +1,110 @@
+"""
+Dosage check benchmark: per-pair evaluate_dose vs batch check_dosage_pairs
+
+Generates (user dosage, dosage analysis) pairs with mixed units and frequencies and
+compares checking them one at a time with checking them in a single batch. The highest
+warning severity of each pair is checked to be identical, and a few known pairs are
+checked against their expected severity first.
+
+Usage:
+    python benchmarks/bench_dosage_parser.py [--pairs 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dosage_parser  # noqa: E402
+from dosage_parser import (  # noqa: E402
+    SEVERITY_LEVELS,
+    check_dosage_pairs,
+    evaluate_dose,
+    parse_recommended_limits,
+    parse_user_dose,
+)
+
+USER_DOSES = [
+    "{n} mg", "{n}mg twice daily", "{g} g", "{n} mg every 6 hours", "{t} tablets",
+    "{t} tablets three times a day", "{mcg} mcg", "{ml} mL", "{n} milligrams daily",
+]
+
+ANALYSES = [
+    "Standard Adult Dose: {lo}-{hi} mg every 4-6 hours. Available as {strength} mg tablets. "
+    "Maximum Daily Dose: {max_daily} mg.",
+    "Usual dose {hi} mg per dose. Do not exceed {max_g} g in 24 hours.",
+    "Take {hi} mg twice daily with food. Pediatric: 10 mg/kg per dose.",
+    "Oral solution: {ml} mL every 8 hours. Maximum daily dose: {max_ml} mL.",
+]
+
+# (user dosage, dosage analysis, expected highest severity) checked before timing
+REGRESSION_CASES = [
+    # Thousands separators: a daily limit of 4,000 mg is not 0 mg, and 1,500 mg is not 0 mg
+    ("500 mg", "Do not exceed 4,000 mg in 24 hours", None),
+    ("1,500 mg", "Maximum single dose 1000 mg", "moderate"),
+    ("1500 mg", "Maximum single dose 1,000 mg", "moderate"),
+]
+
+def check_regressions():
+    severities = check_dosage_pairs([(user, analysis) for user, analysis, _ in REGRESSION_CASES])
+    for (user, analysis, expected), severity in zip(REGRESSION_CASES, severities):
+        assert severity == expected, f"{user!r} vs {analysis!r}: severity {severity}, expected {expected}"
+
+def build_pairs(count, seed=5):
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        user = rng.choice(USER_DOSES).format(
+            n=rng.choice([250, 500, 650, 1000, 2000, 5000]), g=rng.choice([0.5, 1, 5]),
+            t=rng.randint(1, 4), mcg=rng.choice([100, 1000]), ml=rng.choice([5, 10, 30]),
+        )
+        # Distinct analyses per medication, as different drugs produce different text
+        analysis = rng.choice(ANALYSES).format(
+            lo=325, hi=rng.choice([400, 500, 650, 1000]), strength=rng.choice([200, 500]),
+            max_daily=rng.choice([3000, 4000]), max_g=rng.choice([3, 4]), ml=10, max_ml=40,
+        ) + f" (medication {i % 500})"
+        pairs.append((user, analysis))
+    return pairs
+
+def check_one_by_one(pairs):
+    severities = []
+    for user_text, analysis_text in pairs:
+        user_dose = parse_user_dose(user_text)
+        warnings = evaluate_dose(user_dose, parse_recommended_limits(analysis_text)) if user_dose else []
+        severities.append(max((w["severity"] for w in warnings), key=SEVERITY_LEVELS.index, default=None))
+    return severities
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        dosage_parser.parse_dosage.cache_clear()
+        dosage_parser.parse_recommended_limits.cache_clear()
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=10_000)
+    args = parser.parse_args()
+
+    check_regressions()
+    pairs = build_pairs(args.pairs)
+    single, single_s = timed(check_one_by_one, pairs)
+    batch, batch_s = timed(check_dosage_pairs, pairs)
+    assert single == batch, "batch severities differ from per-pair checks"
+
+    flagged = sum(1 for severity in batch if severity)
+    print(f"{args.pairs:,} dose pairs, {flagged:,} flagged "
+          f"(numpy {'available' if dosage_parser.np is not None else 'not installed'})\n")
+    print(f"{'method':<22}{'seconds':>10}{'pairs/s':>14}")
+    print(f"{'per-pair evaluate':<22}{single_s:>10.3f}{args.pairs / single_s:>14,.0f}")
+    print(f"{'batch check':<22}{batch_s:>10.3f}{args.pairs / batch_s:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Keyword classification benchmark: nested any() loops vs the shared KeywordClassifier
+
+Generates large batches of search-result lines and compares labelling them with the
+per-category `any(keyword in line_lower ...)` loops the agents used to run against a
+single pass of the shared classifier. Results are checked to be identical.
+
+Usage:
+    python benchmarks/bench_keyword_classifier.py [--lines 200000] [--keyword-density 0.4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_classifier import MEDICAL_LINE_CATEGORIES, KeywordClassifier  # noqa: E402
+
+FILLER = (
+    "the patient should take this medicine exactly as directed by the doctor and report "
+    "any unusual effects to the care team promptly before the next scheduled visit"
+).split()
+
+def build_lines(count, density, seed=11):
+    """Build search-like lines where `density` is the chance of each (up to 4) keyword insertion"""
+    rng = random.Random(seed)
+    keywords = [k for keywords in MEDICAL_LINE_CATEGORIES.values() for k in keywords]
+    lines = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(8, 20))]
+        for _ in range(4):
+            if rng.random() >= density:
+                break
+            keyword = rng.choice(keywords)
+            words.insert(rng.randrange(len(words) + 1), keyword.upper() if rng.random() < 0.2 else keyword)
+        lines.append(" ".join(words))
+    return lines
+
+def classify_nested(lines, label_bits):
+    """Baseline: one any() keyword loop per category per line"""
+    results = []
+    for line in lines:
+        line_lower = line.lower()
+        bits = 0
+        for label, keywords in MEDICAL_LINE_CATEGORIES.items():
+            if any(keyword in line_lower for keyword in keywords):
+                bits |= label_bits[label]
+        results.append(bits)
+    return results
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--keyword-density", type=float, default=0.4)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    classifier = KeywordClassifier(MEDICAL_LINE_CATEGORIES)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    print(f"classifier build: {build_ms:.1f} ms "
+          f"({sum(len(k) for k in MEDICAL_LINE_CATEGORIES.values())} keywords, "
+          f"{len(MEDICAL_LINE_CATEGORIES)} categories)\n")
+    print(f"{'keyword density':<18}{'nested any() s':>16}{'classifier s':>14}{'speedup':>10}{'lines/s':>14}")
+
+    for density in sorted({0.0, args.keyword_density, 1.0}):
+        lines = build_lines(args.lines, density)
+        baseline, baseline_s = timed(classify_nested, lines, classifier.label_bits)
+        labelled, classifier_s = timed(classifier.classify_lines, lines)
+        assert baseline == labelled, "classifier output differs from nested any() loops"
+        print(f"{density:<18.1f}{baseline_s:>16.3f}{classifier_s:>14.3f}"
+              f"{baseline_s / classifier_s:>9.1f}x{args.lines / classifier_s:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Prompt size benchmark: full vs compact prompts
+
+Reports the prompt tokens every LLM call carries for each agent's system message, the
+workforce task prompt and the worker descriptions, in full and compact mode. With
+--live, also runs a query through the workforce in each mode (needs MISTRAL_API_KEY)
+and reports the prompt tokens and LLM latency the models actually recorded per agent.
+The static report is an estimate (token_accounting.estimate_tokens), not a tokenizer count.
+
+Usage:
+    python benchmarks/bench_prompt_tokens.py
+    python benchmarks/bench_prompt_tokens.py --live --query "Medicine: ibuprofen, Age: 40"
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import COMPACT_WORKER_DESCRIPTIONS, PROMPTS, WORKER_DESCRIPTIONS  # noqa: E402
+from token_accounting import estimate_tokens  # noqa: E402
+
+DEFAULT_QUERY = "Medicine: ibuprofen, Age: 40, Dosage: 400mg, Reason: back pain"
+
+def report_static():
+    print(f"{'prompt':<20}{'full tokens':>13}{'compact tokens':>16}{'saved':>9}")
+    total_full = total_compact = 0
+    rows = [(name, full, compact) for name, (full, compact) in PROMPTS.items()]
+    rows.append(("WorkerDescriptions", " ".join(WORKER_DESCRIPTIONS.values()),
+                 " ".join(COMPACT_WORKER_DESCRIPTIONS.values())))
+    for name, full, compact in rows:
+        full_tokens, compact_tokens = estimate_tokens(full), estimate_tokens(compact)
+        total_full += full_tokens
+        total_compact += compact_tokens
+        print(f"{name:<20}{full_tokens:>13,}{compact_tokens:>16,}{1 - compact_tokens / full_tokens:>9.0%}")
+    print(f"{'total':<20}{total_full:>13,}{total_compact:>16,}{1 - total_compact / total_full:>9.0%}")
+
+def live_run(query):
+    """Run one query in this process and print the recorded token usage as JSON"""
+    from main import run_pharmacy_query
+    from token_accounting import get_token_accountant
+
+    run_pharmacy_query(query)
+    print(json.dumps(get_token_accountant().get_stats()))
+
+def report_live(query):
+    # Prompts are read when the agents are created, so each mode runs in its own process
+    usage = {}
+    for mode in ("full", "compact"):
+        env = dict(os.environ, MEDFORCE_COMPACT_PROMPTS="1" if mode == "compact" else "0")
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--live-run", "--query", query],
+                                env=env, capture_output=True, text=True, check=True).stdout
+        usage[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"\nlive run: {query}\n")
+    print(f"{'agent':<18}{'mode':<9}{'calls':>7}{'prompt tok/call':>17}{'mean latency s':>16}{'estimated':>11}")
+    for agent in sorted(set(usage["full"]) | set(usage["compact"])):
+        for mode in ("full", "compact"):
+            stats = usage[mode].get(agent)
+            if stats:
+                print(f"{agent:<18}{mode:<9}{stats['calls']:>7}{stats['prompt_tokens_per_call']:>17,.0f}"
+                      f"{stats['mean_latency_s']:>16.2f}{stats['estimated_calls']:>11}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--live", action="store_true", help="also run the workforce in each mode")
+    parser.add_argument("--live-run", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--query", default=DEFAULT_QUERY)
+    args = parser.parse_args()
+
+    if args.live_run:
+        live_run(args.query)
+        return
+
+    report_static()
+    if args.live:
+        if not os.getenv("MISTRAL_API_KEY"):
+            print("\nlive run skipped: MISTRAL_API_KEY is not set, so no measured tokens or latency")
+            return
+        report_live(args.query)
+
+if __name__ == "__main__":
+    main()
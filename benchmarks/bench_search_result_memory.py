@@ -0,0 +1,175 @@
+"""
+Memory benchmark: SearchResult dataclass vs CompactSearchResult
+
+Builds a synthetic coordinator-sized cache (default 100k entries) with each layout and
+reports the memory held per entry, measured with tracemalloc. Each entry is ingested as
+the coordinator caches it, so the sizes include its line classification (line_records on
+the dataclass, packed line labels on CompactSearchResult). With --duplicate-rate, that
+fraction of entries carries a copy of an earlier entry's content (the same page returned
+for another query, source or agent); CompactSearchResult holds the first copy inline and
+shares one more copy among the rest.
+
+Usage:
+    python benchmarks/bench_search_result_memory.py [--entries 100000] [--content-lines 20]
+    python benchmarks/bench_search_result_memory.py --duplicate-rate 0.3
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_store import ContentStore  # noqa: E402
+from search_coordinator import (  # noqa: E402
+    CompactSearchResult,
+    InformationType,
+    SearchResult,
+    enhance_query,
+    ingest_result,
+)
+
+AGENTS = {
+    "DosageAgent": (InformationType.DOSAGE, ["MedlinePlus", "MayoClinic", "Drugs"]),
+    "SideEffectsAgent": (InformationType.SIDE_EFFECTS, ["MedlinePlus", "MayoClinic", "Drugs"]),
+    "WebSearchAgent": (InformationType.INTERACTIONS, ["FDA", "Medscape", "Drugs"]),
+    "ValidatorAgent": (InformationType.VERIFICATION, ["FDA", "MayoClinic", "PubMed"]),
+}
+
+SNIPPET_LINES = [
+    "Adults and children 12 years and over: take 1 to 2 tablets every 4 to 6 hours while symptoms last.",
+    "Do not exceed 6 tablets in 24 hours unless directed by a doctor.",
+    "Common side effects include nausea, headache, dizziness and mild stomach pain.",
+    "Serious allergic reactions are rare but can be fatal; seek emergency help for swelling or rash.",
+    "FDA safety communication: updated warning about liver injury with high doses.",
+    "Avoid combining with other products containing the same active ingredient.",
+    "Monitor patients with renal impairment and adjust the dose where necessary.",
+    "Store at room temperature away from moisture and keep out of reach of children.",
+]
+
+def build_entries(count, content_lines, duplicate_rate=0.0, seed=7):
+    """Build (agent, info_type, source, base_query, content) tuples for the benchmark"""
+    rng = random.Random(seed)
+    agents = list(AGENTS.items())
+    entries = []
+    contents = []
+    for i in range(count):
+        agent, (info_type, sources) = agents[i % len(agents)]
+        source = sources[(i // len(agents)) % len(sources)]
+        # Agent and source names arrive as fresh strings from tools/config in practice
+        agent = "".join(agent)
+        source = "".join(source)
+        base_query = f"medication-{i // 12} {rng.choice(['adult', 'pediatric', 'elderly'])} patient"
+        if contents and rng.random() < duplicate_rate:
+            # Equal text in a separate string object, as a separate search would return it
+            content = (rng.choice(contents) + "\n")[:-1]
+        else:
+            content = "\n".join(rng.choice(SNIPPET_LINES) for _ in range(content_lines))
+            contents.append(content)
+        entries.append((agent, info_type, source, base_query, content))
+    return entries
+
+def measure(build):
+    """
+    Return (bytes held by the cache build() returns, seconds taken)
+
+    Content strings are shared with the input tuples, so tracemalloc does not see them;
+    the distinct content strings the cache holds are added for a fair comparison.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    cache = build()
+    elapsed = time.perf_counter() - started
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    held = {}
+    for result in cache.values():
+        content = result.stored_content if isinstance(result, CompactSearchResult) else result.content
+        if isinstance(content, str):
+            held[id(content)] = sys.getsizeof(content)
+    del cache
+    gc.collect()
+    return after - before + sum(held.values()), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--content-lines", type=int, default=20)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0,
+                        help="Fraction of entries repeating an earlier entry's content")
+    args = parser.parse_args()
+
+    entries = build_entries(args.entries, args.content_lines, args.duplicate_rate)
+    now = time.time()
+
+    def ingested(result, content, content_store):
+        ingest_result(result, content, content_store)
+        return result
+
+    def dataclass_cache():
+        content_store = ContentStore()
+        return {
+            str(i): ingested(SearchResult(
+                query=enhance_query(q, src, it), source=src, content=content,
+                timestamp=now, agent_name=agent, info_type=it,
+            ), content, content_store)
+            for i, (agent, it, src, q, content) in enumerate(entries)
+        }
+
+    def compact_cache(compress_threshold):
+        # Each layout gets its own content store (including its fixed-size seen filter)
+        def build():
+            content_store = ContentStore()
+            return {
+                str(i): ingested(CompactSearchResult(
+                    query=q, source=src, content=content, timestamp=now,
+                    agent_name=agent, info_type=it, enhanced_query=True,
+                    compress_threshold=compress_threshold, content_store=content_store,
+                ), content, content_store)
+                for i, (agent, it, src, q, content) in enumerate(entries)
+            }
+        return build
+
+    rows = []
+    for name, build in (
+        ("dataclass SearchResult", dataclass_cache),
+        ("CompactSearchResult", compact_cache(None)),
+        ("CompactSearchResult + zlib", compact_cache(256)),
+    ):
+        held, elapsed = measure(build)
+        rows.append((name, held, elapsed))
+
+    baseline = rows[0][1]
+    print(f"{args.entries:,} cached results, {args.content_lines} content lines each, "
+          f"{args.duplicate_rate:.0%} duplicate content\n")
+    print(f"{'layout':<30}{'total MiB':>12}{'bytes/entry':>14}{'vs baseline':>14}{'build s':>10}")
+    for name, total, elapsed in rows:
+        print(f"{name:<30}{total / 2**20:>12.1f}{total / args.entries:>14.0f}"
+              f"{total / baseline:>13.0%}{elapsed:>10.2f}")
+
+    sample = CompactSearchResult(
+        query="q", source="MedlinePlus", content=entries[0][4], timestamp=now,
+        agent_name="DosageAgent", info_type=InformationType.DOSAGE, compress_threshold=256,
+    )
+    reads = 10_000
+    started = time.perf_counter()
+    for _ in range(reads):
+        sample.content
+    per_read = (time.perf_counter() - started) / reads * 1e6
+    print(f"\ncompressed content access: {per_read:.1f} µs per read")
+
+    ingest_result(sample, entries[0][4])
+    started = time.perf_counter()
+    for _ in range(reads):
+        sample.line_records
+    per_read = (time.perf_counter() - started) / reads * 1e6
+    print(f"compressed line_records access: {per_read:.1f} µs per read")
+
+if __name__ == "__main__":
+    main()
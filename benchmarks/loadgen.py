@@ -0,0 +1,267 @@
+"""
+Open-loop load generator: replays a request log at a target arrival rate
+
+Requests are sent on a precomputed arrival schedule (Poisson, bursts or constant rate)
+whether or not earlier requests have finished. Latency is measured from each request's
+scheduled arrival, so a saturated system shows up as growing latency and shedding
+instead of being hidden by a slower send rate. Sweeping several rates (--rates) finds
+the saturation point of a deployment.
+
+The request log is JSON lines with a "query" field (or "body"), and optional "priority"
+("urgent", "normal", "batch") and "time_budget"; other lines are used as the query text.
+Requests go to run_pharmacy_query_structured in this process, or to a served API (--url).
+
+Reports throughput, latency percentiles, status and error counts, and per time window
+the search coordinator activity (cache and local hits vs web searches) of the requests.
+
+Usage:
+    python benchmarks/loadgen.py queries.jsonl --rate 2 --duration 120
+    python benchmarks/loadgen.py queries.jsonl --pattern burst --burst-size 10 --rate 1
+    python benchmarks/loadgen.py queries.jsonl --rates 0.5,1,2,4 --duration 60 --url http://localhost:8080
+    MEDFORCE_MODEL_BACKEND=stub python benchmarks/loadgen.py queries.jsonl --rate 5
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Statuses counted as served (anything else, or an exception, is an error)
+SERVED_STATUSES = ("completed", "partial")
+
+@dataclass(frozen=True)
+class LoggedRequest:
+    """Request replayed from the log"""
+    query: str
+    priority: str = "normal"
+    time_budget: Optional[float] = None
+
+@dataclass
+class Outcome:
+    """Result of one replayed request"""
+    scheduled_at: float           # seconds from the start of the run
+    latency: float                # from the scheduled arrival to the response
+    status: str                   # analysis status, or "exception"
+    search_activity: Dict[str, Any] = field(default_factory=dict)
+
+def load_requests(path: str) -> List[LoggedRequest]:
+    """Read a request log (JSON lines, or one query per line)"""
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                entry = line
+            if isinstance(entry, dict):
+                query = entry.get("query") or entry.get("body") or ""
+                if query:
+                    requests.append(LoggedRequest(query, entry.get("priority", "normal"), entry.get("time_budget")))
+            elif isinstance(entry, str):
+                requests.append(LoggedRequest(entry))
+    if not requests:
+        raise ValueError(f"No requests found in {path}")
+    return requests
+
+def arrival_schedule(pattern: str, rate: float, duration: float, burst_size: int = 10,
+                     rng: Optional[random.Random] = None) -> List[float]:
+    """
+    Arrival times (seconds from the start) of an open-loop run
+
+    Args:
+        pattern: "poisson" (exponential gaps), "burst" (burst_size requests at once, at the
+            same mean rate) or "constant" (evenly spaced)
+        rate: Mean arrivals per second
+        duration: Length of the run in seconds
+    """
+    rng = rng or random.Random()
+    arrivals: List[float] = []
+    if pattern == "poisson":
+        t = rng.expovariate(rate)
+        while t < duration:
+            arrivals.append(t)
+            t += rng.expovariate(rate)
+    elif pattern == "burst":
+        interval = burst_size / rate
+        t = 0.0
+        while t < duration:
+            arrivals.extend([t] * burst_size)
+            t += interval
+    elif pattern == "constant":
+        arrivals = [i / rate for i in range(int(duration * rate))]
+    else:
+        raise ValueError(f"Unknown arrival pattern: {pattern}")
+    return arrivals
+
+def in_process_target() -> Callable[[LoggedRequest], Dict[str, Any]]:
+    """Send requests to run_pharmacy_query_structured in this process"""
+    from main import run_pharmacy_query_structured
+    from scheduler import Priority
+
+    def send(request: LoggedRequest) -> Dict[str, Any]:
+        return run_pharmacy_query_structured(request.query, request.time_budget,
+                                             priority=Priority[request.priority.upper()])
+    return send
+
+def http_target(url: str, timeout: float = 600.0) -> Callable[[LoggedRequest], Dict[str, Any]]:
+    """Send requests to the structured query endpoint of a served API (see api_server)"""
+    endpoint = url.rstrip("/") + "/v1/query/structured"
+
+    def send(request: LoggedRequest) -> Dict[str, Any]:
+        body = {"query": request.query, "priority": request.priority}
+        if request.time_budget is not None:
+            body["time_budget"] = request.time_budget
+        http_request = urllib.request.Request(endpoint, data=json.dumps(body).encode("utf-8"),
+                                              headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(http_request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            # Shed requests come back as 503 with the fallback analysis
+            payload = json.loads(e.read() or b"{}")
+            if "status" not in payload:
+                raise
+            return payload
+    return send
+
+def run_load(send: Callable[[LoggedRequest], Dict[str, Any]], requests: List[LoggedRequest],
+             arrivals: List[float], max_in_flight: int = 256) -> List[Outcome]:
+    """Replay requests (cycling through the log) at the scheduled arrival times"""
+    outcomes: List[Outcome] = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def fire(request: LoggedRequest, scheduled_at: float):
+        try:
+            analysis = send(request)
+            status = analysis.get("status", "unknown")
+            activity = analysis.get("search_activity") or {}
+        except Exception as e:
+            print(f"request failed: {e}", file=sys.stderr)
+            status, activity = "exception", {}
+        outcome = Outcome(scheduled_at, time.perf_counter() - start - scheduled_at, status, activity)
+        with lock:
+            outcomes.append(outcome)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="loadgen") as executor:
+        for index, scheduled_at in enumerate(arrivals):
+            delay = scheduled_at - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(fire, requests[index % len(requests)], scheduled_at)
+    return sorted(outcomes, key=lambda outcome: outcome.scheduled_at)
+
+def percentile(ordered: List[float], percentile: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))]
+
+def summarize(outcomes: List[Outcome], duration: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles, statuses and search activity of a run"""
+    latencies = sorted(outcome.latency for outcome in outcomes if outcome.status in SERVED_STATUSES)
+    statuses: Dict[str, int] = {}
+    for outcome in outcomes:
+        statuses[outcome.status] = statuses.get(outcome.status, 0) + 1
+    errors = sum(count for status, count in statuses.items() if status not in SERVED_STATUSES)
+    elapsed = max([duration] + [outcome.scheduled_at + outcome.latency for outcome in outcomes])
+    return {
+        "requests": len(outcomes),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else None,
+        "error_rate": round(errors / len(outcomes), 3) if outcomes else None,
+        "statuses": statuses,
+        **{f"p{p}_s": _round(percentile(latencies, p)) for p in (50, 90, 95, 99)},
+        "max_s": _round(latencies[-1] if latencies else None),
+        **search_summary(outcomes),
+    }
+
+def search_summary(outcomes: List[Outcome]) -> Dict[str, Any]:
+    cached = sum(o.search_activity.get("cache_hits", 0) + o.search_activity.get("local_hits", 0) for o in outcomes)
+    web = sum(o.search_activity.get("web_searches", 0) for o in outcomes)
+    return {
+        "cached_lookups": cached,
+        "web_searches": web,
+        "cache_hit_rate": round(cached / (cached + web), 3) if cached + web else None,
+    }
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+def print_windows(outcomes: List[Outcome], window: float):
+    """Per window of arrival time: requests, served, errors, p95 latency and cache behavior"""
+    print(f"\n{'window s':>10}{'sent':>7}{'served':>8}{'errors':>8}{'p95 s':>9}{'cached':>8}{'web':>6}{'hit rate':>10}")
+    if not outcomes:
+        return
+    for index in range(int(outcomes[-1].scheduled_at // window) + 1):
+        batch = [o for o in outcomes if index * window <= o.scheduled_at < (index + 1) * window]
+        served = sorted(o.latency for o in batch if o.status in SERVED_STATUSES)
+        search = search_summary(batch)
+        p95 = percentile(served, 95)
+        hit_rate = search["cache_hit_rate"]
+        print(f"{index * window:>10.0f}{len(batch):>7}{len(served):>8}{len(batch) - len(served):>8}"
+              f"{p95 if p95 is not None else float('nan'):>9.2f}{search['cached_lookups']:>8}"
+              f"{search['web_searches']:>6}{hit_rate if hit_rate is not None else float('nan'):>10.0%}")
+
+def print_summary(rate: float, summary: Dict[str, Any]):
+    print(f"\nrate {rate:g}/s: {summary['requests']} requests, {summary['throughput_rps']} served/s, "
+          f"error rate {summary['error_rate']:.1%}, p50 {summary['p50_s']}s, p95 {summary['p95_s']}s, "
+          f"p99 {summary['p99_s']}s, cache hit rate {summary['cache_hit_rate']}")
+    print(f"statuses: {summary['statuses']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator replaying a request log")
+    parser.add_argument("log", help="Request log (JSON lines with a query field)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Mean arrivals per second")
+    parser.add_argument("--rates", help="Comma-separated rates to sweep, one stage each (overrides --rate)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of arrivals per stage")
+    parser.add_argument("--pattern", choices=("poisson", "burst", "constant"), default="poisson")
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--url", help="Served API base URL (default: run in this process)")
+    parser.add_argument("--window", type=float, default=10.0, help="Seconds per reporting window")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Client threads for outstanding requests")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print stage summaries as JSON")
+    args = parser.parse_args()
+
+    requests = load_requests(args.log)
+    send = http_target(args.url) if args.url else in_process_target()
+    rng = random.Random(args.seed)
+    rates = [float(rate) for rate in args.rates.split(",")] if args.rates else [args.rate]
+
+    summaries = []
+    for rate in rates:
+        arrivals = arrival_schedule(args.pattern, rate, args.duration, args.burst_size, rng)
+        print(f"\n=== {args.pattern} arrivals at {rate:g}/s for {args.duration:g}s: {len(arrivals)} requests"
+              f" ({'in process' if not args.url else args.url}) ===")
+        if not arrivals:
+            print("no arrivals scheduled, increase --rate or --duration")
+            continue
+        outcomes = run_load(send, requests, arrivals, args.max_in_flight)
+        summary = summarize(outcomes, args.duration)
+        summaries.append({"rate": rate, **summary})
+        print_windows(outcomes, args.window)
+        print_summary(rate, summary)
+
+    if len(rates) > 1:
+        print(f"\n{'rate/s':>8}{'served/s':>10}{'errors':>8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}")
+        for summary in summaries:
+            print(f"{summary['rate']:>8g}{summary['throughput_rps']:>10.2f}{summary['error_rate']:>8.1%}"
+                  f"{summary['p50_s'] or float('nan'):>8.2f}{summary['p95_s'] or float('nan'):>8.2f}"
+                  f"{summary['p99_s'] or float('nan'):>8.2f}")
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Content-Addressed Store for Search Payloads
+
+The same page text often comes back for several queries, sources or agents (e.g. a
+MedlinePlus snippet for both the dosage and the side-effects query). Cached search
+results reference a repeated payload through a ContentBlob keyed by the hash of the
+content, so identical payloads are held once however many results point at them, and
+work derived from the content alone (line classification) is done once per blob.
+
+Most payloads are never repeated, and a blob with its digest and table entry costs
+about 240 bytes. So the first copy of a payload stays inline in its result, and the
+store only marks its hash in a fixed-size filter; a blob is made once the same payload
+comes back. Short payloads are always held inline.
+
+Blobs live as long as some result references them: the store only holds them weakly.
+Pickled blobs are re-interned on unpickling, so deduplication also holds in the
+receiving process.
+"""
+
+import hashlib
+import sys
+import threading
+import weakref
+import zlib
+from typing import Any, Dict, Optional, Union
+
+# Payloads shorter than this are always held inline (sharing them saves less than a blob costs)
+SHARE_MIN_CHARS = 256
+
+# Size of the filter of payload hashes seen so far (1 bit each, 512 KiB); it is cleared
+# when half full, which only makes the next copy of an earlier payload be held inline
+SEEN_FILTER_BITS = 1 << 22
+
+def content_digest(content: str) -> bytes:
+    """Content address of a payload (raw 16-byte digest, smaller to hold than its hex form)"""
+    return _digest(content.encode("utf-8"))
+
+def _digest(encoded: bytes) -> bytes:
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+class ContentBlob:
+    """
+    Payload stored once per content hash and shared by the results holding it
+
+    Content of at least the store's compression threshold is kept zlib-compressed and
+    decompressed on access. line_labels caches the line classification of the content
+    (packed per-line label bitmasks, see search_coordinator.classify_line_labels).
+    """
+
+    __slots__ = ("digest", "data", "compressed", "line_labels", "__weakref__")
+
+    def __init__(self, digest: bytes, data: Union[str, bytes], compressed: bool,
+                 line_labels: Optional[bytes] = None):
+        self.digest = digest
+        self.data = data
+        self.compressed = compressed
+        self.line_labels = line_labels
+
+    @property
+    def text(self) -> str:
+        if self.compressed:
+            return zlib.decompress(self.data).decode("utf-8")
+        return self.data
+
+    @property
+    def stored_size(self) -> int:
+        """Bytes held by the stored payload"""
+        return sys.getsizeof(self.data)
+
+    def __reduce__(self):
+        return _restore_blob, (self.digest, self.data, self.compressed, self.line_labels)
+
+    def __repr__(self) -> str:
+        return f"ContentBlob({self.digest.hex()}, {self.stored_size} bytes, compressed={self.compressed})"
+
+class ContentStore:
+    """Weak table of content blobs by content hash"""
+
+    def __init__(self):
+        self._blobs: "weakref.WeakValueDictionary[bytes, ContentBlob]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._seen = bytearray(SEEN_FILTER_BITS // 8)
+        self._seen_count = 0
+        self.stats = {"stored": 0, "deduplicated": 0, "deduplicated_bytes": 0, "inline": 0}
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def _mark_seen(self, digest: bytes) -> bool:
+        """Mark a content hash in the seen filter, returning whether it was marked already"""
+        bit = int.from_bytes(digest[:8], "little") % SEEN_FILTER_BITS
+        index, mask = bit >> 3, 1 << (bit & 7)
+        if self._seen[index] & mask:
+            return True
+        if self._seen_count >= SEEN_FILTER_BITS // 2:
+            self._seen = bytearray(SEEN_FILTER_BITS // 8)
+            self._seen_count = 0
+        self._seen[index] |= mask
+        self._seen_count += 1
+        return False
+
+    def share(self, content: str, compress_threshold: Optional[int] = None) -> Optional[ContentBlob]:
+        """
+        Get the shared blob of a payload seen before, or None to hold the payload inline
+
+        The first copy of a payload is held inline by its result; only later copies are
+        stored as (and share) a blob. A live blob of the payload is always shared.
+
+        Args:
+            content: Payload text
+            compress_threshold: Compress new blobs of at least this many characters
+                (None disables compression)
+
+        Returns:
+            The blob shared by the holders of this payload, or None for a new or short payload
+        """
+        if len(content) < SHARE_MIN_CHARS:
+            return None
+        encoded = content.encode("utf-8")
+        digest = _digest(encoded)
+        with self._lock:
+            seen = self._mark_seen(digest)
+            if not seen and digest not in self._blobs:
+                self.stats["inline"] += 1
+                return None
+        return self._put(content, encoded, digest, compress_threshold)
+
+    def put(self, content: str, compress_threshold: Optional[int] = None) -> ContentBlob:
+        """
+        Get the blob holding a payload, storing the payload if no live blob has it yet
+
+        Args:
+            content: Payload text
+            compress_threshold: Compress new payloads of at least this many characters
+                (None disables compression)
+
+        Returns:
+            The blob shared by every holder of this payload
+        """
+        encoded = content.encode("utf-8")
+        digest = _digest(encoded)
+        with self._lock:
+            self._mark_seen(digest)
+        return self._put(content, encoded, digest, compress_threshold)
+
+    def _put(self, content: str, encoded: bytes, digest: bytes, compress_threshold: Optional[int]) -> ContentBlob:
+        with self._lock:
+            blob = self._blobs.get(digest)
+            if blob is not None:
+                self.stats["deduplicated"] += 1
+                self.stats["deduplicated_bytes"] += blob.stored_size
+                return blob
+
+        # Compress outside the lock; if another thread stored the same payload meanwhile, use its blob
+        if compress_threshold is not None and len(content) >= compress_threshold:
+            new_blob = ContentBlob(digest, zlib.compress(encoded), True)
+        else:
+            new_blob = ContentBlob(digest, content, False)
+        with self._lock:
+            blob = self._blobs.setdefault(digest, new_blob)
+            if blob is new_blob:
+                self.stats["stored"] += 1
+            else:
+                self.stats["deduplicated"] += 1
+                self.stats["deduplicated_bytes"] += blob.stored_size
+            return blob
+
+    def get(self, digest: bytes) -> Optional[ContentBlob]:
+        """Get the live blob of a content hash, if any"""
+        with self._lock:
+            return self._blobs.get(digest)
+
+    def adopt(self, blob: ContentBlob) -> ContentBlob:
+        """Intern a blob created elsewhere (e.g. unpickled), returning the live blob of its hash"""
+        with self._lock:
+            self._mark_seen(blob.digest)
+            live = self._blobs.setdefault(blob.digest, blob)
+            if live.line_labels is None:
+                live.line_labels = blob.line_labels
+            return live
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get live blob count and size, and how often payloads were deduplicated or held inline"""
+        with self._lock:
+            blobs = list(self._blobs.values())
+            stats = dict(self.stats)
+        return {
+            "blobs": len(blobs),
+            "stored_bytes": sum(blob.stored_size for blob in blobs),
+            **stats,
+        }
+
+_content_store = ContentStore()
+
+def get_content_store() -> ContentStore:
+    """Get the process-wide content store"""
+    return _content_store
+
+def _restore_blob(digest: bytes, data: Union[str, bytes], compressed: bool,
+                  line_labels: Optional[bytes]) -> ContentBlob:
+    return _content_store.adopt(ContentBlob(digest, data, compressed, line_labels))
@@ -0,0 +1,61 @@
+"""
+Request Deadlines for the Pharmacy Multi-Agent System
+
+This module provides a per-request time budget that starts when run_pharmacy_query
+submits the request (so queueing counts against it) and flows through the workforce, each
+agent's coordinated search and each search tool call (see deadline_bounded_tool),
+so that work which cannot finish in time is skipped instead of stalling the request.
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Default end-to-end budget for a pharmacy query (seconds)
+DEFAULT_REQUEST_BUDGET = float(os.getenv("MEDFORCE_REQUEST_BUDGET_S", "120"))
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("medforce_deadline", default=None)
+
+class Deadline:
+    """Absolute point in time by which a request must complete"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        """Seconds spent since the deadline was created"""
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        """Check if the budget has been used up"""
+        return self.remaining() <= 0.0
+
+    def allows(self, estimated_duration: Optional[float]) -> bool:
+        """Check if work with the estimated duration can still finish in the budget"""
+        if estimated_duration is None:
+            return not self.expired()
+        return self.remaining() >= estimated_duration
+
+    def __repr__(self) -> str:
+        return f"Deadline(budget={self.budget:.1f}s, remaining={self.remaining():.1f}s)"
+
+def get_current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the request being processed in this context, if any"""
+    return _current_deadline.get()
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make a deadline the current one for everything called within the block"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
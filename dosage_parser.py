@@ -0,0 +1,346 @@
+"""
+Structured Dosage Parsing for Pharmacy Dosage Safety Checks
+
+This module turns free-text dosages ("500mg twice daily", "2 tablets", "0.5 g") and
+specialist dosage analyses ("Maximum Daily Dose: 4000 mg") into typed quantities with
+canonical units and a per-dose / per-day basis, so user doses can be compared directly
+against recommended limits. A batch form validates many (user dose, limits) pairs at once.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; batch checks fall back to pure Python
+    np = None
+
+class DoseBasis(Enum):
+    """Whether a quantity is an amount per administration or a total per day"""
+    PER_DOSE = "per_dose"
+    PER_DAY = "per_day"
+
+# Unit spelling -> (canonical unit, factor to canonical)
+UNIT_ALIASES: Dict[str, Tuple[str, float]] = {
+    "mg": ("mg", 1.0), "milligram": ("mg", 1.0), "milligrams": ("mg", 1.0),
+    "g": ("mg", 1000.0), "gram": ("mg", 1000.0), "grams": ("mg", 1000.0),
+    "mcg": ("mg", 0.001), "µg": ("mg", 0.001), "ug": ("mg", 0.001),
+    "microgram": ("mg", 0.001), "micrograms": ("mg", 0.001),
+    "ml": ("ml", 1.0), "milliliter": ("ml", 1.0), "milliliters": ("ml", 1.0),
+    "millilitre": ("ml", 1.0), "millilitres": ("ml", 1.0),
+    "l": ("ml", 1000.0), "liter": ("ml", 1000.0), "liters": ("ml", 1000.0),
+    "litre": ("ml", 1000.0), "litres": ("ml", 1000.0),
+    "tsp": ("ml", 5.0), "teaspoon": ("ml", 5.0), "teaspoons": ("ml", 5.0),
+    "tbsp": ("ml", 15.0), "tablespoon": ("ml", 15.0), "tablespoons": ("ml", 15.0),
+    "tablet": ("tablet", 1.0), "tablets": ("tablet", 1.0), "tab": ("tablet", 1.0), "tabs": ("tablet", 1.0),
+    "capsule": ("capsule", 1.0), "capsules": ("capsule", 1.0), "cap": ("capsule", 1.0), "caps": ("capsule", 1.0),
+    "iu": ("unit", 1.0), "unit": ("unit", 1.0), "units": ("unit", 1.0),
+}
+
+# Canonical units that count dosage forms rather than measure an amount
+COUNT_UNITS = ("tablet", "capsule")
+
+# Thousands separators are accepted ("4,000 mg"), as in search_index
+_NUMBER = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?"
+_UNIT = "|".join(sorted((re.escape(unit) for unit in UNIT_ALIASES), key=len, reverse=True))
+
+def _to_number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+# "500 mg", "325-650 mg", "1 to 2 tablets", "2.5mg/kg", "4,000 mg"
+_QUANTITY_PATTERN = re.compile(
+    rf"(?<![\w.])(?P<low>{_NUMBER})(?:\s*(?:-|–|to)\s*(?P<high>{_NUMBER}))?\s*"
+    rf"(?P<unit>{_UNIT})(?![a-zµ])(?P<per_kg>\s*/\s*kg)?",
+    re.IGNORECASE,
+)
+
+# Dosing frequency immediately following a quantity: "twice daily", "every 6 hours", "3 times a day"
+_FREQUENCY_PATTERN = re.compile(
+    r"^\s*,?\s*(?:(?P<word>once|twice|three times|four times)|(?P<count>\d+)\s*(?:times|x))"
+    r"\s*(?:a|per|/)?\s*(?:day|daily)"
+    r"|^\s*,?\s*(?:every|q)\s*(?P<hours>\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*\d+(?:\.\d+)?)?\s*(?:hours?|hrs?|h)\b",
+    re.IGNORECASE,
+)
+_FREQUENCY_WORDS = {"once": 1.0, "twice": 2.0, "three times": 3.0, "four times": 4.0}
+
+# Context marking a quantity as a daily total
+_PER_DAY_AFTER = re.compile(
+    r"^\s*(?:(?:per|a|each|/)\s*day|daily|in\s+(?:any\s+)?24\s*(?:hours?|hrs?|h)|/\s*24\s*h)",
+    re.IGNORECASE,
+)
+_PER_DAY_BEFORE = re.compile(
+    r"(?:(?:maximum|max|total)\s+(?:daily|per day)|daily\s+(?:dose|limit|maximum|max|total)"
+    r"|per\s+day|in\s+24\s*hours?|do\s+not\s+exceed)[^.\n\d]{0,40}$",
+    re.IGNORECASE,
+)
+
+# Context marking a quantity as an amount per administration
+_PER_DOSE_AFTER = re.compile(r"^\s*(?:per|each|a)\s+dose|^\s*at\s+(?:a\s+time|once)", re.IGNORECASE)
+
+# Context marking a quantity as an explicit single-dose limit
+_SINGLE_DOSE_BEFORE = re.compile(
+    r"(?:single|per|each|maximum single|max single)\s+dose[^.\n\d]{0,30}$",
+    re.IGNORECASE,
+)
+
+# Quantity of active ingredient per dosage form: "500 mg tablet", "200mg capsules"
+_STRENGTH_AFTER = re.compile(r"^\s*(?:tablets?|capsules?|caps?|tabs?)\b", re.IGNORECASE)
+
+@dataclass(frozen=True)
+class DoseQuantity:
+    """A dosage amount in canonical units"""
+    value: float                        # upper bound of the amount, in canonical units
+    unit: str                           # canonical unit: mg, ml, tablet, capsule, unit, or mg/kg etc.
+    basis: DoseBasis
+    low: Optional[float] = None         # lower bound when a range was given
+    frequency_per_day: Optional[float] = None
+    single_dose_limit: bool = False     # explicitly labelled as a single/per-dose limit
+    strength_of: Optional[str] = None   # dosage form this is the strength of ("tablet"/"capsule")
+    text: str = ""
+
+    def daily_total(self) -> Optional[float]:
+        """Total amount per day, if it can be determined"""
+        if self.basis is DoseBasis.PER_DAY:
+            return self.value
+        if self.frequency_per_day is not None:
+            return self.value * self.frequency_per_day
+        return None
+
+    def in_units_of(self, strength: Optional["DoseQuantity"]) -> "DoseQuantity":
+        """Convert a tablet/capsule count to an amount using the per-unit strength"""
+        if strength is None or self.unit not in COUNT_UNITS or strength.strength_of != self.unit:
+            return self
+        factor = strength.value
+        return DoseQuantity(
+            value=self.value * factor,
+            unit=strength.unit,
+            basis=self.basis,
+            low=self.low * factor if self.low is not None else None,
+            frequency_per_day=self.frequency_per_day,
+            single_dose_limit=self.single_dose_limit,
+            text=self.text,
+        )
+
+@dataclass(frozen=True)
+class RecommendedLimits:
+    """Dose limits found in a dosage analysis"""
+    max_single: Optional[DoseQuantity] = None
+    max_daily: Optional[DoseQuantity] = None
+    strengths: Tuple[DoseQuantity, ...] = ()
+
+    def strength_for(self, unit: str) -> Optional[DoseQuantity]:
+        for strength in self.strengths:
+            if strength.strength_of == unit:
+                return strength
+        return None
+
+def _frequency(text_after: str) -> Optional[float]:
+    match = _FREQUENCY_PATTERN.match(text_after)
+    if not match:
+        return None
+    if match.group("word"):
+        return _FREQUENCY_WORDS[match.group("word").lower()]
+    if match.group("count"):
+        return float(match.group("count"))
+    hours = float(match.group("hours"))
+    return 24.0 / hours if hours > 0 else None
+
+@lru_cache(maxsize=4096)
+def parse_dosage(text: str) -> Tuple[DoseQuantity, ...]:
+    """
+    Parse every dosage quantity in a piece of text
+
+    Args:
+        text: Free-text dosage or dosage analysis
+
+    Returns:
+        Parsed quantities in order of appearance, in canonical units
+    """
+    if not text:
+        return ()
+
+    quantities = []
+    for match in _QUANTITY_PATTERN.finditer(text):
+        unit, factor = UNIT_ALIASES[match.group("unit").lower()]
+        if match.group("per_kg"):
+            unit = f"{unit}/kg"
+
+        high = _to_number(match.group("high") or match.group("low")) * factor
+        low = _to_number(match.group("low")) * factor if match.group("high") else None
+
+        before = text[max(0, match.start() - 80):match.start()]
+        after = text[match.end():match.end() + 40]
+
+        frequency = _frequency(after)
+        per_dose_stated = bool(_PER_DOSE_AFTER.match(after))
+        if frequency is not None or per_dose_stated:
+            basis = DoseBasis.PER_DOSE
+        elif _PER_DAY_AFTER.match(after):
+            basis = DoseBasis.PER_DAY
+        elif _PER_DAY_BEFORE.search(before):
+            basis = DoseBasis.PER_DAY
+        else:
+            basis = DoseBasis.PER_DOSE
+
+        strength_of = None
+        if unit in ("mg", "ml") and _STRENGTH_AFTER.match(after):
+            strength_of = UNIT_ALIASES[_STRENGTH_AFTER.match(after).group().strip().lower()][0]
+
+        quantities.append(DoseQuantity(
+            value=high,
+            unit=unit,
+            basis=basis,
+            low=low,
+            frequency_per_day=frequency,
+            single_dose_limit=per_dose_stated or bool(_SINGLE_DOSE_BEFORE.search(before)),
+            strength_of=strength_of,
+            text=match.group(0),
+        ))
+
+    return tuple(quantities)
+
+def parse_user_dose(text: str) -> Optional[DoseQuantity]:
+    """Parse the dose a user entered (the first quantity given)"""
+    quantities = parse_dosage(text)
+    return quantities[0] if quantities else None
+
+@lru_cache(maxsize=1024)
+def parse_recommended_limits(analysis_text: str) -> RecommendedLimits:
+    """
+    Find the maximum single dose, maximum daily dose and dosage-form strengths in an analysis
+
+    Explicitly labelled single-dose limits take precedence; otherwise the largest
+    per-dose amount mentioned is used as the single-dose limit, as before.
+    """
+    quantities = parse_dosage(analysis_text)
+
+    daily = [q for q in quantities if q.basis is DoseBasis.PER_DAY and "/" not in q.unit]
+    per_dose = [q for q in quantities if q.basis is DoseBasis.PER_DOSE and "/" not in q.unit
+                and q.unit not in COUNT_UNITS]
+    labelled = [q for q in per_dose if q.single_dose_limit]
+    strengths = tuple(q for q in quantities if q.strength_of)
+
+    # Daily limits stated per dose with a frequency ("650 mg every 4 hours") also bound the day
+    implied_daily = [q for q in per_dose if q.frequency_per_day is not None]
+
+    max_daily = max(daily, key=lambda q: q.value, default=None)
+    if max_daily is None and implied_daily:
+        widest = max(implied_daily, key=lambda q: q.daily_total())
+        max_daily = DoseQuantity(value=widest.daily_total(), unit=widest.unit,
+                                 basis=DoseBasis.PER_DAY, text=widest.text)
+
+    max_single = max(labelled or per_dose, key=lambda q: q.value, default=None)
+    return RecommendedLimits(max_single=max_single, max_daily=max_daily, strengths=strengths)
+
+def _single_dose_severity(user_value: float, limit: float) -> str:
+    return "high" if user_value > limit * 1.5 else "moderate"
+
+def evaluate_dose(user_dose: DoseQuantity, limits: RecommendedLimits) -> List[dict]:
+    """
+    Compare a parsed user dose against recommended limits
+
+    Returns:
+        List of warnings with type, user_dose, max_recommended, unit and severity
+    """
+    user_dose = user_dose.in_units_of(limits.strength_for(user_dose.unit))
+    warnings = []
+
+    single = limits.max_single
+    if (single is not None and user_dose.basis is DoseBasis.PER_DOSE
+            and single.unit == user_dose.unit and user_dose.value > single.value):
+        warnings.append({
+            "type": "single_dose",
+            "user_dose": user_dose.value,
+            "max_recommended": single.value,
+            "unit": user_dose.unit,
+            "severity": _single_dose_severity(user_dose.value, single.value)
+        })
+
+    daily = limits.max_daily
+    if daily is not None and daily.unit == user_dose.unit:
+        # Without a frequency, a single dose above the daily limit is still over it
+        user_daily = user_dose.daily_total() or user_dose.value
+        if user_daily > daily.value:
+            warnings.append({
+                "type": "daily_dose",
+                "user_dose": user_daily,
+                "max_recommended": daily.value,
+                "unit": user_dose.unit,
+                "severity": "critical"
+            })
+
+    return warnings
+
+# Severity codes used by the batch check, in increasing order
+SEVERITY_LEVELS = (None, "moderate", "high", "critical")
+
+def check_doses_batch(user_single: Sequence[float], user_daily: Sequence[float],
+                      max_single: Sequence[float], max_daily: Sequence[float]) -> List[Optional[str]]:
+    """
+    Validate many dose pairs at once. All values must already be in the same canonical
+    unit per pair; use NaN where a value is unknown.
+
+    Args:
+        user_single: User amount per dose
+        user_daily: User total per day (NaN to use the per-dose amount)
+        max_single: Recommended maximum single dose
+        max_daily: Recommended maximum daily dose
+
+    Returns:
+        Highest warning severity per pair (None when within limits)
+    """
+    if np is not None:
+        single = np.asarray(user_single, dtype=float)
+        daily = np.asarray(user_daily, dtype=float)
+        limit_single = np.asarray(max_single, dtype=float)
+        limit_daily = np.asarray(max_daily, dtype=float)
+        daily = np.where(np.isnan(daily), single, daily)
+
+        codes = np.zeros(single.shape, dtype=np.int8)
+        over_single = single > limit_single  # NaN comparisons are False
+        codes[over_single] = 1
+        codes[over_single & (single > limit_single * 1.5)] = 2
+        codes[daily > limit_daily] = 3
+        return [SEVERITY_LEVELS[code] for code in codes.tolist()]
+
+    severities = []
+    for single, daily, limit_single, limit_daily in zip(user_single, user_daily, max_single, max_daily):
+        daily = single if math.isnan(daily) else daily
+        code = 0
+        if single > limit_single:
+            code = 2 if single > limit_single * 1.5 else 1
+        if daily > limit_daily:
+            code = 3
+        severities.append(SEVERITY_LEVELS[code])
+    return severities
+
+def check_dosage_pairs(pairs: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+    """
+    Parse and validate many (user dosage text, dosage analysis text) pairs in one batch
+
+    Returns:
+        Highest warning severity per pair (None when within limits or not comparable)
+    """
+    nan = float("nan")
+    columns = ([], [], [], [])
+    for user_text, analysis_text in pairs:
+        user_dose = parse_user_dose(user_text)
+        limits = parse_recommended_limits(analysis_text)
+        values = (nan, nan, nan, nan)
+        if user_dose is not None:
+            user_dose = user_dose.in_units_of(limits.strength_for(user_dose.unit))
+            single = limits.max_single
+            daily = limits.max_daily
+            values = (
+                user_dose.value if user_dose.basis is DoseBasis.PER_DOSE else nan,
+                user_dose.daily_total() or user_dose.value,
+                single.value if single is not None and single.unit == user_dose.unit else nan,
+                daily.value if daily is not None and daily.unit == user_dose.unit else nan,
+            )
+        for column, value in zip(columns, values):
+            column.append(value)
+    return check_doses_batch(*columns)
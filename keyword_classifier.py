@@ -0,0 +1,112 @@
+"""
+Shared Multi-Pattern Keyword Classifier for Pharmacy Agents
+
+This module builds a single compiled matcher over every keyword list used by the
+specialist agents, so each line of search content is labelled in one pass instead of
+one nested keyword loop per category per agent.
+"""
+
+import re
+from typing import Dict, Iterable, List, Sequence
+
+# Keyword categories used to label lines of medical search content
+MEDICAL_LINE_CATEGORIES = {
+    "dosage": ['dose', 'dosage', 'mg', 'tablet', 'capsule', 'ml', 'daily', 'twice', 'three times'],
+    "common": ['common', 'frequent', 'mild', 'minor', 'temporary'],
+    "serious": ['serious', 'severe', 'dangerous', 'emergency', 'fatal', 'black box', 'warning'],
+    "symptom": ['nausea', 'headache', 'dizziness', 'rash', 'pain', 'swelling', 'bleeding'],
+    "major": ['contraindicated', 'avoid', 'dangerous', 'serious', 'major', 'severe'],
+    "moderate": ['moderate', 'monitor', 'caution', 'adjust', 'consider'],
+    "regulatory": ['fda', 'warning', 'alert', 'recall', 'update', 'safety'],
+    "regulatory_update": ['fda', 'alert', 'warning', 'recall', 'safety', 'update', 'communication'],
+    "interaction": ['interaction', 'drug'],
+    "verification": ['fda', 'approved', 'indicated', 'contraindicated', 'warning', 'dosage']
+}
+
+def _build_trie_pattern(keywords: Iterable[str]) -> str:
+    """Build a regex alternation factored by common prefixes (longest keyword preferred)"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A keyword ends here but longer ones continue: make the continuation optional
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return build(trie)
+
+class KeywordClassifier:
+    """
+    Label text with every category whose keywords occur in it (case-insensitive substring
+    match), using one prefix-factored regex built once for all categories.
+
+    Matches are searched at every start position, and each keyword also carries the labels
+    of any shorter keyword contained in it, so results are identical to checking
+    `any(keyword in text.lower() for keyword in keywords)` for each category.
+    """
+
+    def __init__(self, categories: Dict[str, Sequence[str]]):
+        self.categories = {label: tuple(keywords) for label, keywords in categories.items()}
+        self.label_bits = {label: 1 << bit for bit, label in enumerate(self.categories)}
+        self.all_bits = (1 << len(self.categories)) - 1
+
+        keyword_bits: Dict[str, int] = {}
+        for label, keywords in self.categories.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                keyword_bits[keyword] = keyword_bits.get(keyword, 0) | self.label_bits[label]
+
+        # A match on a longer keyword implies every keyword it contains
+        self._keyword_bits = {
+            keyword: self._contained_bits(keyword, keyword_bits) for keyword in keyword_bits
+        }
+        self._search = re.compile(_build_trie_pattern(keyword_bits)).search
+
+    @staticmethod
+    def _contained_bits(keyword: str, keyword_bits: Dict[str, int]) -> int:
+        bits = 0
+        for other, other_bits in keyword_bits.items():
+            if other in keyword:
+                bits |= other_bits
+        return bits
+
+    def classify(self, text: str) -> int:
+        """Get the bitmask of categories matched anywhere in the text"""
+        text = text.lower()
+        bits = 0
+        match = self._search(text)
+        while match:
+            bits |= self._keyword_bits[match.group()]
+            if bits == self.all_bits:
+                break
+            match = self._search(text, match.start() + 1)
+        return bits
+
+    def classify_lines(self, lines: Iterable[str]) -> List[int]:
+        """Get the category bitmask of each line"""
+        classify = self.classify
+        return [classify(line) for line in lines]
+
+    def has(self, bits: int, label: str) -> bool:
+        """Check if a bitmask includes a category"""
+        return bool(bits & self.label_bits[label])
+
+    def labels(self, bits: int) -> List[str]:
+        """Get the category names in a bitmask"""
+        return [label for label, bit in self.label_bits.items() if bits & bit]
+
+# Shared classifier for all agents, built once at import
+medical_line_classifier = KeywordClassifier(MEDICAL_LINE_CATEGORIES)
+
+def get_line_classifier() -> KeywordClassifier:
+    """Get the shared medical line classifier"""
+    return medical_line_classifier
@@ -1,148 +1,203 @@
 from camel.societies.workforce import Workforce
+from camel.societies.workforce.utils import TaskAssignment, TaskAssignResult
 from camel.tasks import Task
+from camel.tasks.task import TaskState
 from camel.agents import ChatAgent
-from camel.models import ModelFactory
-from camel.configs import MistralConfig
-from camel.types import ModelType, ModelPlatformType
 from agents import get_all_agents
-from search_coordinator import get_search_coordinator
+from search_coordinator import SearchActivity, get_search_coordinator, search_activity_scope
+from deadline import DEFAULT_REQUEST_BUDGET, Deadline, deadline_scope
+from prompts import INTERACTION_MATRIX_TEMPLATE, format_pharmacy_task, get_prompt, get_worker_description
+from token_accounting import TokenAccountingMixin
+from scheduler import Priority, get_request_scheduler, get_single_flight, normalize_query
+from planning import build_fast_path_plan, get_plan_cache, parse_structured_query, plan_cache_key, query_shape
+from model_routing import ClonePreservingMixin, create_role_model, get_model_router, install_router, routing_scope
+from query_state import Section, classify_subtask
+from streaming import AnalysisStream, StreamEvent, StreamEventType, publish, stream_scope
+from query_history import get_query_history
+from profiling import get_request_profiler
+from memory_accounting import get_memory_tracker
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import asyncio
+import concurrent.futures
+import contextvars
 import os
+import time
 from dotenv import load_dotenv
 import logging
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Placeholder for specialist sections that did not finish within the request time budget
+UNFINISHED_SECTION_NOTICE = """⏱️ **NOT COMPLETED** - This analysis section could not be finished within the request time budget.
+Please retry the analysis or consult your pharmacist for this information."""
+
+class AccountedChatAgent(ClonePreservingMixin, TokenAccountingMixin, ChatAgent):
+    """ChatAgent whose LLM calls are recorded by the token accountant under a fixed name"""
+    
+    def __init__(self, accounting_name, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.accounting_name = accounting_name
+
+# Private Workforce methods PharmacyWorkforce overrides or calls
+WORKFORCE_HOOKS = ("_decompose_task", "_find_assignee", "_post_task", "_handle_completed_task",
+                   "_update_dependencies_for_decomposition", "_update_task_dependencies_from_assignments")
+
+def workforce_hooks_available() -> bool:
+    """Check that the installed CAMEL Workforce still has the internals PharmacyWorkforce relies on"""
+    return all(callable(getattr(Workforce, name, None)) for name in WORKFORCE_HOOKS)
+
+class PharmacyWorkforce(Workforce):
+    """
+    Workforce that plans structured form queries without LLM round-trips
+    
+    Queries of the form shape ("Medicine: X, Age: Y, ...", passed in the task's
+    additional_info) are split into the fixed dosage/safety/interaction/verification
+    subtasks and assigned to the registered specialists directly, skipping the task
+    planner and coordinator calls. Free-form queries are planned by the task planner
+    once per query shape (see planning.PlanCache) and assigned by the coordinator.
+    
+    Subtask assignments and results are published to the current request's stream
+    (see run_pharmacy_query_stream) as they happen.
+    
+    When a structured query lists other medications, the interactions subtask is
+    given the pairwise interaction matrix of the whole regimen before it is posted.
+    
+    These hooks override Workforce internals (WORKFORCE_HOOKS), which is why
+    requirements.txt pins the camel-ai release they were written against.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Subtask id -> (specialist agent name, ids of subtasks it waits for)
+        self._planned_assignments: Dict[str, Tuple[str, List[str]]] = {}
+        # Subtasks already given an interaction matrix (reassignments post a task again)
+        self._matrix_checked: Set[str] = set()
+    
+    def _decompose_task(self, task, *args, **kwargs):
+        info = task.additional_info or {}
+        user_query, sections = info.get("user_query", ""), info.get("sections")
+        
+        plan = build_fast_path_plan(user_query, sections)
+        if plan:
+            subtasks = self._attach_subtasks(task, [planned.content for planned in plan])
+            subtask_ids = {planned.section: subtask.id for planned, subtask in zip(plan, subtasks)}
+            for planned, subtask in zip(plan, subtasks):
+                self._planned_assignments[subtask.id] = (
+                    planned.agent_name, [subtask_ids[section] for section in planned.depends_on]
+                )
+            logger.info(f"Fast-path plan for task {task.id}: {len(subtasks)} subtasks, planner skipped")
+            return subtasks
+        
+        if not user_query:
+            return super()._decompose_task(task, *args, **kwargs)
+        
+        shape = query_shape(user_query)
+        cache_key = plan_cache_key(shape, sections)
+        templates = get_plan_cache().get(cache_key)
+        if templates:
+            logger.info(f"Cached plan for query shape '{shape.key}': {len(templates)} subtasks, planner skipped")
+            return self._attach_subtasks(task, [shape.instantiate(template) for template in templates])
+        
+        subtasks = super()._decompose_task(task, *args, **kwargs)
+        # Streamed decompositions are not cached
+        if isinstance(subtasks, list) and subtasks:
+            templates = [shape.templatize(subtask.content) for subtask in subtasks]
+            if all(shape.is_reusable(template) for template in templates):
+                get_plan_cache().put(cache_key, templates)
+            else:
+                logger.info(f"Plan for query shape '{shape.key}' not cached: query values left in its subtasks")
+        return subtasks
+    
+    def _attach_subtasks(self, task, contents):
+        """Create the subtasks of a task without the task planner"""
+        subtasks = []
+        for index, content in enumerate(contents, 1):
+            subtask = Task(content=content, id=f"{task.id}.{index}", additional_info=task.additional_info)
+            subtask.parent = task
+            subtasks.append(subtask)
+        task.subtasks = subtasks
+        self._update_dependencies_for_decomposition(task, subtasks)
+        return subtasks
+    
+    async def _find_assignee(self, tasks):
+        # Planned assignments are used once, also when the coordinator assigns the tasks
+        # instead; reassignments after a failure go to the coordinator
+        planned = {task.id: self._planned_assignments.pop(task.id, None) for task in tasks}
+        if not tasks or None in planned.values():
+            return await super()._find_assignee(tasks)
+        
+        worker_ids = {
+            getattr(getattr(child, "worker", None), "agent_name", None): child.node_id
+            for child in self._children
+        }
+        if any(agent_name not in worker_ids for agent_name, _ in planned.values()):
+            return await super()._find_assignee(tasks)
+        
+        assignments = []
+        for task in tasks:
+            agent_name, dependencies = planned[task.id]
+            assignments.append(TaskAssignment(
+                task_id=task.id, assignee_id=worker_ids[agent_name], dependencies=dependencies
+            ))
+        self._update_task_dependencies_from_assignments(assignments, tasks)
+        return TaskAssignResult(assignments=assignments)
+    
+    async def _post_task(self, task, assignee_id):
+        section = classify_subtask(task.content)
+        publish(StreamEvent(StreamEventType.SECTION_STARTED, section=section and section.value, subtask_id=task.id))
+        if section is Section.INTERACTIONS and task.id not in self._matrix_checked:
+            self._matrix_checked.add(task.id)
+            await self._add_interaction_matrix(task)
+        await super()._post_task(task, assignee_id)
+    
+    async def _add_interaction_matrix(self, task):
+        """Append the regimen's interaction matrix to an interactions subtask, if it lists other medications"""
+        fields = parse_structured_query((task.additional_info or {}).get("user_query", ""))
+        co_medications = fields.co_medication_list() if fields else []
+        if not co_medications:
+            return
+        interaction_agent = get_all_agents()["WebSearchAgent"]
+        try:
+            matrix = await asyncio.to_thread(
+                interaction_agent.analyze_interaction_matrix, [fields.medicine, *co_medications], fields.reason
+            )
+        except Exception as e:
+            logger.warning(f"Interaction matrix for task {task.id} failed: {e}")
+            return
+        task.content += INTERACTION_MATRIX_TEMPLATE.format(matrix=matrix)
+    
+    async def _handle_completed_task(self, task):
+        # The root task completes last, with every subtask result already published
+        if task.parent is not None and task.result:
+            section = classify_subtask(task.content)
+            publish(StreamEvent(StreamEventType.SECTION_DONE, section=section and section.value,
+                                subtask_id=task.id, text=task.result))
+        await super()._handle_completed_task(task)
+
 def create_mistral_coordinator():
     """Create Mistral-powered coordinator agent with search coordination awareness"""
     
-    mistral_model = ModelFactory.create(
-        model_platform=ModelPlatformType.MISTRAL,
-        model_type=ModelType.MISTRAL_MEDIUM_3,
-        model_config_dict=MistralConfig(temperature=0.3).as_dict(),
-    )
-    
-    coordinator = ChatAgent(
-        system_message="""You are a pharmacy workflow coordinator specializing in pharmaceutical analysis with advanced search coordination.
-
-**ENHANCED COORDINATION CAPABILITIES:**
-Your system now features intelligent search coordination that:
-- Eliminates redundant searches across specialist agents
-- Prioritizes authoritative medical sources (FDA, MedlinePlus, Mayo Clinic)
-- Caches search results for efficiency
-- Ensures comprehensive coverage without duplication
-
-**COORDINATION RESPONSIBILITIES:**
-- Analyze incoming pharmaceutical queries and patient information
-- Assign tasks to appropriate medical specialist agents based on their expertise
-- Orchestrate coordinated information gathering to avoid duplicate searches
-- Monitor search efficiency and ensure comprehensive coverage
-- Synthesize specialist findings into comprehensive medical recommendations
-
-**AVAILABLE COORDINATED SPECIALISTS:**
-- **Dosage Specialist**: Medication dosing with coordinated search for authoritative guidelines
-- **Safety Specialist**: Side effects analysis using cached safety databases
-- **Information Specialist**: Drug interactions via coordinated regulatory searches  
-- **Verification Specialist**: Fact-checking using shared search results
-
-**SEARCH COORDINATION STRATEGY:**
-- DosageAgent focuses on: MedlinePlus, Mayo Clinic for dosing guidelines
-- SideEffectsAgent prioritizes: FDA, MedlinePlus for safety information
-- WebSearchAgent targets: FDA, WHO for regulatory updates and interactions
-- ValidatorAgent cross-references: All sources for comprehensive verification
-
-**QUALITY ASSURANCE:**
-- Monitor search result quality and source reliability
-- Ensure no critical information gaps due to search coordination
-- Flag when manual searches may be needed for complex cases
-- Maintain search efficiency metrics for continuous improvement
-
-**SAFETY PROTOCOLS:**
-- Always prioritize patient safety and evidence-based medical information
-- Include appropriate medical disclaimers and professional consultation recommendations
-- Ensure search coordination doesn't compromise information completeness
-- Maintain high standards for medical accuracy and source authority
-
-**WORKFLOW OPTIMIZATION:**
-- Leverage cached results to provide faster responses
-- Coordinate search timing to respect rate limits
-- Balance search efficiency with information comprehensiveness
-- Monitor and report on coordination effectiveness""",
-        model=mistral_model,
+    coordinator = AccountedChatAgent(
+        "Coordinator",
+        system_message=get_prompt("Coordinator"),
+        model=create_role_model("Coordinator", temperature=0.3),
         tools=[]
     )
+    install_router(coordinator, "Coordinator")
     
     return coordinator
 
 def create_mistral_task_planner():
     """Create Mistral-powered task planning agent with search coordination"""
     
-    mistral_model = ModelFactory.create(
-        model_platform=ModelPlatformType.MISTRAL,
-        model_type=ModelType.MISTRAL_MEDIUM_3,
-        model_config_dict=MistralConfig(temperature=0.2).as_dict(),
-    )
-    
-    task_planner = ChatAgent(
-        system_message="""You are a medical task planner for pharmaceutical analysis workflows with intelligent search coordination.
-
-**COORDINATED WORKFLOW PLANNING:**
-
-**1. COORDINATED INFORMATION GATHERING PHASE**
-   - **Dosage Analysis**: Coordinated search of MedlinePlus, Mayo Clinic for dosing guidelines
-     * Patient-specific considerations (age, weight, conditions)
-     * Administration schedules and maximum limits
-     * Special population dosing (pediatric, geriatric, renal impairment)
-   
-   - **Safety Assessment**: Prioritized search of FDA, MedlinePlus for safety data
-     * Common and serious side effects with incidence rates
-     * Contraindications and drug allergies
-     * Age and condition-specific warnings
-   
-   - **Interaction Research**: Targeted search of FDA, regulatory databases
-     * Drug-drug interactions with severity classifications
-     * Drug-food interactions and dietary considerations
-     * Current FDA alerts, warnings, and regulatory updates
-   
-   - **Search Optimization**: Coordinate to prevent redundant API calls
-     * Cache frequently requested medication information
-     * Share search results between specialist agents
-     * Respect source rate limits and optimize query timing
-
-**2. COORDINATED VERIFICATION PHASE**
-   - **Shared Result Validation**: Use cached search results for cross-verification
-     * Validate dosage recommendations against multiple authoritative sources
-     * Cross-check safety information using shared search cache
-     * Confirm interaction data across regulatory databases
-   
-   - **Source Authority Assessment**: Evaluate information quality and reliability
-     * Prioritize FDA and MedlinePlus over secondary sources
-     * Flag conflicting information between authoritative sources
-     * Ensure evidence-based medical accuracy throughout
-
-**3. EFFICIENT SYNTHESIS PHASE**
-   - **Comprehensive Analysis**: Combine all coordinated findings efficiently
-     * Integrate dosage, safety, and interaction information
-     * Resolve any conflicts using source authority hierarchy
-     * Ensure completeness despite search coordination optimizations
-   
-   - **Quality Assurance**: Verify search coordination didn't miss critical information
-     * Monitor coverage gaps that might need additional searches
-     * Ensure patient safety considerations are comprehensive
-     * Validate that efficiency gains don't compromise medical accuracy
-
-**SEARCH COORDINATION PRINCIPLES:**
-- Efficiency without compromising safety or completeness
-- Intelligent source assignment based on specialty and authority
-- Result sharing to eliminate redundant searches
-- Rate limiting respect and error handling
-- Continuous monitoring of coordination effectiveness
-
-**TASK SPECIFICITY REQUIREMENTS:**
-Each coordinated subtask must be specific, medically sound, and contribute to comprehensive pharmaceutical analysis that prioritizes patient safety while leveraging search efficiency improvements.""",
-        model=mistral_model,
+    task_planner = AccountedChatAgent(
+        "TaskPlanner",
+        system_message=get_prompt("TaskPlanner"),
+        model=create_role_model("TaskPlanner", temperature=0.2),
         tools=[]
     )
+    install_router(task_planner, "TaskPlanner")
     
     return task_planner
 
@@ -157,8 +212,14 @@ def create_pharmacy_workforce():
     coordinator = create_mistral_coordinator()
     task_planner = create_mistral_task_planner()
     
-    # Create workforce with custom agents
-    workforce = Workforce(
+    # Create workforce with custom agents (a stock Workforce, without the fast-path planner
+    # and live section events, if this CAMEL version changed the internals they hook into)
+    workforce_class = PharmacyWorkforce
+    if not workforce_hooks_available():
+        logger.warning("Installed camel-ai lacks the Workforce internals PharmacyWorkforce overrides "
+                       "(see requirements.txt for the supported version); using the stock Workforce")
+        workforce_class = Workforce
+    workforce = workforce_class(
         description='Pharmacy AI Assistant Workforce - Multi-agent pharmaceutical analysis with Mistral coordination and intelligent search coordination',
         coordinator_agent=coordinator,
         task_agent=task_planner,
@@ -172,130 +233,303 @@ def create_pharmacy_workforce():
     
     # Add specialist workers with enhanced descriptions
     workforce.add_single_agent_worker(
-        description="Coordinated Dosage Analysis Specialist: Expert in medication dosing guidelines with intelligent search coordination. Uses cached results from MedlinePlus and Mayo Clinic for age-weight calculations, administration schedules, maximum daily limits, and frequency recommendations. Eliminates redundant searches while ensuring comprehensive dosage coverage.",
+        description=get_worker_description("DosageAgent"),
         worker=agents["DosageAgent"]
     ).add_single_agent_worker(
-        description="Coordinated Safety Assessment Specialist: Expert in medication side effects and adverse reactions with prioritized search coordination. Leverages shared cache from FDA and medical databases to identify common and serious safety concerns without redundant API calls. Focuses on patient-specific risks and contraindications.",
+        description=get_worker_description("SideEffectsAgent"),
         worker=agents["SideEffectsAgent"]
     ).add_single_agent_worker(
-        description="Coordinated Drug Information Specialist: Expert in current drug interactions and regulatory updates with targeted search coordination. Efficiently accesses FDA alerts, medication recalls, and WHO databases through coordinated searches. Shares regulatory findings with verification team.",
+        description=get_worker_description("WebSearchAgent"),
         worker=agents["WebSearchAgent"]
     ).add_single_agent_worker(
-        description="Coordinated Medical Verification Specialist: Medical fact-checker with access to shared search results from all specialist agents. Uses cached findings from FDA, MedlinePlus, Mayo Clinic, and other authoritative sources to validate dosage, safety, and interaction data without redundant searches.",
+        description=get_worker_description("ValidatorAgent"),
         worker=agents["ValidatorAgent"]
     )
     
     return workforce
 
-def run_pharmacy_query(user_query: str):
+def process_task_within_deadline(workforce, task, deadline):
+    """
+    Run the workforce on a task, stopping it when the request deadline is reached
+    
+    Args:
+        workforce: CAMEL Workforce to run
+        task: Task to process
+        deadline: Request deadline
+        
+    Returns:
+        bool: True if the workforce finished, False if it was stopped at the deadline
+    """
+    
+    async def process():
+        await asyncio.wait_for(workforce.process_task_async(task), timeout=deadline.remaining())
+    
+    try:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(process())
+        else:
+            # Already inside an event loop: run on a fresh loop in a worker thread
+            context = contextvars.copy_context()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(context.run, asyncio.run, process()).result()
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"Workforce stopped at request deadline after {deadline.elapsed():.1f}s")
+        return False
+
+def collect_partial_results(task):
+    """
+    Assemble the subtask results completed before the deadline, marking the rest as unfinished
+    
+    Returns:
+        str or None: Workforce-style result text, or None if no subtask completed
+    """
+    
+    sections = []
+    completed = 0
+    for subtask in task.subtasks:
+        if subtask.state == TaskState.DONE and subtask.result:
+            sections.append(f"--- Subtask {subtask.id} Result ---\n{subtask.result}")
+            completed += 1
+        else:
+            sections.append(f"--- Subtask {subtask.id} Result ---\n{UNFINISHED_SECTION_NOTICE}")
+    
+    return "\n\n".join(sections) if completed else None
+
+def run_pharmacy_query(user_query: str, time_budget: Optional[float] = None,
+                       priority: Priority = Priority.NORMAL, sections: Optional[Sequence[str]] = None):
     """
     Process pharmacy query using CAMEL Workforce with Mistral coordination and search optimization
     
     Args:
         user_query (str): User's pharmacy question
+        time_budget (float, optional): End-to-end time budget in seconds. Defaults to
+            MEDFORCE_REQUEST_BUDGET_S. Specialist work that cannot finish in the budget
+            is skipped and returned marked as not completed.
+        priority (Priority): Scheduling priority (Priority.URGENT for pharmacist-flagged queries)
+        sections (list, optional): Analysis sections to produce ("dosage_analysis",
+            "safety_assessment", "drug_interactions", "verification"); all if None.
+            See query_state for re-analyzing only the sections a changed field affects.
         
     Returns:
         str: Comprehensive pharmacy guidance response with search coordination metrics
     """
     
-    try:
-        # Verify Mistral API key
-        if not os.getenv('MISTRAL_API_KEY'):
-            return "⚠️ Configuration Error: MISTRAL_API_KEY not found in environment variables."
-        
-        # Get search coordinator for monitoring
-        search_coordinator = get_search_coordinator()
-        initial_stats = search_coordinator.get_cache_stats()
-        
-        print("Creating Mistral-powered pharmacy workforce with search coordination...")
-        workforce = create_pharmacy_workforce()
-        print("✓ Coordinated workforce created with intelligent search optimization")
-        
-        # Create comprehensive pharmaceutical analysis task with search coordination
-        task_content = f"""
-        **COORDINATED PHARMACEUTICAL ANALYSIS REQUEST**
-        
-        **Patient Query:** {user_query}
-        
-        **COORDINATED MULTI-SPECIALIST ANALYSIS WITH SEARCH OPTIMIZATION:**
-        
-        **COORDINATED DOSAGE ANALYSIS:**
-        - Utilize shared search results from MedlinePlus and Mayo Clinic for dosage guidelines
-        - Determine safe and effective medication dosages with patient-specific considerations
-        - Leverage cached results for age, weight, and health status factors
-        - Specify administration frequency, timing, and duration from authoritative sources
-        - Include maximum daily limits and safety thresholds from coordinated searches
-        - Note special administration instructions from verified medical databases
-        
-        **COORDINATED SAFETY ASSESSMENT:**
-        - Access cached FDA and medical database results for side effect information
-        - Identify common side effects (>1% incidence) using shared search data
-        - List serious adverse reactions from coordinated regulatory searches
-        - Note contraindications and patient-specific risks from verified sources
-        - Include age-specific, gender-specific warnings from cached medical data
-        - Highlight allergy considerations using shared safety databases
-        
-        **COORDINATED DRUG INFORMATION RESEARCH:**
-        - Efficiently search FDA and WHO databases for current drug interactions
-        - Research drug-food interactions using coordinated regulatory searches
-        - Find current FDA safety alerts through optimized search coordination
-        - Check recent regulatory updates via shared search results
-        - Investigate condition-specific contraindications from cached data
-        - Share findings with verification team to eliminate duplicate searches
-        
-        **COORDINATED VERIFICATION PROCESS:**
-        - Cross-check dosage recommendations using shared search cache
-        - Validate safety information against coordinated database results
-        - Confirm interaction data using previously searched FDA and medical sources
-        - Ensure all medical claims are evidence-based using coordinated verification
-        - Verify information accuracy through shared authoritative source data
-        - Flag any discrepancies found in coordinated search results
-        
-        **SEARCH COORDINATION REQUIREMENTS:**
-        - Eliminate redundant searches across all specialist agents
-        - Prioritize authoritative sources: FDA, MedlinePlus, Mayo Clinic, WHO
-        - Share search results between agents to improve efficiency
-        - Respect API rate limits and implement intelligent search timing
-        - Cache frequently requested medication information for faster responses
-        - Monitor search coordination effectiveness and report any coverage gaps
-        
-        **SAFETY AND PROFESSIONAL STANDARDS:**
-        - Maintain high medical accuracy despite search optimization
-        - Use only trusted medical sources prioritized by search coordination
-        - Include comprehensive medical disclaimers in all recommendations
-        - Specify situations requiring immediate professional medical consultation
-        - Ensure search efficiency doesn't compromise patient safety priorities
-        - Maintain evidence-based medical accuracy throughout coordinated analysis
-        
-        **COORDINATED DELIVERABLE:**
-        Synthesize all coordinated specialist findings into a comprehensive, safe, and medically sound pharmaceutical guidance response that combines dosage recommendations, safety considerations, interaction warnings, and verification status. Include search coordination metrics to demonstrate efficiency improvements while maintaining medical accuracy and safety standards.
-        """
-        
-        # Create and process task
-        task = Task(
-            content=task_content,
-            id="coordinated_pharmacy_workforce_analysis"
-        )
-        
-        print("🔄 Processing coordinated pharmaceutical analysis with search optimization...")
-        workforce.process_task(task)
-        
-        # Get results and coordination metrics
-        result = task.result
-        final_stats = search_coordinator.get_cache_stats()
+    return run_pharmacy_query_structured(user_query, time_budget, priority, sections)["response"]
+
+def run_pharmacy_query_structured(user_query: str, time_budget: Optional[float] = None,
+                                  priority: Priority = Priority.NORMAL,
+                                  sections: Optional[Sequence[str]] = None):
+    """
+    Process pharmacy query like run_pharmacy_query, returning the analysis as structured data
+    
+    Queries are admitted through the request scheduler: at most MEDFORCE_MAX_CONCURRENT_QUERIES
+    run at once and the rest queue by priority. Queries the queue cannot take are shed at
+    once with the professional fallback response (status "shed"). A query identical (after
+    normalization) to one already queued or running shares that analysis instead of
+    running the workforce again.
+    
+    Args:
+        user_query (str): User's pharmacy question
+        time_budget (float, optional): End-to-end time budget in seconds
+        priority (Priority): Scheduling priority
+        sections (list, optional): Analysis sections to produce (all if None)
         
-        print("✅ Coordinated workforce analysis completed successfully")
+    Returns:
+        dict: query, status ("completed", "partial", "unavailable", "error" or "shed"), response
+        (the formatted text returned by run_pharmacy_query), subtasks (id, content,
+        state and result of each specialist subtask), search_metrics, model_tier (tier of
+        the auto-routed agents, see model_routing), search_activity (this request's search
+        coordinator activity), timings (seconds per phase) and elapsed_s
+    """
+    
+    # The budget starts at submission, so time spent queued for admission counts against it
+    deadline = request_deadline(time_budget)
+    future, leader = get_single_flight().submit(
+        _flight_key(user_query, time_budget, sections),
+        lambda: get_request_scheduler().submit(analyze_pharmacy_query, user_query, time_budget, sections, deadline,
+                                               priority=priority, fallback=lambda: shed_analysis(user_query),
+                                               deadline=deadline),
+        priority,
+    )
+    analysis = future.result()
+    return analysis if leader else {**analysis, "query": user_query}
+
+def _flight_key(user_query: str, time_budget: Optional[float], sections: Optional[Sequence[str]]):
+    """Identity of an analysis request for coalescing identical concurrent queries"""
+    return normalize_query(user_query), time_budget, tuple(sections) if sections else None
+
+def run_pharmacy_query_stream(user_query: str, time_budget: Optional[float] = None,
+                              priority: Priority = Priority.NORMAL,
+                              sections: Optional[Sequence[str]] = None) -> Iterator[StreamEvent]:
+    """
+    Process pharmacy query like run_pharmacy_query_structured, yielding progress as it happens
+    
+    The analysis runs on the request scheduler while the caller consumes the events, so
+    each specialist section can be shown as soon as its subtask finishes. A query coalesced
+    onto an identical analysis already in flight only gets the DONE event.
+    
+    Args:
+        user_query (str): User's pharmacy question
+        time_budget (float, optional): End-to-end time budget in seconds
+        priority (Priority): Scheduling priority
+        sections (list, optional): Analysis sections to produce (all if None)
         
-        if result:
-            return format_coordinated_workforce_response(result, user_query, initial_stats, final_stats)
-        else:
-            return create_professional_fallback()
-            
+    Yields:
+        StreamEvent: SECTION_STARTED, TOKEN (streaming model backends only) and SECTION_DONE
+        events, then one DONE event whose analysis is the run_pharmacy_query_structured result
+    """
+    
+    stream = AnalysisStream()
+    deadline = request_deadline(time_budget)
+    
+    def analyze():
+        with stream_scope(stream):
+            return analyze_pharmacy_query(user_query, time_budget, sections, deadline=deadline)
+    
+    def finish(future):
+        error = future.exception()
+        stream.close(analysis=None if error else future.result(), error=error)
+    
+    future, leader = get_single_flight().submit(
+        _flight_key(user_query, time_budget, sections),
+        lambda: get_request_scheduler().submit(analyze, priority=priority,
+                                               fallback=lambda: shed_analysis(user_query), deadline=deadline),
+        priority,
+    )
+    if leader:
+        future.add_done_callback(finish)
+        yield from stream.events()
+    else:
+        yield StreamEvent(StreamEventType.DONE, analysis={**future.result(), "query": user_query})
+
+def request_deadline(time_budget: Optional[float] = None) -> Deadline:
+    """Deadline of a request submitted now (MEDFORCE_REQUEST_BUDGET_S if no budget is given)"""
+    return Deadline(time_budget if time_budget is not None else DEFAULT_REQUEST_BUDGET)
+
+def analyze_pharmacy_query(user_query: str, time_budget: Optional[float] = None,
+                           sections: Optional[Sequence[str]] = None, deadline: Optional[Deadline] = None):
+    """
+    Run the structured analysis of a query directly, without admission through the scheduler
+    
+    deadline is the request's deadline when it was created at submission (a new one from
+    time_budget otherwise). Sampled and slow requests are profiled when profiling is enabled
+    (see profiling), and tracemalloc snapshots are diffed between requests when enabled
+    (see memory_accounting).
+    """
+    
+    deadline = deadline or request_deadline(time_budget)
+    analysis = get_request_profiler().profile(user_query, _analyze_pharmacy_query, user_query, deadline, sections)
+    get_memory_tracker().request_finished()
+    return analysis
+
+def _analyze_pharmacy_query(user_query: str, deadline: Deadline, sections: Optional[Sequence[str]]):
+    timings = {"queued_s": round(deadline.elapsed(), 3)}
+    activity = SearchActivity()
+    
+    # Model tier of the auto-routed agents for this request
+    started = time.perf_counter()
+    route = get_model_router().route(user_query)
+    timings["route_s"] = round(time.perf_counter() - started, 3)
+    
+    try:
+        with deadline_scope(deadline), routing_scope(route), search_activity_scope(activity):
+            analysis = _run_pharmacy_query(user_query, deadline, sections, timings)
     except Exception as e:
-        return handle_workforce_error(e)
+        analysis = {"status": "error", "response": handle_workforce_error(e)}
+    
+    analysis.setdefault("subtasks", [])
+    analysis.setdefault("search_metrics", None)
+    result = {"query": user_query, **analysis, "model_tier": route.tier.value,
+              "search_activity": activity.summary(), "timings": timings,
+              "elapsed_s": round(deadline.elapsed(), 3)}
+    _record_history(result)
+    return result
+
+def shed_analysis(user_query: str):
+    """Structured analysis returned for a query shed under load"""
+    
+    result = {"query": user_query, "status": "shed", "response": create_professional_fallback(),
+              "subtasks": [], "search_metrics": None, "model_tier": None, "search_activity": None,
+              "timings": {}, "elapsed_s": 0.0}
+    _record_history(result)
+    return result
+
+def _record_history(analysis):
+    """Queue an analysis for the query history (written off the request path)"""
+    history = get_query_history()
+    if history is not None:
+        history.record(analysis)
+
+def _run_pharmacy_query(user_query: str, deadline: Deadline, sections: Optional[Sequence[str]] = None,
+                        timings: Optional[Dict[str, float]] = None):
+    """Run the coordinated workforce for a query within the request deadline, filling in phase timings"""
+    
+    timings = timings if timings is not None else {}
+    
+    # Verify Mistral API key
+    if not os.getenv('MISTRAL_API_KEY'):
+        return {"status": "error",
+                "response": "⚠️ Configuration Error: MISTRAL_API_KEY not found in environment variables."}
+    
+    # Get search coordinator for monitoring
+    search_coordinator = get_search_coordinator()
+    initial_stats = search_coordinator.get_cache_stats()
+    
+    print("Creating Mistral-powered pharmacy workforce with search coordination...")
+    started = time.perf_counter()
+    workforce = create_pharmacy_workforce()
+    timings["setup_s"] = round(time.perf_counter() - started, 3)
+    print("✓ Coordinated workforce created with intelligent search optimization")
+    
+    # Create comprehensive pharmaceutical analysis task with search coordination
+    task_content = format_pharmacy_task(user_query, sections)
+    
+    # Create and process task
+    task = Task(
+        content=task_content,
+        id="coordinated_pharmacy_workforce_analysis",
+        additional_info={"user_query": user_query, "sections": list(sections) if sections else None}
+    )
+    
+    print("🔄 Processing coordinated pharmaceutical analysis with search optimization...")
+    started = time.perf_counter()
+    completed = process_task_within_deadline(workforce, task, deadline)
+    timings["workforce_s"] = round(time.perf_counter() - started, 3)
+    
+    # Get results and coordination metrics
+    result = task.result if completed else collect_partial_results(task)
+    final_stats = search_coordinator.get_cache_stats()
+    
+    if completed:
+        print("✅ Coordinated workforce analysis completed successfully")
+    else:
+        print(f"⏱️ Time budget of {deadline.budget:.0f}s reached - returning completed sections")
+    
+    subtasks = [
+        {"id": subtask.id, "content": subtask.content, "state": subtask.state.value, "result": subtask.result}
+        for subtask in task.subtasks
+    ]
+    
+    if result:
+        started = time.perf_counter()
+        response = format_coordinated_workforce_response(result, user_query, initial_stats, final_stats,
+                                                         partial=not completed)
+        timings["format_s"] = round(time.perf_counter() - started, 3)
+        return {
+            "status": "completed" if completed else "partial",
+            "response": response,
+            "subtasks": subtasks,
+            "search_metrics": final_stats
+        }
+    else:
+        return {"status": "unavailable", "response": create_professional_fallback(),
+                "subtasks": subtasks, "search_metrics": final_stats}
 
-def format_coordinated_workforce_response(result, original_query, initial_stats, final_stats):
-    """Format workforce result with search coordination metrics"""
+def format_coordinated_workforce_response(result, original_query, initial_stats, final_stats, partial=False):
+    """Format workforce result with search coordination metrics, flagging partial (deadline-bounded) results"""
     
     try:
         # Extract content from result
@@ -311,13 +545,17 @@ def format_coordinated_workforce_response(result, original_query, initial_stats,
         # Calculate search efficiency improvements
         searches_saved = calculate_search_efficiency(initial_stats, final_stats)
         
+        partial_notice = ""
+        if partial:
+            partial_notice = "**⏱️ PARTIAL ANALYSIS:** The request time budget was reached before every specialist finished. Unfinished sections are marked as not completed.\n\n"
+        
         # Create structured medical response with coordination metrics
         formatted_response = f"""🧾 **COORDINATED PHARMACY ANALYSIS**
 *(Powered by Mistral AI Multi-Agent Workforce with Intelligent Search Coordination)*
 
 **Original Query:** {original_query}
 
-**📋 COORDINATED MULTI-SPECIALIST FINDINGS:**
+{partial_notice}**📋 COORDINATED MULTI-SPECIALIST FINDINGS:**
 
 {content}
 
@@ -0,0 +1,192 @@
+"""
+Memory Accounting
+
+Attributes the memory of a long-running process to the structures that grow with use:
+the search coordinator cache (see SearchCoordinator.get_memory_stats) and, optionally,
+tracemalloc snapshot diffs taken between requests. The report is part of
+get_coordination_status() under "memory".
+
+Agent conversation memory is not reported: the workforce runs pooled clones of the
+specialists, which are reset when returned to the pool and dropped with the per-request
+workforce, so no agent memory outlives a subtask.
+
+Sizes are estimates: objects are walked recursively with sys.getsizeof, each object
+counted once per report (a string shared by several cache entries is attributed to the
+first one), and classes, functions, modules and enum members are not counted.
+
+Configuration (environment variables):
+    MEDFORCE_TRACEMALLOC=1              trace allocations and diff snapshots between requests
+    MEDFORCE_TRACEMALLOC_FRAMES=1       stack frames stored per allocation
+    MEDFORCE_TRACEMALLOC_EVERY=1        take a snapshot every N requests
+"""
+
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+import types
+from collections import deque
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Objects shared by the whole process rather than held by the structure being measured
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, Enum)
+_LEAF_TYPES = (str, bytes, bytearray, int, float, complex, bool, type(None))
+
+# Allocation sites listed per tracemalloc diff
+TRACEMALLOC_TOP_SITES = 15
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Estimate the bytes held by an object and everything it references
+
+    Args:
+        obj: Object to measure
+        seen: Ids of objects already counted; pass the same set when measuring several
+            objects so shared objects are only counted once
+
+    Returns:
+        Estimated size in bytes
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, _LEAF_TYPES):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        if hasattr(item, "__dict__"):
+            stack.append(vars(item))
+        for cls in type(item).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name not in ("__dict__", "__weakref__") and hasattr(item, name):
+                    stack.append(getattr(item, name))
+    return total
+
+def process_rss_bytes() -> Optional[int]:
+    """Current resident set size of this process (None where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class MemoryTracker:
+    """
+    Diffs tracemalloc snapshots between requests to find allocation sites that keep growing
+
+    Args:
+        enabled: Trace allocations (tracemalloc adds noticeable CPU and memory overhead)
+        frames: Stack frames stored per allocation
+        every: Take a snapshot every N finished requests
+    """
+
+    def __init__(self, enabled: bool = False, frames: int = 1, every: int = 1):
+        self.enabled = enabled
+        self.frames = frames
+        self.every = max(1, every)
+        self.requests = 0
+        self.snapshots = 0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._last_diff: List[Dict[str, Any]] = []
+        self._growth: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        if enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = self._previous = self._take_snapshot()
+            logger.info(f"tracemalloc enabled ({frames} frame(s), snapshot every {self.every} request(s))")
+
+    @classmethod
+    def from_env(cls) -> "MemoryTracker":
+        return cls(
+            enabled=os.getenv("MEDFORCE_TRACEMALLOC", "").lower() in ("1", "true", "yes", "on"),
+            frames=int(os.getenv("MEDFORCE_TRACEMALLOC_FRAMES", "1")),
+            every=int(os.getenv("MEDFORCE_TRACEMALLOC_EVERY", "1")),
+        )
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    @staticmethod
+    def _top_sites(snapshot: tracemalloc.Snapshot, since: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        sites = []
+        for stat in snapshot.compare_to(since, "lineno")[:TRACEMALLOC_TOP_SITES]:
+            frame = stat.traceback[0]
+            sites.append({
+                "site": f"{frame.filename}:{frame.lineno}",
+                "size_diff_bytes": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size_bytes": stat.size,
+            })
+        return sites
+
+    def request_finished(self):
+        """Record a finished request, diffing a new snapshot against the previous one when due"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.requests += 1
+            due = self.requests % self.every == 0
+        # Concurrent requests finishing together share one snapshot
+        if not due or not self._snapshot_lock.acquire(blocking=False):
+            return
+        try:
+            snapshot = self._take_snapshot()
+            last_diff = self._top_sites(snapshot, self._previous)
+            growth = self._top_sites(snapshot, self._baseline)
+            with self._lock:
+                self._previous = snapshot
+                self._last_diff = last_diff
+                self._growth = growth
+                self.snapshots += 1
+        finally:
+            self._snapshot_lock.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get traced memory and the top allocation sites of the last and cumulative diffs"""
+        if not self.enabled:
+            return {"enabled": False}
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            return {
+                "enabled": True,
+                "requests": self.requests,
+                "snapshots": self.snapshots,
+                "traced_bytes": current,
+                "traced_peak_bytes": peak,
+                "last_request_diff": list(self._last_diff),
+                "growth_since_start": list(self._growth),
+            }
+
+_memory_tracker: Optional[MemoryTracker] = None
+_memory_tracker_lock = threading.Lock()
+
+def get_memory_tracker() -> MemoryTracker:
+    """Get the process-wide memory tracker (configured from the environment)"""
+    global _memory_tracker
+    with _memory_tracker_lock:
+        if _memory_tracker is None:
+            _memory_tracker = MemoryTracker.from_env()
+        return _memory_tracker
@@ -0,0 +1,270 @@
+"""
+Model Tier Routing for the Coordinator, Planner and Specialist Agents
+
+This module lets each agent role run on a small or a medium model. Roles set to "auto" get
+both models and choose one per request. The router sends simple queries, and queries whose
+evidence is already cached, to the small model and escalates to the medium model for
+complex patients, free-form questions and high-risk topics. Per-tier token and latency
+metrics are recorded by token_accounting.
+
+Configuration (environment variables):
+    MEDFORCE_MODEL_ROUTING=0            every role on the medium model (previous behaviour)
+    MEDFORCE_MODEL_TIER_<ROLE>=small    per-role tier: small, medium or auto
+                                        (roles: COORDINATOR, TASKPLANNER, DOSAGEAGENT, ...)
+    MEDFORCE_SMALL_MODEL / MEDFORCE_MEDIUM_MODEL   model names of the tiers
+    MEDFORCE_MODEL_BACKEND=stub         use CAMEL stub models (no API calls) for testing
+"""
+
+import contextvars
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from planning import AGE_PATTERN, parse_structured_query
+
+logger = logging.getLogger(__name__)
+
+class ModelTier(Enum):
+    """Model size tiers (ordered from cheapest to most capable)"""
+    SMALL = "small"
+    MEDIUM = "medium"
+
+TIER_ORDER = (ModelTier.SMALL, ModelTier.MEDIUM)
+
+# Role setting that routes each request to a tier
+AUTO = "auto"
+
+# Default tier setting per role: assignment and planning are routing/formatting work,
+# verification always gets the medium model
+DEFAULT_ROLE_TIERS = {
+    "Coordinator": ModelTier.SMALL.value,
+    "TaskPlanner": ModelTier.SMALL.value,
+    "DosageAgent": AUTO,
+    "SideEffectsAgent": AUTO,
+    "WebSearchAgent": AUTO,
+    "ValidatorAgent": ModelTier.MEDIUM.value,
+}
+
+# Query terms that always escalate to the medium model
+ESCALATION_TERMS = (
+    "pregnan", "breastfeed", "lactat", "kidney", "renal", "liver", "hepatic", "overdose",
+    "poison", "infant", "newborn", "baby", "toddler", "child", "pediatric", "elderly",
+    "geriatric", "chemotherapy", "anticoagul", "warfarin", "insulin",
+    "seizure", "allerg", "interaction", "combine", "together with",
+)
+
+# Free-form queries longer than this (in words) are treated as complex
+SIMPLE_QUERY_WORDS = 40
+
+# Patient ages routed to the medium model (pediatric and geriatric dosing)
+PEDIATRIC_AGE = 12
+GERIATRIC_AGE = 65
+
+def _is_pediatric_or_geriatric(age: int) -> bool:
+    return age < PEDIATRIC_AGE or age >= GERIATRIC_AGE
+
+def routing_enabled() -> bool:
+    """Check if model tier routing is enabled (MEDFORCE_MODEL_ROUTING, on by default)"""
+    return os.getenv("MEDFORCE_MODEL_ROUTING", "1").lower() in ("1", "true", "yes", "on")
+
+def role_tier_setting(role: str) -> str:
+    """Get the tier setting of an agent role: "small", "medium" or "auto" """
+    if not routing_enabled():
+        return ModelTier.MEDIUM.value
+    setting = os.getenv(f"MEDFORCE_MODEL_TIER_{role.upper()}", DEFAULT_ROLE_TIERS.get(role, ModelTier.MEDIUM.value))
+    setting = setting.strip().lower()
+    if setting != AUTO and setting not in {tier.value for tier in ModelTier}:
+        logger.warning(f"Unknown model tier '{setting}' for {role}, using medium")
+        return ModelTier.MEDIUM.value
+    return setting
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    """Tier chosen for the auto-routed agents of one request"""
+    tier: ModelTier
+    reason: str
+
+class ModelRouter:
+    """Chooses the model tier of a request and counts its decisions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.decisions: Dict[str, int] = {tier.value: 0 for tier in ModelTier}
+        self.reasons: Dict[str, int] = {}
+
+    def route(self, user_query: str, cached_evidence: Optional[int] = None) -> RoutingDecision:
+        """
+        Choose the model tier for a query
+
+        Args:
+            user_query: Patient query
+            cached_evidence: Number of cached evidence lines for the query's drug (looked up if None)
+
+        Returns:
+            Routing decision with the reason
+        """
+        decision = self._decide(user_query or "", cached_evidence)
+        with self._lock:
+            self.decisions[decision.tier.value] += 1
+            self.reasons[decision.reason] = self.reasons.get(decision.reason, 0) + 1
+        logger.info(f"Model tier {decision.tier.value}: {decision.reason}")
+        return decision
+
+    def _decide(self, user_query: str, cached_evidence: Optional[int]) -> RoutingDecision:
+        text = user_query.lower()
+        for term in ESCALATION_TERMS:
+            if term in text:
+                return RoutingDecision(ModelTier.MEDIUM, f"high-risk term '{term}'")
+
+        fields = parse_structured_query(user_query)
+        if fields is not None:
+            if _is_pediatric_or_geriatric(fields.age):
+                return RoutingDecision(ModelTier.MEDIUM, "pediatric or geriatric patient")
+            if fields.co_medications or any(separator in fields.medicine for separator in (",", "+", "/", " and ")):
+                return RoutingDecision(ModelTier.MEDIUM, "multiple medicines")
+            return RoutingDecision(ModelTier.SMALL, "simple structured query")
+
+        if any(_is_pediatric_or_geriatric(int(match.group(0))) for match in AGE_PATTERN.finditer(user_query)):
+            return RoutingDecision(ModelTier.MEDIUM, "pediatric or geriatric patient")
+        if len(user_query.split()) > SIMPLE_QUERY_WORDS:
+            return RoutingDecision(ModelTier.MEDIUM, "complex free-form query")
+        if cached_evidence is None:
+            cached_evidence = count_cached_evidence(user_query)
+        if cached_evidence > 0:
+            return RoutingDecision(ModelTier.SMALL, "cached evidence available")
+        return RoutingDecision(ModelTier.MEDIUM, "free-form query without cached evidence")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing decision counts for monitoring"""
+        with self._lock:
+            return {"decisions": dict(self.decisions), "reasons": dict(self.reasons)}
+
+def count_cached_evidence(user_query: str, limit: int = 5) -> int:
+    """Count cached search lines and local monograph entries for the drug named in a query"""
+    from planning import query_shape
+    from monograph_store import get_monograph_store
+    from search_coordinator import get_search_coordinator
+
+    drug = dict(query_shape(user_query).values).get("{drug}")
+    if not drug:
+        return 0
+    store = get_monograph_store()
+    local = 1 if store is not None and store.resolve_drug(drug) else 0
+    return local + len(get_search_coordinator().search_cached_content(drug, query_filter=drug, limit=limit))
+
+# Routing decision of the request being processed (inherited by the workforce's async tasks)
+_current_route: contextvars.ContextVar[Optional[RoutingDecision]] = contextvars.ContextVar(
+    "medforce_model_route", default=None
+)
+
+def get_current_route() -> Optional[RoutingDecision]:
+    """Get the routing decision of the current request, if any"""
+    return _current_route.get()
+
+@contextmanager
+def routing_scope(decision: Optional[RoutingDecision]) -> Iterator[Optional[RoutingDecision]]:
+    """Make a routing decision current for the code (and async tasks) run inside the scope"""
+    token = _current_route.set(decision)
+    try:
+        yield decision
+    finally:
+        _current_route.reset(token)
+
+def tier_for_role(role: str) -> ModelTier:
+    """Tier an agent role runs on now (auto roles follow the current request, medium outside one)"""
+    setting = role_tier_setting(role)
+    if setting != AUTO:
+        return ModelTier(setting)
+    route = get_current_route()
+    return route.tier if route is not None else ModelTier.MEDIUM
+
+# Model construction (replaceable with a stub factory in tests)
+ModelFactoryFn = Callable[[ModelTier, float], Any]
+_model_factory: Optional[ModelFactoryFn] = None
+
+def set_model_factory(factory: Optional[ModelFactoryFn]):
+    """
+    Replace model construction, e.g. with stub models in tests
+
+    Args:
+        factory: Called with (tier, temperature) to create a model backend; None restores the default
+    """
+    global _model_factory
+    _model_factory = factory
+
+def create_tier_model(tier: ModelTier, temperature: float):
+    """Create the model backend of a tier"""
+    if _model_factory is not None:
+        return _model_factory(tier, temperature)
+
+    from camel.configs import MistralConfig
+    from camel.models import ModelFactory
+    from camel.types import ModelPlatformType, ModelType
+
+    if os.getenv("MEDFORCE_MODEL_BACKEND", "").lower() == "stub":
+        return ModelFactory.create(model_platform=ModelPlatformType.MISTRAL, model_type=ModelType.STUB)
+
+    if tier == ModelTier.SMALL:
+        model_type = os.getenv("MEDFORCE_SMALL_MODEL", "mistral-small-latest")
+    else:
+        model_type = os.getenv("MEDFORCE_MEDIUM_MODEL") or ModelType.MISTRAL_MEDIUM_3
+    return ModelFactory.create(
+        model_platform=ModelPlatformType.MISTRAL,
+        model_type=model_type,
+        model_config_dict=MistralConfig(temperature=temperature).as_dict(),
+    )
+
+def create_role_model(role: str, temperature: float):
+    """
+    Create the model of an agent role
+
+    Returns:
+        One model backend for a fixed tier, or the models of every tier (cheapest first)
+        for an auto-routed role; pass the result as the ChatAgent model and call
+        install_router on the agent
+    """
+    if role_tier_setting(role) == AUTO:
+        return [create_tier_model(tier, temperature) for tier in TIER_ORDER]
+    return create_tier_model(ModelTier(role_tier_setting(role)), temperature)
+
+def install_router(agent, role: str):
+    """Make an auto-routed agent pick its model per call from the current request's tier"""
+    agent._routing_role = role
+    if role_tier_setting(role) != AUTO:
+        return
+
+    def tier_router(manager):
+        return manager.models[TIER_ORDER.index(tier_for_role(role))]
+
+    agent.add_model_scheduling_strategy("tier_router", tier_router)
+
+class ClonePreservingMixin:
+    """
+    Mixin for ChatAgent subclasses that keeps clones instances of the subclass.
+
+    ChatAgent.clone builds a plain ChatAgent with a new model manager, and the workforce's
+    agent pool runs those clones rather than the registered worker. The clone keeps the
+    subclass (and its step wrappers), the attributes set by the subclass and the tier router.
+    """
+
+    def clone(self, with_memory: bool = False):
+        # Move the plain clone's state into an instance of the subclass (the mixin bases make
+        # __class__ assignment fail on the layout check)
+        clone = type(self).__new__(type(self))
+        vars(clone).update(vars(super().clone(with_memory=with_memory)))
+        for name, value in vars(self).items():
+            vars(clone).setdefault(name, value)
+        role = getattr(self, "_routing_role", None)
+        if role is not None:
+            install_router(clone, role)
+        return clone
+
+_model_router = ModelRouter()
+
+def get_model_router() -> ModelRouter:
+    """Get the global model router"""
+    return _model_router
@@ -0,0 +1,413 @@
+"""
+Local Drug Monograph Store for the Pharmacy Search Coordinator
+
+This module keeps drug label text (e.g. openFDA drug label dumps) in a local SQLite
+database, so the coordinator can answer common dosage, side effect and interaction
+questions from disk in microseconds before going to web sources.
+
+Usage:
+    python monograph_store.py load drug-label-0001-of-0013.json.zip [--db data/monographs.db]
+    python monograph_store.py lookup ibuprofen --info-type dosage
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# Default database location (override with MEDFORCE_MONOGRAPH_DB)
+DEFAULT_MONOGRAPH_DB = os.getenv(
+    "MEDFORCE_MONOGRAPH_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "monographs.db")
+)
+
+# Label sections answering each information type (keyed by InformationType value)
+INFO_TYPE_SECTIONS = {
+    "dosage": ("dosage_and_administration", "dosage_forms_and_strengths", "overdosage"),
+    "side_effects": ("boxed_warning", "adverse_reactions", "warnings_and_cautions", "warnings"),
+    "interactions": ("drug_interactions", "contraindications", "boxed_warning"),
+    "warnings": ("boxed_warning", "warnings_and_cautions", "warnings", "precautions"),
+    "verification": ("indications_and_usage", "boxed_warning", "contraindications"),
+    "general": ("indications_and_usage", "dosage_and_administration", "warnings"),
+}
+
+LABEL_SECTIONS = tuple(sorted({section for sections in INFO_TYPE_SECTIONS.values() for section in sections}))
+
+# Longest drug name (in words) tried when resolving a query
+_MAX_NAME_WORDS = 4
+
+_WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-']*")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS monographs (
+    set_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    effective_time TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS drug_names (
+    name TEXT NOT NULL,
+    set_id TEXT NOT NULL,
+    generic INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, set_id)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    set_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sections_set_id ON sections (set_id, section);
+"""
+
+# Columns added after the first schema version: (table, column, definition, backfill)
+_MIGRATIONS = (
+    ("monographs", "effective_time", "TEXT NOT NULL DEFAULT ''", None),
+    # Titles are the first generic name, so a name equal to its label's title is generic
+    ("drug_names", "generic", "INTEGER NOT NULL DEFAULT 0",
+     "UPDATE drug_names SET generic = 1 WHERE name = "
+     "(SELECT lower(title) FROM monographs m WHERE m.set_id = drug_names.set_id)"),
+)
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(text, content='sections', content_rowid='id');
+"""
+
+def _words(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+class Monograph(NamedTuple):
+    """Drug monograph to add to the store (plain 4-tuples without the last two fields also work)"""
+    set_id: str
+    names: Sequence[str]                  # every name the label is found under
+    sections: Dict[str, str]              # section name to section text
+    title: Optional[str] = None           # display title (defaults to the first name)
+    generic_names: Sequence[str] = ()     # the names that are generic names
+    effective_time: str = ""              # label version (YYYYMMDD); newer labels win
+
+def _section_text(value: Any) -> str:
+    """openFDA stores each section as a list of paragraphs"""
+    if isinstance(value, list):
+        return "\n".join(str(part).strip() for part in value if part)
+    return str(value).strip() if value else ""
+
+class MonographStore:
+    """
+    SQLite-backed store of drug monograph sections
+
+    Drug names are resolved against an in-memory name table, so a lookup is one indexed
+    query. Free-text search uses SQLite FTS5 when it is compiled in, otherwise LIKE.
+
+    A name found under several labels resolves to one label deterministically: labels
+    where it is the generic name first, then the newest effective time, then set_id.
+    """
+
+    def __init__(self, path: str = DEFAULT_MONOGRAPH_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+            self.full_text = self._create_fts()
+        self._names: Dict[str, List[str]] = {}
+        self._generic_names: Set[str] = set()
+        self._ambiguous_names: Set[str] = set()
+        self._load_names()
+
+    def _migrate(self):
+        for table, column, definition, backfill in _MIGRATIONS:
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                if backfill:
+                    self._conn.execute(backfill)
+
+    def _create_fts(self) -> bool:
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            return True
+        except sqlite3.OperationalError:
+            logger.info("SQLite FTS5 not available, monograph text search will use LIKE")
+            return False
+
+    def _load_names(self):
+        names: Dict[str, List[str]] = {}
+        generic_names: Set[str] = set()
+        drugs: Dict[str, Set[str]] = {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.name, d.set_id, d.generic, lower(m.title) FROM drug_names d "
+                "JOIN monographs m ON m.set_id = d.set_id "
+                "ORDER BY d.name, d.generic DESC, m.effective_time DESC, d.set_id")
+            for name, set_id, generic, drug in rows:
+                names.setdefault(name, []).append(set_id)
+                drugs.setdefault(name, set()).add(drug)
+                if generic:
+                    generic_names.add(name)
+        self._names = names
+        self._generic_names = generic_names
+        # Brand or substance names shared by labels of different drugs (e.g. "pain relief")
+        self._ambiguous_names = {name for name, titles in drugs.items()
+                                 if len(titles) > 1 and name not in generic_names}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM monographs").fetchone()[0]
+
+    def add_monograph(self, set_id: str, names: Iterable[str], sections: Dict[str, str],
+                      title: Optional[str] = None, generic_names: Iterable[str] = (),
+                      effective_time: str = ""):
+        """
+        Add or replace one drug monograph
+
+        Args:
+            set_id: Unique label identifier
+            names: Generic and brand names the monograph is found under
+            sections: Section name to section text
+            title: Display title (defaults to the first name)
+            generic_names: Which of the names are generic names (preferred when resolving)
+            effective_time: Label version, YYYYMMDD (the newest label of a name is used)
+        """
+        self.add_monographs([Monograph(set_id, list(names), sections, title, list(generic_names), effective_time)])
+
+    def add_monographs(self, monographs: Iterable[Sequence[Any]]) -> int:
+        """Add or replace many monographs (Monograph tuples) in one transaction, returning how many were added"""
+        count = 0
+        with self._lock, self._conn:
+            for monograph in monographs:
+                set_id, names, sections, title, generic_names, effective_time = Monograph(*monograph)
+                generic = {" ".join(_words(name)) for name in generic_names if name}
+                given = [" ".join(_words(name)) for name in names if name]
+                names = sorted((set(given) | generic) - {""})
+                sections = {name: text for name, text in sections.items() if text}
+                if not names or not sections:
+                    continue
+                title = title or next((name for name in given if name), names[0]).title()
+                self._delete(set_id)
+                self._conn.execute("INSERT INTO monographs (set_id, title, effective_time) VALUES (?, ?, ?)",
+                                   (set_id, title, effective_time or ""))
+                self._conn.executemany("INSERT INTO drug_names (name, set_id, generic) VALUES (?, ?, ?)",
+                                       [(name, set_id, int(name in generic)) for name in names])
+                for section, text in sections.items():
+                    cursor = self._conn.execute(
+                        "INSERT INTO sections (set_id, section, text) VALUES (?, ?, ?)",
+                        (set_id, section, text))
+                    if self.full_text:
+                        self._conn.execute("INSERT INTO sections_fts (rowid, text) VALUES (?, ?)",
+                                           (cursor.lastrowid, text))
+                count += 1
+        self._load_names()
+        return count
+
+    def _delete(self, set_id: str):
+        if self.full_text:
+            self._conn.execute(
+                "INSERT INTO sections_fts (sections_fts, rowid, text) "
+                "SELECT 'delete', id, text FROM sections WHERE set_id = ?", (set_id,))
+        self._conn.execute("DELETE FROM sections WHERE set_id = ?", (set_id,))
+        self._conn.execute("DELETE FROM drug_names WHERE set_id = ?", (set_id,))
+        self._conn.execute("DELETE FROM monographs WHERE set_id = ?", (set_id,))
+
+    def resolve_drug(self, query: str) -> Optional[str]:
+        """
+        Find the drug a query is about among the known drug names it mentions
+
+        Generic names win over brand names (a brand like "pain relief" must not beat
+        "ibuprofen"), and among those the drug named earliest in the query wins. A query
+        naming only brands of different drugs, or only a brand shared by labels of
+        different drugs, is ambiguous and resolves to None rather than to a guess.
+        """
+        mentions = self._mentions(_words(query))
+        generic = [name for name in mentions if name in self._generic_names]
+        if generic:
+            return generic[0]
+        brands = [name for name in mentions if name not in self._ambiguous_names]
+        if not brands or len(brands) < len(mentions):
+            return None
+        if len({self._names[name][0] for name in brands}) > 1:
+            return None
+        return brands[0]
+
+    def _mentions(self, words: List[str]) -> List[str]:
+        """Known names in a word list, in order, taking the longest name at each position"""
+        mentions = []
+        start = 0
+        while start < len(words):
+            for size in range(min(_MAX_NAME_WORDS, len(words) - start), 0, -1):
+                name = " ".join(words[start:start + size])
+                if name in self._names:
+                    mentions.append(name)
+                    start += size
+                    break
+            else:
+                start += 1
+        return mentions
+
+    def lookup(self, query: str, info_type: str = "general", max_chars: int = 4000) -> str:
+        """
+        Get the label sections answering an information type for the drug named in a query
+        (see resolve_drug; the preferred label of the name, see the class docstring)
+
+        Args:
+            query: Search query mentioning a drug name
+            info_type: InformationType value selecting the label sections
+            max_chars: Maximum length of the returned text
+
+        Returns:
+            Formatted section text, or an empty string if the drug is not in the store
+        """
+        name = self.resolve_drug(query)
+        if name is None:
+            return ""
+
+        sections = INFO_TYPE_SECTIONS.get(info_type, INFO_TYPE_SECTIONS["general"])
+        set_id = self._names[name][0]
+        placeholders = ",".join("?" for _ in sections)
+        with self._lock:
+            rows = dict(self._conn.execute(
+                f"SELECT section, text FROM sections WHERE set_id = ? AND section IN ({placeholders})",
+                (set_id, *sections)).fetchall())
+            title = self._conn.execute("SELECT title FROM monographs WHERE set_id = ?",
+                                       (set_id,)).fetchone()[0]
+
+        parts = [f"Drug label: {title}"]
+        for section in sections:
+            if section in rows:
+                parts.append(f"{section.replace('_', ' ').title()}:\n{rows[section]}")
+        if len(parts) == 1:
+            return ""
+        return "\n\n".join(parts)[:max_chars]
+
+    def search_text(self, terms: str, info_type: Optional[str] = None, limit: int = 5) -> List[Dict[str, str]]:
+        """
+        Free-text search over monograph sections
+
+        Args:
+            terms: Words that must all appear in the section
+            info_type: Restrict to the sections answering this information type
+            limit: Maximum number of sections returned
+
+        Returns:
+            Matching sections as dicts with title, section and text
+        """
+        words = _words(terms)
+        if not words:
+            return []
+
+        sections = INFO_TYPE_SECTIONS.get(info_type) if info_type else None
+        section_filter = ""
+        params: List[Any] = []
+        if self.full_text:
+            match = " AND ".join('"' + word.replace('"', "") + '"' for word in words)
+            sql = ("SELECT m.title, s.section, s.text FROM sections_fts f "
+                   "JOIN sections s ON s.id = f.rowid JOIN monographs m ON m.set_id = s.set_id "
+                   "WHERE sections_fts MATCH ?")
+            params.append(match)
+        else:
+            sql = ("SELECT m.title, s.section, s.text FROM sections s "
+                   "JOIN monographs m ON m.set_id = s.set_id WHERE "
+                   + " AND ".join("s.text LIKE ?" for _ in words))
+            params.extend(f"%{word}%" for word in words)
+        if sections:
+            section_filter = f" AND s.section IN ({','.join('?' for _ in sections)})"
+            params.extend(sections)
+        order = " ORDER BY f.rank" if self.full_text else ""
+
+        with self._lock:
+            rows = self._conn.execute(sql + section_filter + order + " LIMIT ?", (*params, limit)).fetchall()
+        return [{"title": title, "section": section, "text": text} for title, section, text in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics for monitoring"""
+        return {
+            "path": self.path,
+            "monographs": len(self),
+            "drug_names": len(self._names),
+            "full_text_search": self.full_text,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _read_label_dump(path: str) -> Iterator[Dict[str, Any]]:
+    """Read label records from an openFDA JSON dump (optionally zipped)"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.endswith(".json"):
+                    with archive.open(member) as handle:
+                        yield from json.load(handle).get("results", [])
+        return
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    yield from (data.get("results", []) if isinstance(data, dict) else data)
+
+def monograph_from_label(label: Dict[str, Any]) -> Optional[Monograph]:
+    """Convert one openFDA drug label record to a Monograph"""
+    openfda = label.get("openfda", {})
+    generic_names = openfda.get("generic_name", [])
+    names = generic_names + openfda.get("brand_name", []) + openfda.get("substance_name", [])
+    set_id = label.get("set_id") or label.get("id")
+    if not set_id or not names:
+        return None
+    sections = {section: _section_text(label.get(section)) for section in LABEL_SECTIONS}
+    title = (generic_names or names)[0].title()
+    return Monograph(set_id, names, sections, title, generic_names, label.get("effective_time") or "")
+
+def load_openfda_labels(store: MonographStore, paths: Iterable[str]) -> int:
+    """
+    Load openFDA drug label dumps (https://open.fda.gov/data/downloads/) into a store
+
+    Returns:
+        Number of monographs loaded
+    """
+    total = 0
+    for path in paths:
+        monographs = filter(None, (monograph_from_label(label) for label in _read_label_dump(path)))
+        loaded = store.add_monographs(monographs)
+        logger.info(f"Loaded {loaded} monographs from {path}")
+        total += loaded
+    return total
+
+_monograph_store: Optional[MonographStore] = None
+_monograph_store_lock = threading.Lock()
+
+def get_monograph_store(path: str = DEFAULT_MONOGRAPH_DB) -> Optional[MonographStore]:
+    """Get the shared monograph store, or None if no database has been loaded at the path"""
+    global _monograph_store
+    with _monograph_store_lock:
+        if _monograph_store is None and os.path.exists(path):
+            _monograph_store = MonographStore(path)
+        return _monograph_store
+
+def main():
+    parser = argparse.ArgumentParser(description="Local drug monograph store")
+    parser.add_argument("--db", default=DEFAULT_MONOGRAPH_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="Load openFDA drug label JSON dumps")
+    load.add_argument("paths", nargs="+")
+    lookup = commands.add_parser("lookup", help="Look up a drug")
+    lookup.add_argument("query")
+    lookup.add_argument("--info-type", default="general", choices=sorted(INFO_TYPE_SECTIONS))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = MonographStore(args.db)
+    if args.command == "load":
+        print(f"Loaded {load_openfda_labels(store, args.paths)} monographs into {args.db}")
+    else:
+        print(store.lookup(args.query, args.info_type) or f"No monograph found for: {args.query}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
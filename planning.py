@@ -0,0 +1,258 @@
+"""
+Workforce Task Planning Without LLM Round-Trips
+
+This module builds the specialist subtasks of a query directly when the query has the
+structured shape the Streamlit form sends ("Medicine: X, Age: Y, Dosage: Z, Reason: W"),
+so the workforce can skip the task planner and coordinator LLM calls and send each
+subtask straight to its registered specialist.
+
+Free-form queries still need the task planner, but its decomposition only depends on the
+shape of the query, not on the drug, age or doses in it. Plans are cached by query shape
+with those values abstracted into placeholders, and re-filled for later queries of the
+same shape.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from monograph_store import get_monograph_store
+from prompts import FAST_PATH_SUBTASK_TEMPLATES, compact_prompts_enabled
+from query_state import QueryFields, Section, WORKFORCE_SECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Structured query built by QueryFields.to_query(); each field runs up to the next field's
+# label, so values may contain commas ("1,000 mg", "400 mg, twice daily", "warfarin, aspirin")
+STRUCTURED_QUERY_PATTERN = re.compile(
+    r"^\s*Medicine:\s*(?P<medicine>.+?)\s*,\s*Age:\s*(?P<age>\d{1,3})"
+    r"(?:\s*,\s*Dosage:\s*(?P<dosage>.+?))?"
+    r"(?:\s*,\s*Other medications:\s*(?P<co_medications>.+?))?"
+    r"(?:\s*,\s*Reason:\s*(?P<reason>.+?))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Specialist worker of each section
+SECTION_AGENTS = {
+    Section.DOSAGE: "DosageAgent",
+    Section.SAFETY: "SideEffectsAgent",
+    Section.INTERACTIONS: "WebSearchAgent",
+    Section.VERIFICATION: "ValidatorAgent",
+}
+
+# Sections a section's subtask waits for (when they are part of the plan)
+SECTION_PREREQUISITES = {
+    Section.VERIFICATION: (Section.DOSAGE, Section.SAFETY, Section.INTERACTIONS),
+}
+
+def fast_path_enabled() -> bool:
+    """Check if the fast-path planner is enabled (MEDFORCE_FAST_PATH_PLANNER, on by default)"""
+    return os.getenv("MEDFORCE_FAST_PATH_PLANNER", "1").lower() in ("1", "true", "yes", "on")
+
+@dataclass(frozen=True)
+class PlannedSubtask:
+    """Subtask of a fixed plan, assigned to a specialist by name"""
+    section: Section
+    agent_name: str
+    content: str
+    depends_on: Tuple[Section, ...] = ()
+
+def parse_structured_query(user_query: str) -> Optional[QueryFields]:
+    """Parse a query of the structured form shape, or None for free-form queries"""
+    match = STRUCTURED_QUERY_PATTERN.match(user_query or "")
+    if not match:
+        return None
+    return QueryFields(
+        medicine=match.group("medicine"),
+        age=int(match.group("age")),
+        dosage=match.group("dosage") or "",
+        reason=match.group("reason") or "",
+        co_medications=match.group("co_medications") or "",
+    )
+
+def build_fast_path_plan(user_query: str, sections: Optional[Sequence[str]] = None) -> Optional[List[PlannedSubtask]]:
+    """
+    Build the specialist subtasks of a structured query from fixed templates
+
+    Args:
+        user_query: Patient query
+        sections: Section names to limit the plan to (all sections if None)
+
+    Returns:
+        Subtasks in execution order, or None if the query is free-form or the fast path is disabled
+    """
+    if not fast_path_enabled() or parse_structured_query(user_query) is None:
+        return None
+
+    wanted = [Section(name) for name in sections] if sections else list(WORKFORCE_SECTIONS)
+    planned = [section for section in WORKFORCE_SECTIONS if section in wanted]
+    return [
+        PlannedSubtask(
+            section=section,
+            agent_name=SECTION_AGENTS[section],
+            content=FAST_PATH_SUBTASK_TEMPLATES[section.value].format(user_query=user_query.strip()),
+            depends_on=tuple(s for s in SECTION_PREREQUISITES.get(section, ()) if s in planned),
+        )
+        for section in planned
+    ]
+
+# Values abstracted out of free-form queries
+AGE_PATTERN = re.compile(
+    r"\b(\d{1,3})(?=[\s-]*(?:years?|yrs?|y/?o)\b)|(?<=\bage\s)(\d{1,3})\b|(?<=\baged\s)(\d{1,3})\b",
+    re.IGNORECASE,
+)
+DOSE_PATTERN = re.compile(
+    r"\b\d+(?:\.\d+)?\s*(?:mg|mcg|µg|g|ml|iu|units?|tablets?|capsules?)\b",
+    re.IGNORECASE,
+)
+# Drug named after a dosing or safety term, when the monograph store does not know it
+DRUG_CONTEXT_PATTERN = re.compile(
+    r"\b(?:dose|doses|dosage|dosing|side effects?|interactions?|overdose|maximum|max|taking|take|takes)"
+    r"\s+(?:of\s+|for\s+|with\s+)?([a-z][a-z0-9-]{3,})\b",
+    re.IGNORECASE,
+)
+_DRUG_CONTEXT_STOPWORDS = {"with", "this", "that", "these", "those", "your", "their", "medication",
+                           "medicine", "drug", "drugs", "pills", "tablets", "daily", "every", "more", "than"}
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{(?:drug|age|dose\d+)\}")
+
+# Plan cache defaults
+PLAN_CACHE_ENTRIES = 256
+PLAN_CACHE_TTL = 24 * 3600
+
+@dataclass(frozen=True)
+class QueryShape:
+    """Free-form query with its drug, age and dose values replaced by placeholders"""
+    key: str
+    values: Tuple[Tuple[str, str], ...]  # (placeholder, value)
+
+    def templatize(self, text: str) -> str:
+        """Replace this query's values in a plan text with their placeholders"""
+        for placeholder, value in sorted(self.values, key=lambda item: len(item[1]), reverse=True):
+            if placeholder == "{age}":
+                text = AGE_PATTERN.sub(lambda m: placeholder if m.group(0) == value else m.group(0), text)
+            else:
+                text = re.sub(rf"(?<![\w.]){re.escape(value)}(?![\w.])", placeholder, text, flags=re.IGNORECASE)
+        return text
+
+    def is_reusable(self, template: str) -> bool:
+        """
+        Check that a plan template holds none of this query's values, so it can be cached
+
+        The planner may word a value differently from the query ("age: 40", "400mg"),
+        which templatize() does not replace; a template with any of the values or any other
+        number left outside its placeholders would carry them into later queries.
+        """
+        for _, value in self.values:
+            if re.search(rf"(?<![\w.]){re.escape(value)}(?![\w.])", template, re.IGNORECASE):
+                return False
+        return not re.search(r"\d", _PLACEHOLDER_PATTERN.sub("", template))
+
+    def instantiate(self, template: str) -> str:
+        """Fill the placeholders of a plan template with this query's values"""
+        for placeholder, value in self.values:
+            template = template.replace(placeholder, value)
+        return template
+
+def _find_drug(user_query: str) -> Optional[str]:
+    store = get_monograph_store()
+    if store is not None:
+        name = store.resolve_drug(user_query)
+        if name:
+            match = re.search(rf"\b{re.escape(name)}\b", user_query, re.IGNORECASE)
+            return match.group(0) if match else name
+    for match in DRUG_CONTEXT_PATTERN.finditer(user_query):
+        if match.group(1).lower() not in _DRUG_CONTEXT_STOPWORDS:
+            return match.group(1)
+    return None
+
+def query_shape(user_query: str) -> QueryShape:
+    """
+    Abstract the drug, age and dose values out of a free-form query
+
+    Args:
+        user_query: Patient query, e.g. "What is the dose of ibuprofen for a 40 year old?"
+
+    Returns:
+        Shape whose key is e.g. "what is the dose of {drug} for a {age} year old?"
+    """
+    values: List[Tuple[str, str]] = []
+    drug = _find_drug(user_query)
+    if drug:
+        values.append(("{drug}", drug))
+    ages = {m.group(0) for m in AGE_PATTERN.finditer(user_query)}
+    if len(ages) == 1:
+        values.append(("{age}", ages.pop()))
+    doses = list(dict.fromkeys(m.group(0) for m in DOSE_PATTERN.finditer(user_query)))
+    values.extend((f"{{dose{i}}}", dose) for i, dose in enumerate(doses, 1))
+
+    shape = QueryShape(key="", values=tuple(values))
+    key = " ".join(re.sub(r"[\s-]+", " ", shape.templatize(user_query).lower()).split())
+    return QueryShape(key=key, values=shape.values)
+
+def plan_cache_key(shape: QueryShape, sections: Optional[Sequence[str]] = None) -> str:
+    """Cache key of a plan: query shape, requested sections and prompt variant"""
+    scope = ",".join(sections) if sections else "all"
+    variant = "compact" if compact_prompts_enabled() else "full"
+    return f"{shape.key}|{scope}|{variant}"
+
+class PlanCache:
+    """LRU cache of task planner decompositions (subtask content templates) by query shape"""
+
+    def __init__(self, max_entries: int = PLAN_CACHE_ENTRIES, ttl: float = PLAN_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._plans: "OrderedDict[str, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def get(self, key: str) -> Optional[Tuple[str, ...]]:
+        """Get the subtask templates of a cached plan"""
+        with self._lock:
+            entry = self._plans.get(key)
+            if entry is None or time.time() - entry[0] >= self.ttl:
+                self._plans.pop(key, None)
+                self.stats["misses"] += 1
+                return None
+            self._plans.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: str, templates: Sequence[str]):
+        """Store the subtask templates of a plan"""
+        with self._lock:
+            self._plans[key] = (time.time(), tuple(templates))
+            self._plans.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get plan cache statistics for monitoring"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "cached_plans": len(self._plans),
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+                **self.stats,
+            }
+
+_plan_cache: Optional[PlanCache] = None
+_plan_cache_lock = threading.Lock()
+
+def get_plan_cache() -> PlanCache:
+    """Get the process-wide plan cache"""
+    global _plan_cache
+    with _plan_cache_lock:
+        if _plan_cache is None:
+            _plan_cache = PlanCache()
+        return _plan_cache
@@ -0,0 +1,248 @@
+"""
+Opt-in Per-Request Profiling
+
+This module profiles individual analysis requests so rare slow requests can be inspected
+after the fact. Two triggers, both off by default:
+
+- Sampling: a fraction of requests runs under cProfile (deterministic, higher overhead).
+- Slow requests: every request's thread is stack-sampled at a low rate by a background
+  thread, and the samples are kept only if the request exceeds the latency threshold.
+
+Each captured request writes, under the profile directory, <id>.json (query, trigger,
+status, phase timings, search coordinator activity, model tier and the hottest
+functions) plus <id>.prof (cProfile, load with pstats or snakeviz) or <id>.folded
+(collapsed stacks, for flamegraph.pl or speedscope).
+
+Configuration (environment variables):
+    MEDFORCE_PROFILE_SAMPLE_RATE=0.001   fraction of requests run under cProfile
+    MEDFORCE_PROFILE_SLOW_S=30           keep stack samples of requests slower than this
+    MEDFORCE_PROFILE_INTERVAL_MS=10      stack sampling interval
+    MEDFORCE_PROFILE_DIR                 output directory (default data/profiles)
+"""
+
+import cProfile
+import hashlib
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = os.getenv(
+    "MEDFORCE_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles")
+)
+
+# Functions listed in the JSON summary of a profile
+PROFILE_TOP_FUNCTIONS = 25
+
+# One cProfile session at a time (Python 3.12+ allows only one active profiler per process)
+_cprofile_lock = threading.Lock()
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}")
+        return None
+
+class StackSampler:
+    """Background thread counting the stacks of one thread at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float = 0.01):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Samples in collapsed-stack format ("outer;inner count" per line)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def top_functions(self, limit: int = PROFILE_TOP_FUNCTIONS) -> Dict[str, int]:
+        """Innermost frames with the most samples"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return dict(leaves.most_common(limit))
+
+class RequestProfiler:
+    """
+    Profiles sampled or slow analysis requests and writes the captures to a directory
+
+    Args:
+        sample_rate: Fraction of requests run under cProfile (0 disables sampling)
+        slow_threshold: Keep stack samples of requests taking at least this many seconds
+            (None disables slow-request capture)
+        interval: Stack sampling interval in seconds
+        output_dir: Directory the captures are written to
+    """
+
+    def __init__(self, sample_rate: float = 0.0, slow_threshold: Optional[float] = None,
+                 interval: float = 0.01, output_dir: str = DEFAULT_PROFILE_DIR):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self.stats = {"sampled": 0, "slow_captured": 0, "written": 0, "write_errors": 0}
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        interval_ms = _env_float("MEDFORCE_PROFILE_INTERVAL_MS")
+        return cls(
+            sample_rate=_env_float("MEDFORCE_PROFILE_SAMPLE_RATE") or 0.0,
+            slow_threshold=_env_float("MEDFORCE_PROFILE_SLOW_S"),
+            interval=interval_ms / 1000 if interval_ms else 0.01,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.slow_threshold is not None
+
+    def profile(self, user_query: str, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> Dict[str, Any]:
+        """
+        Run one analysis request, profiling it if it is sampled or turns out slow
+
+        Args:
+            user_query: Query of the request (recorded with the capture)
+            fn: Function running the request, returning the structured analysis
+
+        Returns:
+            The analysis returned by fn
+        """
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        # A sampled request that finds another one being profiled is treated as unsampled
+        if self.sample_rate > 0 and random.random() < self.sample_rate and _cprofile_lock.acquire(blocking=False):
+            try:
+                profiler = cProfile.Profile()
+                started = time.perf_counter()
+                profiler.enable()
+                try:
+                    analysis = fn(*args, **kwargs)
+                finally:
+                    profiler.disable()
+            finally:
+                _cprofile_lock.release()
+            self._count("sampled")
+            self._write(user_query, analysis, "sampled", time.perf_counter() - started, profiler=profiler)
+            return analysis
+
+        if self.slow_threshold is None:
+            return fn(*args, **kwargs)
+
+        sampler = StackSampler(threading.get_ident(), self.interval).start()
+        started = time.perf_counter()
+        try:
+            analysis = fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+        if elapsed >= self.slow_threshold:
+            self._count("slow_captured")
+            self._write(user_query, analysis, "slow", elapsed, sampler=sampler)
+        return analysis
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _write(self, user_query: str, analysis: Dict[str, Any], trigger: str, elapsed: float,
+               profiler: Optional[cProfile.Profile] = None, sampler: Optional[StackSampler] = None):
+        capture_id = self._capture_id(user_query)
+        summary = {
+            "id": capture_id,
+            "query": user_query,
+            "trigger": trigger,
+            "captured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_s": round(elapsed, 3),
+            "status": analysis.get("status"),
+            "model_tier": analysis.get("model_tier"),
+            "timings": analysis.get("timings"),
+            "search_activity": analysis.get("search_activity"),
+        }
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, capture_id)
+            if profiler is not None:
+                profiler.dump_stats(base + ".prof")
+                summary["top_functions"] = self._cprofile_top(profiler)
+            if sampler is not None:
+                with open(base + ".folded", "w", encoding="utf-8") as f:
+                    f.write(sampler.folded())
+                summary["samples"] = sum(sampler.stacks.values())
+                summary["sample_interval_s"] = sampler.interval
+                summary["top_functions"] = sampler.top_functions()
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            self._count("written")
+            logger.info(f"Profile of {trigger} request written to {base}.json ({elapsed:.1f}s)")
+        except (OSError, TypeError, ValueError) as e:
+            # Profiling must never break a request
+            logger.warning(f"Request profile not written: {e}")
+            self._count("write_errors")
+
+    @staticmethod
+    def _capture_id(user_query: str) -> str:
+        digest = hashlib.sha1(f"{user_query}|{time.time_ns()}".encode("utf-8")).hexdigest()[:10]
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{digest}"
+
+    @staticmethod
+    def _cprofile_top(profiler: cProfile.Profile, limit: int = PROFILE_TOP_FUNCTIONS) -> str:
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get profiling configuration and capture counts for monitoring"""
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "slow_threshold_s": self.slow_threshold,
+                "output_dir": self.output_dir if self.enabled else None,
+                **self.stats,
+            }
+
+_request_profiler: Optional[RequestProfiler] = None
+_request_profiler_lock = threading.Lock()
+
+def get_request_profiler() -> RequestProfiler:
+    """Get the process-wide request profiler (configured from the environment)"""
+    global _request_profiler
+    with _request_profiler_lock:
+        if _request_profiler is None:
+            _request_profiler = RequestProfiler.from_env()
+        return _request_profiler
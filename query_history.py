@@ -0,0 +1,393 @@
+"""
+Persistent Query History for Capacity Planning and Cache Warming
+
+This module appends one row per analysis to an SQLite database (WAL mode, so readers
+never block the writer): the query and its medication, status, model tier, phase
+timings, search coordinator activity (local and cache hits, web searches, sources used)
+and a hash of the result. Rows are written by a background thread, off the request path;
+if the writer falls behind, new rows are dropped rather than slowing requests down.
+
+Rows are indexed by medication and time, for questions such as "which medications were
+asked about most this week" (cache warming) and "what was the p95 latency yesterday"
+(capacity planning).
+
+Queries hold patient details, so the history is off unless enabled, the query text itself
+is only stored when asked for, and rows older than the retention period are deleted.
+
+Configuration (environment variables):
+    MEDFORCE_QUERY_HISTORY=1                 enable the history (off by default)
+    MEDFORCE_QUERY_HISTORY_DB                database path (default data/query_history.db)
+    MEDFORCE_QUERY_HISTORY_RETENTION_DAYS    days rows are kept (default 30)
+    MEDFORCE_QUERY_HISTORY_STORE_QUERIES=1   store the query text (only the medication by default)
+
+Usage:
+    python query_history.py recent --medication ibuprofen --since 24h
+    python query_history.py top --since 7d
+    python query_history.py summary --since 24h
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from planning import parse_structured_query, query_shape
+
+logger = logging.getLogger(__name__)
+
+# Default database location (override with MEDFORCE_QUERY_HISTORY_DB)
+DEFAULT_HISTORY_DB = os.getenv(
+    "MEDFORCE_QUERY_HISTORY_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "query_history.db")
+)
+
+# Rows waiting for the writer thread before new rows are dropped
+HISTORY_QUEUE_SIZE = 1000
+# Rows written per transaction
+HISTORY_BATCH_SIZE = 100
+# Days rows are kept (override with MEDFORCE_QUERY_HISTORY_RETENTION_DAYS)
+DEFAULT_RETENTION_DAYS = float(os.getenv("MEDFORCE_QUERY_HISTORY_RETENTION_DAYS", "30"))
+# Seconds between deletions of expired rows
+PRUNE_INTERVAL_S = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_history (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    query TEXT NOT NULL,
+    medication TEXT,
+    status TEXT NOT NULL,
+    model_tier TEXT,
+    elapsed_s REAL,
+    timings TEXT,
+    local_hits INTEGER NOT NULL DEFAULT 0,
+    cache_hits INTEGER NOT NULL DEFAULT 0,
+    web_searches INTEGER NOT NULL DEFAULT 0,
+    failed_searches INTEGER NOT NULL DEFAULT 0,
+    sources TEXT,
+    result_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_query_history_medication_ts ON query_history (medication, ts);
+CREATE INDEX IF NOT EXISTS idx_query_history_ts ON query_history (ts);
+"""
+
+_COLUMNS = ("ts", "query", "medication", "status", "model_tier", "elapsed_s", "timings",
+            "local_hits", "cache_hits", "web_searches", "failed_searches", "sources", "result_hash")
+
+_DURATION_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhd])\s*$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def query_medication(user_query: str) -> Optional[str]:
+    """Medication a query is about (lower case), from the form fields or the free-form text"""
+    fields = parse_structured_query(user_query)
+    if fields is not None:
+        return fields.medicine.strip().lower()
+    drug = dict(query_shape(user_query).values).get("{drug}")
+    return drug.lower() if drug else None
+
+def result_hash(analysis: Dict[str, Any]) -> Optional[str]:
+    """Hash of the specialist findings of an analysis (the response if it has no subtask results)"""
+    results = [subtask.get("result") or "" for subtask in analysis.get("subtasks") or []]
+    text = "\n".join(results) if any(results) else analysis.get("response") or ""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32] if text else None
+
+def history_row(analysis: Dict[str, Any], timestamp: Optional[float] = None, store_query: bool = True) -> Tuple:
+    """Build the history row of a structured analysis (see run_pharmacy_query_structured)"""
+    activity = analysis.get("search_activity") or {}
+    return (
+        timestamp if timestamp is not None else time.time(),
+        analysis.get("query", "") if store_query else "",
+        query_medication(analysis.get("query", "")),
+        analysis.get("status", "unknown"),
+        analysis.get("model_tier"),
+        analysis.get("elapsed_s"),
+        json.dumps(analysis.get("timings") or {}),
+        activity.get("local_hits", 0),
+        activity.get("cache_hits", 0),
+        activity.get("web_searches", 0),
+        activity.get("failed", 0),
+        json.dumps(activity.get("sources") or {}),
+        result_hash(analysis),
+    )
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    """Convert a relative duration ("30m", "24h", "7d") or a Unix timestamp to a Unix timestamp"""
+    if value is None:
+        return None
+    match = _DURATION_PATTERN.match(value)
+    if match:
+        return time.time() - float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    return float(value)
+
+def _percentile(ordered: List[float], percentile: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))], 3)
+
+class QueryHistoryStore:
+    """
+    Append-only SQLite history of analyses with an asynchronous writer
+
+    record() only queues the row; a daemon thread writes queued rows in batches on its
+    own connection. Queries read through a separate connection, which WAL mode lets run
+    alongside the writer. The writer also deletes rows older than the retention period,
+    at startup and then at most every PRUNE_INTERVAL_S (retention_days=None keeps them).
+    The query text is left out of the rows unless store_queries (default from
+    MEDFORCE_QUERY_HISTORY_STORE_QUERIES) is set; the medication is always stored.
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_DB, retention_days: Optional[float] = DEFAULT_RETENTION_DAYS,
+                 store_queries: Optional[bool] = None):
+        self.path = path
+        self.retention_days = retention_days
+        self.store_queries = store_queries_enabled() if store_queries is None else store_queries
+        self._last_prune = 0.0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect()
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+        # (timestamp, analysis) pairs; rows are built on the writer thread
+        self._rows: "queue.Queue[Optional[Tuple[float, Dict[str, Any]]]]" = queue.Queue(maxsize=HISTORY_QUEUE_SIZE)
+        self.stats = {"written": 0, "dropped": 0, "write_errors": 0, "expired": 0}
+        self._writer = threading.Thread(target=self._write_rows, name="query-history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0)
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, analysis: Dict[str, Any]):
+        """Queue a structured analysis for writing (never blocks; dropped if the writer is behind)"""
+        try:
+            self._rows.put_nowait((time.time(), analysis))
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _write_rows(self):
+        # In-memory databases are per connection, so they share the reader's connection (and lock)
+        conn = self._conn if self.path == ":memory:" else self._connect()
+        lock = self._lock if conn is self._conn else threading.Lock()
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        sql = f"INSERT INTO query_history ({', '.join(_COLUMNS)}) VALUES ({placeholders})"
+        self._prune_expired(conn, lock)
+        while True:
+            batch = [self._rows.get()]
+            while len(batch) < HISTORY_BATCH_SIZE:
+                try:
+                    batch.append(self._rows.get_nowait())
+                except queue.Empty:
+                    break
+            rows = []
+            for item in batch:
+                if item is None:
+                    continue
+                try:
+                    rows.append(history_row(item[1], timestamp=item[0], store_query=self.store_queries))
+                except Exception as e:
+                    logger.warning(f"Query history row dropped: {e}")
+                    self.stats["dropped"] += 1
+            try:
+                if rows:
+                    with lock, conn:
+                        conn.executemany(sql, rows)
+                    self.stats["written"] += len(rows)
+            except sqlite3.Error as e:
+                logger.error(f"Query history write failed: {e}")
+                self.stats["write_errors"] += len(rows)
+            finally:
+                if time.monotonic() - self._last_prune >= PRUNE_INTERVAL_S:
+                    self._prune_expired(conn, lock)
+                for _ in batch:
+                    self._rows.task_done()
+            if None in batch:
+                if conn is not self._conn:
+                    conn.close()
+                return
+
+    def _prune_expired(self, conn: sqlite3.Connection, lock: threading.Lock):
+        """Delete the rows older than the retention period"""
+        self._last_prune = time.monotonic()
+        if self.retention_days is None:
+            return
+        try:
+            with lock, conn:
+                deleted = conn.execute("DELETE FROM query_history WHERE ts < ?",
+                                       (time.time() - self.retention_days * 86400,)).rowcount
+            self.stats["expired"] += deleted
+        except sqlite3.Error as e:
+            logger.error(f"Query history retention failed: {e}")
+
+    def flush(self):
+        """Wait until every queued row is written"""
+        self._rows.join()
+
+    def find(self, medication: Optional[str] = None, since: Optional[float] = None,
+             until: Optional[float] = None, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get recorded analyses, newest first
+
+        Args:
+            medication: Only analyses of this medication (case-insensitive)
+            since: Only analyses at or after this Unix timestamp
+            until: Only analyses before this Unix timestamp
+            status: Only analyses with this status
+            limit: Maximum number of rows
+        """
+        where, params = self._filters(medication, since, until)
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM query_history"
+        sql += (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY ts DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit)).fetchall()
+        records = []
+        for row in rows:
+            record = dict(zip(_COLUMNS, row))
+            record["timings"] = json.loads(record["timings"] or "{}")
+            record["sources"] = json.loads(record["sources"] or "{}")
+            records.append(record)
+        return records
+
+    def top_medications(self, since: Optional[float] = None, until: Optional[float] = None,
+                        limit: int = 20) -> List[Tuple[str, int]]:
+        """Most asked-about medications in a time range (candidates for cache warming)"""
+        where, params = self._filters(None, since, until)
+        where.append("medication IS NOT NULL")
+        sql = ("SELECT medication, COUNT(*) AS n FROM query_history WHERE " + " AND ".join(where)
+               + " GROUP BY medication ORDER BY n DESC LIMIT ?")
+        with self._lock:
+            return [(medication, count) for medication, count in self._conn.execute(sql, (*params, limit))]
+
+    def summary(self, medication: Optional[str] = None, since: Optional[float] = None,
+                until: Optional[float] = None) -> Dict[str, Any]:
+        """Request volume, latency percentiles and search activity in a time range"""
+        where, params = self._filters(medication, since, until)
+        clause = " WHERE " + " AND ".join(where) if where else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, status, elapsed_s, local_hits, cache_hits, web_searches, failed_searches "
+                "FROM query_history" + clause, params
+            ).fetchall()
+        if not rows:
+            return {"requests": 0}
+
+        statuses: Dict[str, int] = {}
+        for row in rows:
+            statuses[row[1]] = statuses.get(row[1], 0) + 1
+        latencies = sorted(row[2] for row in rows if row[2] is not None and row[1] != "shed")
+        span = max(row[0] for row in rows) - min(row[0] for row in rows)
+        lookups = sum(row[3] + row[4] + row[5] for row in rows)
+        return {
+            "requests": len(rows),
+            "statuses": statuses,
+            "requests_per_hour": round(len(rows) / (span / 3600), 2) if span >= 60 else None,
+            "mean_latency_s": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p50_latency_s": _percentile(latencies, 50),
+            "p95_latency_s": _percentile(latencies, 95),
+            "p99_latency_s": _percentile(latencies, 99),
+            "local_hits": sum(row[3] for row in rows),
+            "cache_hits": sum(row[4] for row in rows),
+            "web_searches": sum(row[5] for row in rows),
+            "failed_searches": sum(row[6] for row in rows),
+            "cache_hit_rate": round((sum(row[3] + row[4] for row in rows)) / lookups, 3) if lookups else None,
+        }
+
+    @staticmethod
+    def _filters(medication: Optional[str], since: Optional[float], until: Optional[float]) -> Tuple[List[str], List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        if medication is not None:
+            where.append("medication = ?")
+            params.append(medication.strip().lower())
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            params.append(until)
+        return where, params
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics for monitoring"""
+        return {"path": self.path, "pending": self._rows.qsize(), "retention_days": self.retention_days,
+                "store_queries": self.store_queries, **self.stats}
+
+    def close(self):
+        """Write the queued rows and close the database"""
+        self._rows.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+def history_enabled() -> bool:
+    """Check if the query history is enabled (MEDFORCE_QUERY_HISTORY, off by default)"""
+    return os.getenv("MEDFORCE_QUERY_HISTORY", "0").lower() in ("1", "true", "yes", "on")
+
+def store_queries_enabled() -> bool:
+    """Check if the query text is stored with each row (MEDFORCE_QUERY_HISTORY_STORE_QUERIES, off by default)"""
+    return os.getenv("MEDFORCE_QUERY_HISTORY_STORE_QUERIES", "0").lower() in ("1", "true", "yes", "on")
+
+_query_history: Optional[QueryHistoryStore] = None
+_query_history_lock = threading.Lock()
+
+def get_query_history(path: str = DEFAULT_HISTORY_DB) -> Optional[QueryHistoryStore]:
+    """Get the shared query history store, or None if the history is disabled or unavailable"""
+    global _query_history
+    if not history_enabled():
+        return None
+    with _query_history_lock:
+        if _query_history is None:
+            try:
+                _query_history = QueryHistoryStore(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Query history unavailable at {path}: {e}")
+                return None
+        return _query_history
+
+def main():
+    parser = argparse.ArgumentParser(description="Pharmacy query history")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("recent", "List recent analyses"),
+                            ("top", "Most asked-about medications"),
+                            ("summary", "Volume, latency and search activity")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--since", help='Relative ("24h", "7d") or Unix timestamp')
+        command.add_argument("--until", help='Relative ("1h") or Unix timestamp')
+        if name != "top":
+            command.add_argument("--medication")
+        if name != "summary":
+            command.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    store = QueryHistoryStore(args.db)
+    since, until = parse_since(args.since), parse_since(args.until)
+    if args.command == "recent":
+        for record in store.find(args.medication, since, until, limit=args.limit):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["ts"]))
+            print(f"{stamp}  {record['status']:<11} {record['elapsed_s'] or 0:>7.2f}s  "
+                  f"cache {record['local_hits'] + record['cache_hits']}/web {record['web_searches']}  "
+                  f"{record['query'] or record['medication'] or '-'}")
+    elif args.command == "top":
+        for medication, count in store.top_medications(since, until, args.limit):
+            print(f"{count:>6}  {medication}")
+    else:
+        print(json.dumps(store.summary(args.medication, since, until), indent=2))
+    store.close()
+
+if __name__ == "__main__":
+    main()
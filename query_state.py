@@ -0,0 +1,150 @@
+"""
+Query State and Section Dependencies for Incremental Re-analysis
+
+This module records which form fields each analysis section depends on, so that a
+resubmitted query only re-runs the workforce sections its changed fields affect and
+re-uses the rest of the previous analysis. The dosage field only feeds the local dosage
+comparison (check_dosage_safety), so changing it alone re-runs no specialist at all.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Section(Enum):
+    """Analysis sections (values match the response section keys used by the UI)"""
+    DOSAGE = "dosage_analysis"
+    SAFETY = "safety_assessment"
+    INTERACTIONS = "drug_interactions"
+    VERIFICATION = "verification"
+
+WORKFORCE_SECTIONS = tuple(Section)
+
+# Form fields each workforce section depends on
+SECTION_DEPENDENCIES: Dict[Section, FrozenSet[str]] = {
+    Section.DOSAGE: frozenset({"medicine", "age", "reason"}),
+    Section.SAFETY: frozenset({"medicine", "age"}),
+    Section.INTERACTIONS: frozenset({"medicine", "reason", "co_medications"}),
+    Section.VERIFICATION: frozenset({"medicine", "age", "reason", "co_medications"}),  # checks all of the above
+}
+
+# Keywords identifying the section a workforce subtask covers, checked in this order
+# (verification subtasks also mention dosage and safety, so they are matched first)
+SUBTASK_KEYWORDS = (
+    (Section.VERIFICATION, ("verif", "validat", "cross-check", "fact-check")),
+    (Section.INTERACTIONS, ("interaction", "regulatory", "fda alert", "recall")),
+    (Section.SAFETY, ("side effect", "safety", "adverse", "contraindication")),
+    (Section.DOSAGE, ("dosage", "dosing", "dose")),
+)
+
+@dataclass(frozen=True)
+class QueryFields:
+    """Form fields of a pharmacy query"""
+    medicine: str
+    age: int
+    dosage: str = ""
+    reason: str = ""
+    co_medications: str = ""  # other medications the patient takes, comma-separated
+
+    def to_query(self) -> str:
+        """Build the workforce query string"""
+        query = f"Medicine: {self.medicine}, Age: {self.age}"
+        if self.dosage:
+            query += f", Dosage: {self.dosage}"
+        if self.co_medications:
+            query += f", Other medications: {self.co_medications}"
+        if self.reason:
+            query += f", Reason: {self.reason}"
+        return query
+
+    def co_medication_list(self) -> List[str]:
+        """Other medications the patient takes, one name each"""
+        return [name.strip() for name in re.split(r"[,;]", self.co_medications) if name.strip()]
+
+    def changed_fields(self, other: "QueryFields") -> FrozenSet[str]:
+        """Names of the fields that differ from another query"""
+        return frozenset(name for name in ("medicine", "age", "dosage", "reason", "co_medications")
+                         if getattr(self, name) != getattr(other, name))
+
+def affected_sections(changed_fields: Iterable[str]) -> List[Section]:
+    """Workforce sections that depend on any of the changed fields, in section order"""
+    changed = set(changed_fields)
+    return [section for section in WORKFORCE_SECTIONS if SECTION_DEPENDENCIES[section] & changed]
+
+def classify_subtask(content: str) -> Optional[Section]:
+    """Section covered by a workforce subtask, from its description"""
+    text = (content or "").lower()
+    for section, keywords in SUBTASK_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return section
+    return None
+
+def sections_from_analysis(analysis: Dict[str, Any]) -> Dict[Section, str]:
+    """
+    Collect section texts from the subtasks of a structured analysis
+
+    Args:
+        analysis: Result of run_pharmacy_query_structured
+
+    Returns:
+        Completed subtask results by section (subtasks of one section are joined)
+    """
+    sections: Dict[Section, List[str]] = {}
+    for subtask in analysis.get("subtasks") or []:
+        if subtask.get("state") != "DONE" or not subtask.get("result"):
+            continue
+        section = classify_subtask(subtask.get("content", ""))
+        if section is None:
+            logger.debug(f"Unclassified subtask {subtask.get('id')}: {subtask.get('content', '')[:80]}")
+            continue
+        sections.setdefault(section, []).append(subtask["result"].strip())
+    return {section: "\n\n".join(texts) for section, texts in sections.items()}
+
+@dataclass
+class QueryState:
+    """Fields, section texts and raw response of the latest analysis of a query"""
+    fields: QueryFields
+    response: str
+    sections: Dict[Section, str] = field(default_factory=dict)
+    status: str = "completed"
+
+    @classmethod
+    def from_analysis(cls, fields: QueryFields, analysis: Dict[str, Any]) -> "QueryState":
+        return cls(fields, analysis["response"], sections_from_analysis(analysis), analysis["status"])
+
+    def sections_to_refresh(self, fields: QueryFields) -> List[Section]:
+        """
+        Workforce sections to re-run for a resubmitted query
+
+        Sections the previous analysis did not produce are re-run too; a different
+        medicine re-runs everything.
+        """
+        refresh = affected_sections(self.fields.changed_fields(fields))
+        missing = [section for section in WORKFORCE_SECTIONS if section not in self.sections]
+        return [section for section in WORKFORCE_SECTIONS if section in refresh or section in missing]
+
+    def with_fields(self, fields: QueryFields) -> "QueryState":
+        """Re-use this analysis unchanged for fields that affect no workforce section"""
+        return replace(self, fields=fields, sections=dict(self.sections))
+
+    def merge(self, fields: QueryFields, analysis: Dict[str, Any], refreshed: Iterable[Section]) -> "QueryState":
+        """
+        Combine a partial re-analysis with the sections of this one
+
+        Args:
+            fields: Fields of the new query
+            analysis: Structured analysis of the refreshed sections
+            refreshed: Sections the analysis was asked to produce
+
+        Returns:
+            New state with the refreshed sections replaced and the others re-used
+        """
+        sections = dict(self.sections)
+        for section in refreshed:
+            sections.pop(section, None)
+        sections.update(sections_from_analysis(analysis))
+        return QueryState(fields, analysis["response"], sections, analysis["status"])
@@ -0,0 +1,310 @@
+"""
+Request Scheduling for Pharmacy Analysis Requests
+
+This module admits analysis requests through a bounded priority queue in front of a fixed
+number of concurrent runs, so bursts queue up (urgent requests first) instead of each
+request starting its own workforce at once, and requests beyond the queue limit are shed
+immediately with a fallback answer instead of timing out.
+
+Identical requests arriving while one is already queued or running are coalesced onto
+that request (SingleFlight), so a burst of the same query runs the workforce once.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Defaults (override with environment variables)
+DEFAULT_MAX_CONCURRENT = int(os.getenv("MEDFORCE_MAX_CONCURRENT_QUERIES", "4"))
+DEFAULT_MAX_QUEUED = int(os.getenv("MEDFORCE_MAX_QUEUED_QUERIES", "16"))
+DEFAULT_MAX_QUEUE_WAIT = float(os.getenv("MEDFORCE_MAX_QUEUE_WAIT_S", "30"))
+
+class Priority(IntEnum):
+    """Request priority (lower runs first)"""
+    URGENT = 0   # Flagged urgent by a pharmacist
+    NORMAL = 1
+    BATCH = 2    # Background and bulk analyses
+
+class RequestShed(Exception):
+    """Raised for shed requests that have no fallback"""
+
+@dataclass(order=True)
+class _QueuedRequest:
+    priority: int
+    sequence: int
+    fn: Callable = field(compare=False)
+    args: tuple = field(compare=False)
+    kwargs: dict = field(compare=False)
+    fallback: Optional[Callable[[], Any]] = field(compare=False)
+    future: Future = field(compare=False)
+    deadline: Optional[Deadline] = field(compare=False, default=None)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+class RequestScheduler:
+    """
+    Bounded-concurrency priority scheduler with load shedding
+
+    At most max_concurrent requests run at once; up to max_queued wait in priority order
+    (FIFO within a priority). When the queue is full, a new request displaces the newest
+    queued request of lower priority, or is shed itself if there is none. Requests that
+    waited longer than max_queue_wait, or whose deadline ran out while they were queued,
+    are shed when they reach the front of the queue.
+    Shed requests complete immediately with their fallback result.
+    """
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 max_queued: int = DEFAULT_MAX_QUEUED,
+                 max_queue_wait: Optional[float] = DEFAULT_MAX_QUEUE_WAIT,
+                 name: str = "analysis"):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_queue_wait = max_queue_wait
+        self.name = name
+
+        self._queue: List[_QueuedRequest] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._running = 0
+        self._closed = False
+        self._queue_waits: Deque[float] = deque(maxlen=200)
+        self.stats = {"admitted": 0, "completed": 0, "shed_queue_full": 0,
+                      "shed_displaced": 0, "shed_wait_timeout": 0, "shed_deadline": 0}
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"{name}-scheduler-{i}", daemon=True)
+            for i in range(max_concurrent)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, fn: Callable, *args, priority: Priority = Priority.NORMAL,
+               fallback: Optional[Callable[[], Any]] = None, deadline: Optional[Deadline] = None,
+               **kwargs) -> Future:
+        """
+        Queue a request
+
+        Args:
+            fn: Function running the request
+            priority: Request priority
+            fallback: Called for the result if the request is shed (RequestShed is raised without one)
+            deadline: Request deadline, created at submission so the queue wait is charged to it
+
+        Returns:
+            Future of the request result
+        """
+        future: Future = Future()
+        request = _QueuedRequest(int(priority), next(self._sequence), fn, args, kwargs, fallback, future, deadline)
+        shed = None
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} scheduler is shut down")
+            if len(self._queue) >= self.max_queued:
+                displaced = max(self._queue)  # lowest priority, newest
+                if displaced.priority > request.priority:
+                    self._queue.remove(displaced)
+                    heapq.heapify(self._queue)
+                    self.stats["shed_displaced"] += 1
+                    shed = (displaced, "displaced by a higher priority request")
+                else:
+                    self.stats["shed_queue_full"] += 1
+                    shed = (request, "queue full")
+            if shed is None or shed[0] is not request:
+                heapq.heappush(self._queue, request)
+                self.stats["admitted"] += 1
+                self._condition.notify()
+
+        if shed is not None:
+            self._shed(*shed)
+        return future
+
+    def run(self, fn: Callable, *args, priority: Priority = Priority.NORMAL,
+            fallback: Optional[Callable[[], Any]] = None, deadline: Optional[Deadline] = None,
+            **kwargs) -> Any:
+        """Queue a request and wait for its result"""
+        return self.submit(fn, *args, priority=priority, fallback=fallback, deadline=deadline, **kwargs).result()
+
+    def _shed(self, request: _QueuedRequest, reason: str):
+        logger.warning(f"Shedding {self.name} request ({Priority(request.priority).name}): {reason}")
+        if request.fallback is None:
+            request.future.set_exception(RequestShed(reason))
+            return
+        try:
+            request.future.set_result(request.fallback())
+        except Exception as e:
+            request.future.set_exception(e)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._queue:
+                    return
+                request = heapq.heappop(self._queue)
+                waited = time.monotonic() - request.enqueued_at
+                self._queue_waits.append(waited)
+                shed = None
+                if self.max_queue_wait is not None and waited > self.max_queue_wait:
+                    self.stats["shed_wait_timeout"] += 1
+                    shed = f"waited {waited:.1f}s in queue"
+                elif request.deadline is not None and request.deadline.expired():
+                    self.stats["shed_deadline"] += 1
+                    shed = f"deadline ran out after {waited:.1f}s in queue"
+                else:
+                    self._running += 1
+
+            if shed is not None:
+                self._shed(request, shed)
+                continue
+            if not request.future.set_running_or_notify_cancel():
+                with self._condition:
+                    self._running -= 1
+                continue
+
+            try:
+                request.future.set_result(request.fn(*request.args, **request.kwargs))
+            except BaseException as e:
+                request.future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self.stats["completed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue and shedding statistics for monitoring"""
+        with self._condition:
+            waits = sorted(self._queue_waits)
+            queued_by_priority = {priority.name.lower(): 0 for priority in Priority}
+            for request in self._queue:
+                queued_by_priority[Priority(request.priority).name.lower()] += 1
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued,
+                "running": self._running,
+                "queued": len(self._queue),
+                "queued_by_priority": queued_by_priority,
+                "mean_queue_wait_s": round(sum(waits) / len(waits), 3) if waits else None,
+                "p95_queue_wait_s": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else None,
+                **self.stats,
+            }
+
+    def shutdown(self):
+        """Stop accepting requests and shed everything still queued"""
+        with self._condition:
+            self._closed = True
+            queued, self._queue = self._queue, []
+            self._condition.notify_all()
+        for request in queued:
+            self._shed(request, "scheduler shut down")
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for coalescing (case, whitespace and trailing punctuation)"""
+    return " ".join((query or "").lower().split()).rstrip(" ?.!")
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests onto one in-flight run
+
+    The first request for a key starts the run; requests for the same key arriving before
+    it completes share its future instead of starting their own. A request of higher
+    priority than the in-flight run starts a new run (and later requests join that one),
+    so urgent requests never wait behind a queued batch request. Completed runs are
+    forgotten at once: results are not cached, only shared by overlapping requests.
+    """
+
+    def __init__(self, name: str = "analysis"):
+        self.name = name
+        self._flights: Dict[Hashable, Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"runs": 0, "coalesced": 0}
+
+    def submit(self, key: Hashable, start: Callable[[], Future],
+               priority: Priority = Priority.NORMAL) -> Tuple[Future, bool]:
+        """
+        Join the in-flight run of a key, or start one
+
+        Args:
+            key: Request identity, e.g. the normalized query with its options
+            start: Starts the run and returns its future (called only for a new run)
+            priority: Request priority
+
+        Returns:
+            (future of the shared result, True if this request started the run); the
+            result object is shared by every coalesced request and must not be modified
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight[0] <= priority:
+                self.stats["coalesced"] += 1
+                return flight[1], False
+            shared: Future = Future()
+            self._flights[key] = (int(priority), shared)
+            self.stats["runs"] += 1
+
+        try:
+            run = start()
+        except BaseException as e:
+            self._forget(key, shared)
+            shared.set_exception(e)
+            return shared, True
+        run.add_done_callback(lambda done: self._complete(key, shared, done))
+        return shared, True
+
+    def run(self, key: Hashable, start: Callable[[], Future], priority: Priority = Priority.NORMAL) -> Any:
+        """Join or start the run of a key and wait for its result"""
+        return self.submit(key, start, priority)[0].result()
+
+    def _forget(self, key: Hashable, shared: Future):
+        with self._lock:
+            if self._flights.get(key, (None, None))[1] is shared:
+                del self._flights[key]
+
+    def _complete(self, key: Hashable, shared: Future, done: Future):
+        # Forget the run first, so requests arriving after it completes start a fresh one
+        self._forget(key, shared)
+        if done.cancelled():
+            shared.cancel()
+        elif done.exception() is not None:
+            shared.set_exception(done.exception())
+        else:
+            shared.set_result(done.result())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics for monitoring"""
+        with self._lock:
+            requests = self.stats["runs"] + self.stats["coalesced"]
+            return {
+                "in_flight": len(self._flights),
+                "coalesced_rate": round(self.stats["coalesced"] / requests, 3) if requests else None,
+                **self.stats,
+            }
+
+_request_scheduler: Optional[RequestScheduler] = None
+_request_scheduler_lock = threading.Lock()
+
+def get_request_scheduler() -> RequestScheduler:
+    """Get the process-wide analysis request scheduler"""
+    global _request_scheduler
+    with _request_scheduler_lock:
+        if _request_scheduler is None:
+            _request_scheduler = RequestScheduler()
+        return _request_scheduler
+
+_single_flight = SingleFlight()
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide coalescer of analysis requests"""
+    return _single_flight
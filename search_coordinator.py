@@ -5,19 +5,80 @@ This module provides intelligent search coordination to eliminate redundant API
 and ensure efficient information gathering across all specialist agents.
 """
 
+import contextvars
+import functools
 import hashlib
+import random
+from array import array
+import sys
+import threading
 import time
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, MutableMapping, NamedTuple, Optional, Tuple, Any, Union
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from enum import Enum
 import logging
+from deadline import Deadline, get_current_deadline
+from content_store import ContentBlob, ContentStore, content_digest, get_content_store
+from keyword_classifier import medical_line_classifier
+from memory_accounting import deep_sizeof
+from monograph_store import MonographStore, get_monograph_store
+from scheduler import DEFAULT_MAX_CONCURRENT
+from search_index import InvertedIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Agents of one request that search at the same time (one source search each at a time)
+SEARCHING_AGENTS = 4
+
+# Error message for source searches skipped because the request ran out of time
+DEADLINE_SKIPPED_MESSAGE = "Skipped: request deadline exceeded"
+
+# Threads running the agents' own search tool calls, so a call can be abandoned at the deadline
+_tool_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="search-tool")
+
+def deadline_bounded_tool(tool):
+    """
+    Wrap an agent's search tool so its calls honour the current request deadline
+
+    Calls made once the deadline has passed return DEADLINE_SKIPPED_MESSAGE without
+    searching, and calls still running at the deadline are abandoned with that message.
+    Outside a request the tool runs unchanged.
+
+    Args:
+        tool: CAMEL FunctionTool
+
+    Returns:
+        FunctionTool with the same schema
+    """
+    from camel.toolkits import FunctionTool
+
+    func = tool.func
+
+    @functools.wraps(func)
+    def bounded(*args, **kwargs):
+        deadline = get_current_deadline()
+        if deadline is None:
+            return func(*args, **kwargs)
+        if deadline.expired():
+            return DEADLINE_SKIPPED_MESSAGE
+        call = _tool_executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+        done, _ = wait([call], timeout=deadline.remaining())
+        if not done:
+            logger.warning(f"Abandoning {func.__name__} call: request deadline exceeded")
+            return DEADLINE_SKIPPED_MESSAGE
+        return call.result()
+
+    return FunctionTool(bounded, openai_tool_schema=tool.get_openai_tool_schema())
+
 class SourcePriority(Enum):
     """Priority levels for medical information sources"""
+    LOCAL = 0        # Bundled drug label monographs (offline)
     PRIMARY = 1      # FDA, MedlinePlus, Mayo Clinic
     SECONDARY = 2    # Drugs.com, Medscape  
     TERTIARY = 3     # WHO, Healthline, PubMed
@@ -31,6 +92,54 @@ class InformationType(Enum):
     GENERAL = "general"
     VERIFICATION = "verification"
 
+# Bit assigned to each line category in LineRecord.labels
+LINE_LABEL_BITS = medical_line_classifier.label_bits
+
+# Agents only read the leading lines of a result, so only those are classified
+INGEST_LINE_LIMIT = 15
+
+class LineRecord(NamedTuple):
+    """Pre-classified line of search content"""
+    text: str    # stripped line text
+    labels: int  # bitmask of LINE_LABEL_BITS (shared medical line classifier categories)
+
+    def has(self, label: str) -> bool:
+        return bool(self.labels & LINE_LABEL_BITS[label])
+
+# Array type code holding one line's label bitmask in packed line labels
+_LABELS_TYPECODE = "H" if max(LINE_LABEL_BITS.values()) < 1 << 16 else "I"
+
+def _leading_lines(content: Any, limit: int) -> List[str]:
+    if not isinstance(content, str):
+        content = str(content) if content else ""
+    return content.split('\n', limit)[:limit]
+
+def classify_content_lines(content: Any, limit: int = INGEST_LINE_LIMIT) -> Tuple[LineRecord, ...]:
+    """Split search content once and label its leading lines with every line category"""
+    lines = _leading_lines(content, limit)
+    labels = medical_line_classifier.classify_lines(lines)
+    return tuple(LineRecord(line.strip(), bits) for line, bits in zip(lines, labels))
+
+def classify_line_labels(content: Any, limit: int = INGEST_LINE_LIMIT) -> bytes:
+    """
+    Label the leading lines of search content, packed as one bitmask per line
+
+    Holds the classification of the content without copies of its lines (2 bytes per
+    line instead of the line text), for results whose content is kept compressed.
+    """
+    return pack_line_labels(medical_line_classifier.classify_lines(_leading_lines(content, limit)))
+
+def pack_line_labels(labels: Iterable[int]) -> bytes:
+    """Pack per-line label bitmasks (LineRecord.labels) for line_records_from_labels"""
+    return array(_LABELS_TYPECODE, labels).tobytes()
+
+def line_records_from_labels(content: Any, labels: bytes) -> Tuple[LineRecord, ...]:
+    """Rebuild the line records of content from its packed line labels"""
+    bits = array(_LABELS_TYPECODE)
+    bits.frombytes(labels)
+    lines = _leading_lines(content, len(bits))
+    return tuple(LineRecord(line.strip(), line_bits) for line, line_bits in zip(lines, bits))
+
 @dataclass
 class SearchResult:
     """Container for search results with metadata"""
@@ -42,6 +151,218 @@ class SearchResult:
     info_type: InformationType
     success: bool = True
     error_message: Optional[str] = None
+    line_records: Tuple[LineRecord, ...] = ()  # filled in once at ingest
+
+    @property
+    def has_content(self) -> bool:
+        return bool(self.content)
+
+# Site filters added to queries for each source
+SOURCE_SITE_FILTERS = {
+    "FDA": "site:fda.gov",
+    "MedlinePlus": "site:medlineplus.gov",
+    "MayoClinic": "site:mayoclinic.org",
+    "Drugs": "site:drugs.com",
+    "Medscape": "site:medscape.com",
+    "WHO": "site:who.int",
+    "PubMed": "site:pubmed.ncbi.nlm.nih.gov"
+}
+
+# Information type context appended to queries
+INFO_TYPE_QUERY_CONTEXT = {
+    InformationType.DOSAGE: "dosage dose administration",
+    InformationType.SIDE_EFFECTS: "side effects adverse reactions",
+    InformationType.INTERACTIONS: "drug interactions warnings",
+    InformationType.WARNINGS: "warnings precautions contraindications",
+    InformationType.VERIFICATION: "clinical information facts"
+}
+
+def enhance_query(query: str, source: str, info_type: InformationType) -> str:
+    """Enhance search query based on source and information type"""
+    enhanced_query = query
+    if source in SOURCE_SITE_FILTERS:
+        enhanced_query = f"{SOURCE_SITE_FILTERS[source]} {query}"
+    
+    # Add information type context
+    if info_type in INFO_TYPE_QUERY_CONTEXT:
+        enhanced_query += f" {INFO_TYPE_QUERY_CONTEXT[info_type]}"
+        
+    return enhanced_query
+
+# Compact codes for information types (small ints are shared, unlike enum references in a __dict__)
+_INFO_TYPES = tuple(InformationType)
+_INFO_TYPE_CODES = {info_type: code for code, info_type in enumerate(_INFO_TYPES)}
+
+class CompactSearchResult:
+    """
+    Memory-compact search result for large caches.
+    
+    Exposes the same attributes as SearchResult but uses __slots__, interned agent and
+    source names, an integer information type code, the base (un-enhanced) query shared
+    across sources, and optionally zlib-compressed content decompressed on access. Content
+    is held inline until the content store has seen the same payload before; repeated
+    payloads are held as a shared ContentBlob, so results with identical content share
+    one copy of it (see ContentStore.share).
+    
+    Line classification is held as packed per-line labels (see classify_line_labels) and
+    line_records are rebuilt from the content on access, so they do not keep an
+    uncompressed copy of the leading lines next to the compressed content.
+    """
+    
+    __slots__ = ("_query", "source", "_content", "timestamp", "agent_name",
+                 "_info_code", "_flags", "error_message", "line_labels")
+    
+    _SUCCESS = 1
+    _ENHANCED_QUERY = 2
+    _COMPRESSED = 4  # inline content is zlib-compressed
+    
+    def __init__(self, query: str, source: str, content: str, timestamp: float,
+                 agent_name: str, info_type: InformationType, success: bool = True,
+                 error_message: Optional[str] = None, enhanced_query: bool = False,
+                 compress_threshold: Optional[int] = None,
+                 line_labels: bytes = b"",
+                 content_store: Optional[ContentStore] = None):
+        flags = self._SUCCESS if success else 0
+        if enhanced_query:
+            flags |= self._ENHANCED_QUERY
+        
+        stored_content = content
+        if isinstance(content, str) and content:
+            store = content_store if content_store is not None else get_content_store()
+            blob = store.share(content, compress_threshold)
+            if blob is not None:
+                stored_content = blob
+            elif compress_threshold is not None and len(content) >= compress_threshold:
+                stored_content = zlib.compress(content.encode("utf-8"))
+                flags |= self._COMPRESSED
+        
+        self._query = sys.intern(query)
+        self.source = sys.intern(source)
+        self._content = stored_content
+        self.timestamp = timestamp
+        self.agent_name = sys.intern(agent_name)
+        self._info_code = _INFO_TYPE_CODES[info_type]
+        self._flags = flags
+        self.error_message = error_message
+        self.line_labels = line_labels
+    
+    @classmethod
+    def from_result(cls, result: SearchResult, compress_threshold: Optional[int] = None) -> "CompactSearchResult":
+        """Create a compact copy of a regular SearchResult"""
+        return cls(result.query, result.source, result.content, result.timestamp,
+                   result.agent_name, result.info_type, result.success,
+                   result.error_message, compress_threshold=compress_threshold,
+                   line_labels=pack_line_labels(record.labels for record in result.line_records))
+    
+    @property
+    def query(self) -> str:
+        if self._flags & self._ENHANCED_QUERY:
+            return enhance_query(self._query, self.source, self.info_type)
+        return self._query
+    
+    @property
+    def content(self) -> str:
+        if isinstance(self._content, ContentBlob):
+            return self._content.text
+        if self._flags & self._COMPRESSED:
+            return zlib.decompress(self._content).decode("utf-8")
+        return self._content
+    
+    @property
+    def line_records(self) -> Tuple[LineRecord, ...]:
+        """Pre-classified leading lines of the content (rebuilt from line_labels)"""
+        return line_records_from_labels(self.content, self.line_labels)
+    
+    @property
+    def content_blob(self) -> Optional[ContentBlob]:
+        """Content store blob holding the content (None for content held inline)"""
+        return self._content if isinstance(self._content, ContentBlob) else None
+    
+    @property
+    def stored_content(self) -> Any:
+        """Content as held: blob data, compressed bytes or text (without decompressing it)"""
+        blob = self.content_blob
+        return blob.data if blob is not None else self._content
+    
+    @property
+    def content_hash(self) -> Optional[str]:
+        """Hex content address of the content (None for empty or non-text content)"""
+        blob = self.content_blob
+        if blob is not None:
+            return blob.digest.hex()
+        content = self.content
+        return content_digest(content).hex() if isinstance(content, str) and content else None
+    
+    @property
+    def has_content(self) -> bool:
+        """Check for content without decompressing it"""
+        return bool(self._content)
+    
+    @property
+    def info_type(self) -> InformationType:
+        return _INFO_TYPES[self._info_code]
+    
+    @property
+    def success(self) -> bool:
+        return bool(self._flags & self._SUCCESS)
+    
+    @property
+    def compressed(self) -> bool:
+        blob = self.content_blob
+        return blob.compressed if blob is not None else bool(self._flags & self._COMPRESSED)
+    
+    def to_search_result(self) -> SearchResult:
+        """Expand back into a regular SearchResult"""
+        return SearchResult(self.query, self.source, self.content, self.timestamp,
+                            self.agent_name, self.info_type, self.success, self.error_message,
+                            self.line_records)
+    
+    def __repr__(self) -> str:
+        return (f"CompactSearchResult(source={self.source!r}, agent_name={self.agent_name!r}, "
+                f"info_type={self.info_type}, success={self.success}, compressed={self.compressed})")
+
+# Either result representation can be held in the coordinator cache
+CachedResult = Union[SearchResult, CompactSearchResult]
+
+def ingest_result(result: CachedResult, content: Any, content_store: Optional[ContentStore] = None):
+    """
+    Process a new search result once before it is cached, so agents reading it
+    (including on cache hits) use pre-classified line records instead of
+    re-splitting and keyword-scanning the raw content.
+    
+    The classification is memoized on the content store blob as packed line labels,
+    so a payload already held for another query, source or agent is not classified
+    again, and compact results sharing a blob share its labels.
+    """
+    if isinstance(result, CompactSearchResult):
+        blob = result.content_blob
+    elif isinstance(content, str) and content:
+        store = content_store if content_store is not None else get_content_store()
+        blob = store.get(content_digest(content))
+    else:
+        blob = None
+    
+    labels = None
+    if blob is not None:
+        if blob.line_labels is None:
+            blob.line_labels = classify_line_labels(content)
+        labels = blob.line_labels
+    
+    if isinstance(result, CompactSearchResult):
+        result.line_labels = labels if labels is not None else classify_line_labels(content)
+    elif labels is not None:
+        result.line_records = line_records_from_labels(content, labels)
+    else:
+        result.line_records = classify_content_lines(content)
+
+class ContentMatch(NamedTuple):
+    """Line of cached search content matching a content search"""
+    source: str
+    agent_name: str
+    info_type: InformationType
+    query: str
+    line: str
+    matched_terms: int
 
 @dataclass
 class SourceSpec:
@@ -51,6 +372,107 @@ class SourceSpec:
     priority: SourcePriority
     specialties: List[InformationType]
     rate_limit: float = 1.0  # seconds between requests
+    local: bool = False      # answered from the local monograph store instead of a search tool
+
+@dataclass
+class SearchActivity:
+    """Search coordinator activity of one request (see search_activity_scope)"""
+    coordinated_searches: int = 0
+    local_hits: int = 0
+    cache_hits: int = 0
+    web_searches: int = 0
+    failed: int = 0
+    skipped: int = 0
+    search_time_s: float = 0.0
+    sources: Dict[str, int] = field(default_factory=dict)  # successful results served per source
+    agents: Dict[str, int] = field(default_factory=dict)   # coordinated searches per agent
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, agent_name: str, results: Dict[str, "CachedResult"], local_hits: int,
+               cache_hits: int, elapsed: float):
+        """Record one coordinated search and the sources that answered it"""
+        with self._lock:
+            self.coordinated_searches += 1
+            self.agents[agent_name] = self.agents.get(agent_name, 0) + 1
+            self.local_hits += local_hits
+            self.cache_hits += cache_hits
+            self.search_time_s += elapsed
+            skipped = 0
+            for source, result in results.items():
+                if result.error_message == DEADLINE_SKIPPED_MESSAGE:
+                    skipped += 1
+                elif result.success and result.has_content:
+                    self.sources[source] = self.sources.get(source, 0) + 1
+                elif not result.success:
+                    self.failed += 1
+            self.skipped += skipped
+            self.web_searches += len(results) - local_hits - cache_hits - skipped
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "coordinated_searches": self.coordinated_searches,
+                "local_hits": self.local_hits,
+                "cache_hits": self.cache_hits,
+                "web_searches": self.web_searches,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "search_time_s": round(self.search_time_s, 3),
+                "sources": dict(self.sources),
+                "agents": dict(self.agents),
+            }
+
+# Search activity of the request being processed (inherited by the workforce's async tasks)
+_current_search_activity: contextvars.ContextVar[Optional[SearchActivity]] = contextvars.ContextVar(
+    "medforce_search_activity", default=None
+)
+
+def get_current_search_activity() -> Optional[SearchActivity]:
+    """Get the search activity record of the current request, if any"""
+    return _current_search_activity.get()
+
+@contextmanager
+def search_activity_scope(activity: Optional[SearchActivity]) -> Iterator[Optional[SearchActivity]]:
+    """Record the coordinator activity of the code (and async tasks) run inside the scope"""
+    token = _current_search_activity.set(activity)
+    try:
+        yield activity
+    finally:
+        _current_search_activity.reset(token)
+
+@dataclass
+class SourceStats:
+    """Rolling latency and success history for a single source"""
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=50))
+    outcomes: Deque[bool] = field(default_factory=lambda: deque(maxlen=50))
+
+    def record(self, latency: float, success: bool):
+        """Record the outcome of one search against this source"""
+        self.latencies.append(latency)
+        self.outcomes.append(success)
+
+    @property
+    def samples(self) -> int:
+        return len(self.outcomes)
+
+    @property
+    def success_rate(self) -> float:
+        """Smoothed success rate (Laplace prior: 0.5 for a source with no history)"""
+        return (sum(self.outcomes) + 1) / (len(self.outcomes) + 2)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return sum(self.latencies) / len(self.latencies)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Get the observed latency at the given percentile (0-100)"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
 
 class SearchCoordinator:
     """
@@ -63,12 +485,53 @@ class SearchCoordinator:
     - Search result sharing between agents
     """
     
-    def __init__(self, cache_ttl: int = 3600):  # 1 hour cache TTL
-        self.cache: Dict[str, SearchResult] = {}
+    def __init__(self, cache_ttl: int = 3600,  # 1 hour cache TTL
+                 selection_policy: str = "adaptive",
+                 hedge_percentile: Optional[float] = 95.0,
+                 compact_results: bool = True,
+                 compress_threshold: Optional[int] = 1024,
+                 monograph_store: Optional[MonographStore] = None,
+                 cache_backend: Optional[MutableMapping[str, CachedResult]] = None,
+                 max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT):
+        # Cache backend: a local dict, or a shared mapping (see shared_cache) used by several processes
+        self.cache: MutableMapping[str, CachedResult] = cache_backend if cache_backend is not None else {}
         self.cache_ttl = cache_ttl
+        
+        # Line-level inverted index over the content of every cached result
+        self.content_index = InvertedIndex()
+        
+        # Cached results are stored as CompactSearchResult; content of at least
+        # compress_threshold characters is zlib-compressed (None disables compression)
+        self.compact_results = compact_results
+        self.compress_threshold = compress_threshold
+        
+        # Content-addressed payloads: identical content across sources, queries and agents is
+        # held once, and its line classification is computed once
+        self.content_store = get_content_store()
         self.last_request_time: Dict[str, float] = {}
         self.failed_sources: Dict[str, float] = {}  # Track temporary failures
         
+        # Source selection: "static" (priority only) or "adaptive" (priority + observed performance)
+        self.selection_policy = selection_policy
+        self.source_stats: Dict[str, SourceStats] = {}
+        self.default_latency = 2.0  # assumed latency (seconds) for sources without history
+        # Share of rankings that give their last slot to the least-tried remaining source, so
+        # sources without history (or with an old bad record) are still tried now and then
+        self.exploration_rate = 0.1
+        self._exploration_random = random.Random()
+        
+        # Request hedging: re-issue a query to a backup source once the primary has been
+        # slower than this percentile of its observed latency (None disables hedging)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = 5
+        self.hedge_stats = {"issued": 0, "backup_won": 0}
+        # Primaries and backups run on separate pools, each sized for every agent of every
+        # request the scheduler runs at once, so neither waits for a thread behind the other
+        search_workers = max(1, max_concurrent_requests) * SEARCHING_AGENTS
+        self._primary_executor = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="search-primary")
+        self._hedge_executor = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="search-hedge")
+        self._rate_limit_lock = threading.Lock()
+        
         # Define authoritative medical sources with their specialties
         self.sources = {
             # PRIMARY SOURCES (Highest Authority)
@@ -127,6 +590,20 @@ class SearchCoordinator:
             )
         }
         
+        # LOCAL SOURCE (Offline drug label monographs, queried before web sources)
+        self.monograph_store = monograph_store if monograph_store is not None else get_monograph_store()
+        self.local_stats = {"hits": 0, "misses": 0}
+        if self.monograph_store is not None:
+            self.sources["LocalMonographs"] = SourceSpec(
+                name="Local Drug Monographs",
+                url_pattern="local",
+                priority=SourcePriority.LOCAL,
+                specialties=[InformationType.DOSAGE, InformationType.SIDE_EFFECTS, InformationType.INTERACTIONS,
+                             InformationType.WARNINGS, InformationType.VERIFICATION, InformationType.GENERAL],
+                rate_limit=0.0,
+                local=True
+            )
+        
         # Agent specialization mapping
         self.agent_specializations = {
             "DosageAgent": InformationType.DOSAGE,
@@ -134,27 +611,62 @@ class SearchCoordinator:
             "WebSearchAgent": InformationType.INTERACTIONS,
             "ValidatorAgent": InformationType.VERIFICATION
         }
+        
+        # Minimum authority that must be represented in every source selection
+        self.minimum_authority = {
+            InformationType.DOSAGE: SourcePriority.PRIMARY,
+            InformationType.SIDE_EFFECTS: SourcePriority.PRIMARY,
+            InformationType.INTERACTIONS: SourcePriority.PRIMARY,
+            InformationType.WARNINGS: SourcePriority.PRIMARY,
+            InformationType.VERIFICATION: SourcePriority.PRIMARY,
+            InformationType.GENERAL: SourcePriority.SECONDARY
+        }
+        
+        # Authority weighting used by the adaptive policy
+        self.authority_weights = {
+            SourcePriority.LOCAL: 1.0,
+            SourcePriority.PRIMARY: 1.0,
+            SourcePriority.SECONDARY: 0.8,
+            SourcePriority.TERTIARY: 0.6
+        }
+
+    def use_cache_backend(self, cache_backend: MutableMapping[str, CachedResult]):
+        """
+        Switch to another cache backend, e.g. a cache shared between worker processes.
+        
+        The content index only covers results this process caches from now on.
+        """
+        self.cache = cache_backend
+        self.content_index.clear()
+        logger.info(f"Search cache backend set to {type(cache_backend).__name__}")
+
+    @property
+    def cache_is_local(self) -> bool:
+        """Whether the cache is this process's dict (scanning it is cheap) rather than a shared backend"""
+        return isinstance(self.cache, dict)
 
     def _generate_cache_key(self, query: str, source: str, info_type: InformationType) -> str:
         """Generate unique cache key for search queries"""
         key_string = f"{query.lower().strip()}_{source}_{info_type.value}"
         return hashlib.md5(key_string.encode()).hexdigest()
 
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """Check if cached result is still valid"""
-        if cache_key not in self.cache:
-            return False
+    def _get_valid_result(self, cache_key: str) -> Optional[CachedResult]:
+        """
+        Get a cached result that is still within the cache TTL
         
-        result = self.cache[cache_key]
-        age = time.time() - result.timestamp
-        return age < self.cache_ttl
+        Fetches the entry once, so a shared cache backend decodes it once per lookup.
+        """
+        result = self.cache.get(cache_key)
+        if result is None or time.time() - result.timestamp >= self.cache_ttl:
+            return None
+        return result
 
     def _get_optimal_sources(self, info_type: InformationType, limit: int = 3) -> List[str]:
         """Get optimal sources for a specific information type"""
         # Filter sources by specialty and sort by priority
         relevant_sources = [
             (name, spec) for name, spec in self.sources.items()
-            if info_type in spec.specialties
+            if info_type in spec.specialties and not spec.local
         ]
         
         # Sort by priority (PRIMARY first)
@@ -167,29 +679,78 @@ class SearchCoordinator:
             if self.failed_sources.get(name, 0) < current_time - 300  # 5 min cooldown
         ]
         
+        if self.selection_policy == "adaptive":
+            return self._rank_sources_adaptively(available_sources, info_type, limit)
+        
         return available_sources[:limit]
 
+    def _score_source(self, source: str) -> float:
+        """Score a source by authority, observed success rate and observed latency"""
+        stats = self.source_stats.get(source, SourceStats())
+        latency = stats.mean_latency if stats.mean_latency is not None else self.default_latency
+        authority = self.authority_weights.get(self.sources[source].priority, 0.5)
+        
+        # Expected useful answers per second of waiting, weighted by authority
+        return authority * stats.success_rate / (1.0 + latency / self.default_latency)
+
+    def _rank_sources_adaptively(self, available_sources: List[str],
+                                 info_type: InformationType, limit: int) -> List[str]:
+        """Rank sources by score, now and then exploring one, keeping the minimum authority level represented"""
+        # Stable sort keeps the static priority order when scores tie (e.g. no history yet)
+        ranked = sorted(available_sources, key=self._score_source, reverse=True)
+        selected = ranked[:limit]
+        
+        unselected = ranked[limit:]
+        if selected and unselected and self._exploration_random.random() < self.exploration_rate:
+            explored = min(unselected, key=lambda name: self.source_stats.get(name, SourceStats()).samples)
+            selected[-1] = explored
+        
+        minimum = self.minimum_authority.get(info_type)
+        if minimum is None or not selected:
+            return selected
+        
+        def is_authoritative(name: str) -> bool:
+            return self.sources[name].priority.value <= minimum.value
+        
+        if not any(is_authoritative(name) for name in selected):
+            authoritative = [name for name in ranked[limit:] if is_authoritative(name)]
+            if authoritative:
+                selected[-1] = authoritative[0]
+        
+        return selected
+
+    def _record_source_outcome(self, source: str, latency: float, success: bool):
+        """Record latency and success of a search for adaptive source selection"""
+        if source not in self.source_stats:
+            self.source_stats[source] = SourceStats()
+        self.source_stats[source].record(latency, success)
+
     def _enforce_rate_limit(self, source: str) -> bool:
         """Enforce rate limiting for source requests"""
         if source not in self.sources:
             return True
-            
+        
+        # Reserve the next request slot under the lock so concurrent (hedged) searches
+        # against the same source still respect its rate limit budget
         rate_limit = self.sources[source].rate_limit
-        last_request = self.last_request_time.get(source, 0)
-        time_since_last = time.time() - last_request
+        with self._rate_limit_lock:
+            now = time.time()
+            last_request = self.last_request_time.get(source, 0)
+            wait_time = max(0.0, last_request + rate_limit - now)
+            self.last_request_time[source] = now + wait_time
         
-        if time_since_last < rate_limit:
-            logger.warning(f"Rate limit hit for {source}. Waiting {rate_limit - time_since_last:.1f}s")
-            time.sleep(rate_limit - time_since_last)
+        if wait_time > 0:
+            logger.warning(f"Rate limit hit for {source}. Waiting {wait_time:.1f}s")
+            time.sleep(wait_time)
         
-        self.last_request_time[source] = time.time()
         return True
 
     def coordinated_search(self, 
                          agent_name: str, 
                          query: str, 
                          search_tool: Any,
-                         max_sources: int = 2) -> Dict[str, SearchResult]:
+                         max_sources: int = 2,
+                         deadline: Optional[Deadline] = None) -> Dict[str, CachedResult]:
         """
         Perform coordinated search across optimal sources for the agent's specialty.
         
@@ -198,109 +759,289 @@ class SearchCoordinator:
             query: Search query
             search_tool: Agent's search tool
             max_sources: Maximum number of sources to search
+            deadline: Request deadline (defaults to the deadline of the current request)
             
         Returns:
-            Dictionary of search results by source name
+            Dictionary of search results by source name. Sources that could not be
+            searched within the deadline are returned as failed results marked as skipped.
+            A local monograph hit takes one of the max_sources slots; a miss does not.
         """
         info_type = self.agent_specializations.get(agent_name, InformationType.GENERAL)
-        optimal_sources = self._get_optimal_sources(info_type, max_sources)
+        deadline = deadline or get_current_deadline()
+        started = time.time()
         
-        results = {}
+        # Local sources answer from disk, so they are always tried first
+        results = self._search_local_sources(agent_name, query, info_type)
+        local_hits = len(results)
+        cache_hits = 0
+        optimal_sources = self._get_optimal_sources(info_type, max(0, max_sources - len(results)))
         
         for source in optimal_sources:
             cache_key = self._generate_cache_key(query, source, info_type)
             
             # Check cache first
-            if self._is_cache_valid(cache_key):
+            cached = self._get_valid_result(cache_key)
+            if cached is not None:
                 logger.info(f"Cache hit for {agent_name}: {query} from {source}")
-                results[source] = self.cache[cache_key]
+                results[source] = cached
+                cache_hits += 1
+                continue
+            
+            # Skip sources that cannot answer within the remaining budget
+            if deadline is not None and not deadline.allows(self._expected_latency(source)):
+                logger.warning(f"Skipping {source} for {agent_name}: request deadline exceeded")
+                results[source] = self._deadline_result(agent_name, query, source, info_type)
+                continue
+            
+            # Perform new search, hedging to a backup source if this one is slow
+            result = self._hedged_search(agent_name, query, source, info_type, search_tool,
+                                         exclude=set(optimal_sources) | set(results),
+                                         deadline=deadline)
+            results[result.source] = result
+
+        activity = get_current_search_activity()
+        if activity is not None:
+            activity.record(agent_name, results, local_hits, cache_hits, time.time() - started)
+        return results
+
+    def _search_local_sources(self, agent_name: str, query: str,
+                              info_type: InformationType) -> Dict[str, CachedResult]:
+        """Look up a query in the local sources, returning only the sources that had an answer"""
+        results = {}
+        for source, spec in self.sources.items():
+            if not spec.local or info_type not in spec.specialties:
                 continue
             
-            # Perform new search
+            started = time.time()
+            try:
+                content = self.monograph_store.lookup(query, info_type.value)
+            except Exception as e:
+                logger.error(f"Local lookup failed for {agent_name} on {source}: {str(e)}")
+                content = ""
+            
+            if not content:
+                self.local_stats["misses"] += 1
+                continue
+            
+            self.local_stats["hits"] += 1
+            self._record_source_outcome(source, time.time() - started, True)
+            logger.info(f"Local hit for {agent_name}: {query} from {source}")
+            result = SearchResult(
+                query=query,
+                source=source,
+                content=content,
+                timestamp=time.time(),
+                agent_name=agent_name,
+                info_type=info_type,
+                success=True
+            )
+            self._ingest_result(result, content)
+            results[source] = result
+        
+        return results
+
+    def _search_source(self, agent_name: str, query: str, source: str,
+                       info_type: InformationType, search_tool: Any,
+                       slot_granted: Optional[threading.Event] = None) -> CachedResult:
+        """
+        Search a single source, caching successful results and recording source outcome
+        
+        slot_granted, if given, is set once the search holds its rate limit slot.
+        """
+        cache_key = self._generate_cache_key(query, source, info_type)
+        started = time.time()
+        try:
+            # Enforce rate limiting
             try:
-                # Enforce rate limiting
                 self._enforce_rate_limit(source)
-                
-                # Construct source-specific query
-                enhanced_query = self._enhance_query_for_source(query, source, info_type)
-                
-                # Execute search
-                logger.info(f"New search for {agent_name}: {enhanced_query} from {source}")
-                search_content = search_tool.run(enhanced_query)
-                
-                # Create and cache result
-                result = SearchResult(
-                    query=enhanced_query,
+            finally:
+                if slot_granted is not None:
+                    slot_granted.set()
+            
+            # Construct source-specific query
+            enhanced_query = self._enhance_query_for_source(query, source, info_type)
+            
+            # Execute search
+            logger.info(f"New search for {agent_name}: {enhanced_query} from {source}")
+            started = time.time()
+            search_content = search_tool.run(enhanced_query)
+            self._record_source_outcome(source, time.time() - started, True)
+            
+            # Create and cache result
+            if self.compact_results:
+                result = CompactSearchResult(
+                    query=query,
                     source=source,
                     content=search_content,
                     timestamp=time.time(),
                     agent_name=agent_name,
                     info_type=info_type,
-                    success=True
+                    success=True,
+                    enhanced_query=True,
+                    compress_threshold=self.compress_threshold,
+                    content_store=self.content_store
                 )
-                
-                self.cache[cache_key] = result
-                results[source] = result
-                
-                # Reset failure counter on success
-                if source in self.failed_sources:
-                    del self.failed_sources[source]
-                    
-            except Exception as e:
-                logger.error(f"Search failed for {agent_name} on {source}: {str(e)}")
-                
-                # Record failure for temporary blacklisting
-                self.failed_sources[source] = time.time()
-                
-                # Create error result
-                error_result = SearchResult(
-                    query=query,
+            else:
+                result = SearchResult(
+                    query=enhanced_query,
                     source=source,
-                    content="",
+                    content=search_content,
                     timestamp=time.time(),
                     agent_name=agent_name,
                     info_type=info_type,
-                    success=False,
-                    error_message=str(e)
+                    success=True
                 )
-                results[source] = error_result
+            
+            self._ingest_result(result, search_content)
+            self.cache[cache_key] = result
+            self.content_index.add(cache_key, search_content)
+            
+            # Reset failure counter on success
+            self.failed_sources.pop(source, None)
+            
+            return result
+                
+        except Exception as e:
+            logger.error(f"Search failed for {agent_name} on {source}: {str(e)}")
+            
+            # Record failure for temporary blacklisting
+            self.failed_sources[source] = time.time()
+            self._record_source_outcome(source, time.time() - started, False)
+            
+            # Create error result
+            return SearchResult(
+                query=query,
+                source=source,
+                content="",
+                timestamp=time.time(),
+                agent_name=agent_name,
+                info_type=info_type,
+                success=False,
+                error_message=str(e)
+            )
 
-        return results
+    def _ingest_result(self, result: CachedResult, content: Any):
+        """Classify a new search result once before it is cached (see ingest_result)"""
+        ingest_result(result, content, self.content_store)
 
-    def _enhance_query_for_source(self, query: str, source: str, info_type: InformationType) -> str:
-        """Enhance search query based on source and information type"""
-        enhancements = {
-            "FDA": f"site:fda.gov {query}",
-            "MedlinePlus": f"site:medlineplus.gov {query}",
-            "MayoClinic": f"site:mayoclinic.org {query}",
-            "Drugs": f"site:drugs.com {query}",
-            "Medscape": f"site:medscape.com {query}",
-            "WHO": f"site:who.int {query}",
-            "PubMed": f"site:pubmed.ncbi.nlm.nih.gov {query}"
-        }
+    def _expected_latency(self, source: str) -> Optional[float]:
+        """Get the observed mean latency of a source, if it has any history"""
+        stats = self.source_stats.get(source)
+        return stats.mean_latency if stats is not None else None
+
+    def _deadline_result(self, agent_name: str, query: str, source: str,
+                         info_type: InformationType) -> SearchResult:
+        """Create the result for a source search that was skipped or abandoned at the deadline"""
+        return SearchResult(
+            query=query,
+            source=source,
+            content="",
+            timestamp=time.time(),
+            agent_name=agent_name,
+            info_type=info_type,
+            success=False,
+            error_message=DEADLINE_SKIPPED_MESSAGE
+        )
+
+    def _get_hedge_delay(self, source: str) -> Optional[float]:
+        """Get how long to wait on a source before hedging, or None if hedging does not apply"""
+        if self.hedge_percentile is None:
+            return None
+        stats = self.source_stats.get(source)
+        if stats is None or stats.samples < self.hedge_min_samples:
+            return None
+        return stats.latency_percentile(self.hedge_percentile)
+
+    def _get_backup_source(self, info_type: InformationType, exclude: set) -> Optional[str]:
+        """Get the next-best source for an information type outside the excluded set"""
+        for source in self._get_optimal_sources(info_type, limit=len(self.sources)):
+            if source not in exclude:
+                return source
+        return None
+
+    def _hedged_search(self, agent_name: str, query: str, source: str,
+                       info_type: InformationType, search_tool: Any, exclude: set,
+                       deadline: Optional[Deadline] = None) -> CachedResult:
+        """
+        Search a source and, if it has not answered within its hedge delay of being sent
+        (after its rate limit wait), issue the same query to the next-best source. The first successful answer wins; the loser
+        is cancelled if it has not started yet, otherwise its result is only cached.
+        With a deadline, the search is abandoned once the budget runs out.
+        """
+        hedge_delay = self._get_hedge_delay(source)
+        if hedge_delay is None and deadline is None:
+            return self._search_source(agent_name, query, source, info_type, search_tool)
         
-        # Add information type context
-        type_context = {
-            InformationType.DOSAGE: "dosage dose administration",
-            InformationType.SIDE_EFFECTS: "side effects adverse reactions",
-            InformationType.INTERACTIONS: "drug interactions warnings",
-            InformationType.WARNINGS: "warnings precautions contraindications",
-            InformationType.VERIFICATION: "clinical information facts"
-        }
+        def time_left(timeout: Optional[float] = None) -> Optional[float]:
+            if deadline is None:
+                return timeout
+            return deadline.remaining() if timeout is None else min(timeout, deadline.remaining())
         
-        enhanced_query = enhancements.get(source, query)
-        if info_type in type_context:
-            enhanced_query += f" {type_context[info_type]}"
-            
-        return enhanced_query
+        slot_granted = threading.Event()
+        primary = self._primary_executor.submit(
+            self._search_source, agent_name, query, source, info_type, search_tool, slot_granted
+        )
+        # The hedge delay is measured from when the primary holds its rate limit slot, so
+        # waiting out the source's rate limit does not by itself trigger a backup search
+        if hedge_delay is not None:
+            slot_granted.wait(time_left())
+        done, _ = wait([primary], timeout=time_left(hedge_delay))
+        if done:
+            return primary.result()
+        
+        pending = {primary}
+        backup = None
+        backup_source = None
+        if hedge_delay is not None and not (deadline is not None and deadline.expired()):
+            backup_source = self._get_backup_source(info_type, exclude)
+        if backup_source is not None:
+            logger.info(f"Hedging {agent_name} search: {source} exceeded {hedge_delay:.2f}s, "
+                        f"also querying {backup_source}")
+            self.hedge_stats["issued"] += 1
+            backup = self._hedge_executor.submit(
+                self._search_source, agent_name, query, backup_source, info_type, search_tool
+            )
+            pending.add(backup)
+        
+        first_result = None
+        while pending:
+            done, pending = wait(pending, timeout=time_left(), return_when=FIRST_COMPLETED)
+            if not done:
+                # Out of budget: stop waiting, late answers are still cached when they arrive
+                for future in pending:
+                    future.cancel()
+                logger.warning(f"Abandoning {source} search for {agent_name}: request deadline exceeded")
+                return first_result or self._deadline_result(agent_name, query, source, info_type)
+            for future in done:
+                result = future.result()
+                if result.success:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is backup:
+                        self.hedge_stats["backup_won"] += 1
+                    return result
+                if first_result is None:
+                    first_result = result
+        
+        # Every attempt failed: report the first failure
+        return first_result
+
+    def _enhance_query_for_source(self, query: str, source: str, info_type: InformationType) -> str:
+        """Enhance search query based on source and information type"""
+        return enhance_query(query, source, info_type)
 
-    def get_shared_results(self, query: str, requesting_agent: str) -> Dict[str, List[SearchResult]]:
+    def get_shared_results(self, query: str, requesting_agent: str) -> Dict[str, List[CachedResult]]:
         """
         Get search results that other agents have already found for similar queries.
         Useful for ValidatorAgent to access previous search results.
+        
+        Needs a scan of the whole cache, so on a shared cache backend (where that would fetch
+        and decode every entry from the cache server) no shared results are returned.
         """
         shared_results = {}
         query_lower = query.lower()
+        if not self.cache_is_local:
+            return shared_results
         
         for cache_key, result in self.cache.items():
             # Find results from other agents with similar queries
@@ -314,11 +1055,65 @@ class SearchCoordinator:
         
         return shared_results
 
+    def search_cached_content(self, text: str, required: Tuple[str, ...] = (),
+                              min_matched: Optional[int] = None,
+                              query_filter: Optional[str] = None,
+                              info_type: Optional[InformationType] = None,
+                              limit: int = 10) -> List[ContentMatch]:
+        """
+        Search the content of valid cached results line by line using the content index.
+        
+        Args:
+            text: Text whose terms are looked up (e.g. "4000 mg maximum daily")
+            required: Terms that must all appear on a matching line (e.g. "4000")
+            min_matched: Minimum number of distinct terms on a matching line (default: all)
+            query_filter: Only search results whose query contains this text (e.g. a medication)
+            info_type: Only search results of this information type
+            limit: Maximum number of matches returned
+            
+        Returns:
+            Matching lines, most terms matched first
+        """
+        query_filter = query_filter.lower() if query_filter else None
+        
+        matches = []
+        lines_by_key: Dict[str, List[str]] = {}
+        for hit in self.content_index.search(text, required=required, min_matched=min_matched):
+            # Filter only the hits, so the search cost does not grow with the whole cache
+            result = self._get_valid_result(hit.key)
+            if (result is None or not result.success
+                    or (info_type is not None and result.info_type != info_type)
+                    or (query_filter is not None and query_filter not in result.query.lower())):
+                continue
+            if hit.key not in lines_by_key:
+                lines_by_key[hit.key] = result.content.splitlines()
+            matches.append(ContentMatch(
+                source=result.source,
+                agent_name=result.agent_name,
+                info_type=result.info_type,
+                query=result.query,
+                line=lines_by_key[hit.key][hit.line].strip(),
+                matched_terms=hit.matched
+            ))
+            if len(matches) >= limit:
+                break
+        
+        return matches
+
     def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache statistics for monitoring"""
+        """
+        Get cache statistics for monitoring
+        
+        Called on every request, so on a shared cache backend the entries are only counted:
+        iterating it would fetch and decode every result from the cache server. Failed
+        searches are never cached, so every shared entry counts as a successful search and
+        the per-agent breakdown is left out (None).
+        """
         total_results = len(self.cache)
+        if not self.cache_is_local:
+            return self._cache_stats(total_results, total_results, None)
+        
         successful_results = sum(1 for r in self.cache.values() if r.success)
-        failed_results = total_results - successful_results
         
         # Count by agent
         agent_stats = {}
@@ -332,6 +1127,11 @@ class SearchCoordinator:
             else:
                 agent_stats[agent]["failed"] += 1
         
+        return self._cache_stats(total_results, successful_results, agent_stats)
+
+    def _cache_stats(self, total_results: int, successful_results: int,
+                     agent_stats: Optional[Dict[str, Dict[str, int]]]) -> Dict[str, Any]:
+        failed_results = total_results - successful_results
         return {
             "total_cached_results": total_results,
             "successful_searches": successful_results,
@@ -339,12 +1139,71 @@ class SearchCoordinator:
             "cache_hit_rate": f"{(successful_results/total_results*100):.1f}%" if total_results > 0 else "0%",
             "agent_statistics": agent_stats,
             "failed_sources": list(self.failed_sources.keys()),
+            "selection_policy": self.selection_policy,
+            "source_performance": self.get_source_performance(),
+            "hedged_searches": dict(self.hedge_stats),
+            "local_lookups": dict(self.local_stats),
+            "content_index": {"documents": len(self.content_index), "terms": self.content_index.term_count},
+            "monograph_store": self.monograph_store.get_stats() if self.monograph_store else None,
             "cache_ttl_hours": self.cache_ttl / 3600
         }
 
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """
+        Estimate the memory held by the cache, broken down by source, agent and information type
+        
+        Walks every cached result, so it is meant for diagnostics rather than frequent polling.
+        Content shared through the content store is counted once, for the first entry holding it.
+        A shared cache backend is held by the cache server, so only its size is reported.
+        """
+        if not self.cache_is_local:
+            return {"backend": type(self.cache).__name__, "entries": len(self.cache), "bytes": None,
+                    "content_store": self.content_store.get_stats()}
+        
+        seen, content_seen = set(), set()
+        totals = {"entries": 0, "bytes": 0, "content_bytes": 0}
+        breakdown: Dict[str, Dict[str, Dict[str, int]]] = {"by_source": {}, "by_agent": {}, "by_info_type": {}}
+        for cache_key, result in list(self.cache.items()):
+            size = deep_sizeof(cache_key, seen) + deep_sizeof(result, seen)
+            stored = result.stored_content if isinstance(result, CompactSearchResult) else result.content
+            content_size = deep_sizeof(stored, content_seen)
+            totals["entries"] += 1
+            totals["bytes"] += size
+            totals["content_bytes"] += content_size
+            for group, name in (("by_source", result.source), ("by_agent", result.agent_name),
+                                ("by_info_type", result.info_type.value)):
+                stats = breakdown[group].setdefault(name, {"entries": 0, "bytes": 0, "content_bytes": 0})
+                stats["entries"] += 1
+                stats["bytes"] += size
+                stats["content_bytes"] += content_size
+        
+        return {
+            "backend": "local",
+            **totals,
+            **breakdown,
+            "content_index_bytes": deep_sizeof(self.content_index),
+            "content_store": self.content_store.get_stats(),
+        }
+
+    def get_source_performance(self) -> Dict[str, Dict[str, Any]]:
+        """Get rolling latency and success statistics per source"""
+        performance = {}
+        for source, stats in self.source_stats.items():
+            mean_latency = stats.mean_latency
+            p95_latency = stats.latency_percentile(95)
+            performance[source] = {
+                "samples": stats.samples,
+                "success_rate": f"{stats.success_rate * 100:.1f}%",
+                "mean_latency_s": round(mean_latency, 3) if mean_latency is not None else None,
+                "p95_latency_s": round(p95_latency, 3) if p95_latency is not None else None,
+                "score": round(self._score_source(source), 3) if source in self.sources else None
+            }
+        return performance
+
     def clear_cache(self):
         """Clear all cached search results"""
         self.cache.clear()
+        self.content_index.clear()
         self.failed_sources.clear()
         logger.info("Search cache cleared")
 
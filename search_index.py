@@ -0,0 +1,141 @@
+"""
+Inverted Index over Cached Search Content
+
+This module keeps a term -> (cache key, line) index of every cached search result, updated
+as results are cached and cleared, so agents can look for supporting text ("4000 mg maximum
+acetaminophen") without rescanning the raw content of every cached result.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# "4,000mg" -> "4000", "mg"; words and numbers are indexed separately
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+_THOUSANDS_PATTERN = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+# Words too common in medical search content to narrow a query
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of",
+    "on", "or", "that", "the", "this", "to", "was", "with", "your", "you", "any", "does",
+    "do", "source", "mention", "mentions",
+})
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms"""
+    text = _THOUSANDS_PATTERN.sub("", text.lower())
+    return [term for term in _TOKEN_PATTERN.findall(text) if term not in STOPWORDS]
+
+def is_numeric_term(term: str) -> bool:
+    return term[0].isdigit()
+
+class IndexHit(NamedTuple):
+    """Line of an indexed document matching a query"""
+    key: str       # document (cache) key
+    line: int      # line number within the document content
+    matched: int   # number of distinct query terms found on the line
+
+class InvertedIndex:
+    """
+    Incremental line-level inverted index
+
+    Postings map each term to the documents containing it and the line numbers within
+    each document, so a query only touches the postings of its own terms.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._doc_terms
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
+
+    def add(self, key: str, content: str):
+        """Index (or re-index) the content of a document"""
+        lines_by_term: Dict[str, List[int]] = {}
+        if isinstance(content, str):
+            for line_no, line in enumerate(content.splitlines()):
+                for term in set(tokenize(line)):
+                    lines_by_term.setdefault(term, []).append(line_no)
+
+        with self._lock:
+            self._remove(key)
+            for term, lines in lines_by_term.items():
+                self._postings.setdefault(term, {})[key] = tuple(lines)
+            self._doc_terms[key] = tuple(lines_by_term)
+
+    def remove(self, key: str):
+        """Drop a document from the index"""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        for term in self._doc_terms.pop(key, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+
+    def search(self, query: str, required: Iterable[str] = (), min_matched: Optional[int] = None,
+               limit: Optional[int] = None) -> List[IndexHit]:
+        """
+        Find lines containing the query terms
+
+        Args:
+            query: Text whose terms are looked up
+            required: Terms that must all appear on a matching line
+            min_matched: Minimum number of distinct query terms on a matching line
+                (defaults to all of them)
+            limit: Maximum number of hits returned
+
+        Returns:
+            Matching lines, most query terms matched first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        required_terms = list(dict.fromkeys(term for text in required for term in tokenize(text)))
+        for term in required_terms:
+            if term not in terms:
+                terms.append(term)
+        if not terms:
+            return []
+        if min_matched is None:
+            min_matched = len(terms)
+        min_matched = max(min_matched, len(required_terms), 1)
+
+        with self._lock:
+            postings = {term: self._postings.get(term, {}) for term in terms}
+
+            # Lines lacking a required term cannot match: start from the rarest required term
+            candidates: Optional[Set[Tuple[str, int]]] = None
+            for term in sorted(required_terms, key=lambda t: len(postings[t])):
+                lines = {(key, line) for key, line_nos in postings[term].items() for line in line_nos}
+                candidates = lines if candidates is None else candidates & lines
+                if not candidates:
+                    return []
+
+            counts: Counter = Counter()
+            for term in terms:
+                for key, line_nos in postings[term].items():
+                    for line in line_nos:
+                        if candidates is None or (key, line) in candidates:
+                            counts[(key, line)] += 1
+
+        hits = [IndexHit(key, line, matched) for (key, line), matched in counts.items()
+                if matched >= min_matched]
+        hits.sort(key=lambda hit: (-hit.matched, hit.key, hit.line))
+        return hits[:limit] if limit is not None else hits
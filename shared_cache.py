@@ -0,0 +1,160 @@
+"""
+Shared Search Cache Backend for Multi-Process and Multi-Host Deployments
+
+This module serves the SearchCoordinator result cache from a multiprocessing manager, so
+worker processes of one API server, or several API servers behind a load balancer, all
+read and write one cache instead of each searching the same queries again.
+
+The cache server only holds JSON-encoded results (bytes); clients encode and decode them
+with SharedResultCache, so no result objects are unpickled from the shared cache. The
+manager connection itself is authenticated with MEDFORCE_CACHE_AUTHKEY, which a
+standalone server and its clients require (a server started by the API server for its
+own workers uses a random key instead). Only expose the server on a trusted network.
+
+Usage:
+    MEDFORCE_CACHE_AUTHKEY=<secret> python shared_cache.py                   # 127.0.0.1:50000
+    MEDFORCE_CACHE_AUTHKEY=<secret> python shared_cache.py --address 10.0.0.5:50000
+"""
+
+import argparse
+import json
+import logging
+import os
+import secrets
+from collections.abc import MutableMapping
+from multiprocessing.managers import BaseManager, DictProxy
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+
+if TYPE_CHECKING:
+    from search_coordinator import CachedResult, SearchResult
+
+logger = logging.getLogger(__name__)
+
+# Address a standalone cache server listens on unless --address is given
+DEFAULT_CACHE_ADDRESS = "127.0.0.1:50000"
+
+_served_cache: dict = {}
+
+def _get_served_cache() -> dict:
+    return _served_cache
+
+class SharedCacheManager(BaseManager):
+    """Manager exposing one dict as the shared search cache"""
+
+SharedCacheManager.register("get_cache", callable=_get_served_cache, proxytype=DictProxy)
+
+def cache_authkey() -> bytes:
+    """Authentication key shared by a standalone cache server and its clients (MEDFORCE_CACHE_AUTHKEY)"""
+    authkey = os.getenv("MEDFORCE_CACHE_AUTHKEY")
+    if not authkey:
+        raise RuntimeError("MEDFORCE_CACHE_AUTHKEY must be set to serve or connect to a shared search cache")
+    return authkey.encode()
+
+def encode_result(result: "CachedResult") -> bytes:
+    """Serialize a cached search result for the cache server, with its packed line labels"""
+    from search_coordinator import pack_line_labels
+
+    line_labels = getattr(result, "line_labels", None)
+    if line_labels is None:
+        line_labels = pack_line_labels(record.labels for record in result.line_records)
+    return json.dumps({
+        "query": result.query,
+        "source": result.source,
+        "content": result.content if isinstance(result.content, str) else str(result.content or ""),
+        "timestamp": result.timestamp,
+        "agent_name": result.agent_name,
+        "info_type": result.info_type.value,
+        "success": result.success,
+        "error_message": result.error_message,
+        "line_labels": line_labels.hex(),
+    }).encode("utf-8")
+
+def decode_result(data: bytes) -> "SearchResult":
+    """Rebuild a search result read from the cache server"""
+    # Imported here so a standalone cache server does not build a search coordinator
+    from search_coordinator import InformationType, SearchResult, classify_content_lines, line_records_from_labels
+
+    fields = json.loads(data)
+    fields["info_type"] = InformationType(fields["info_type"])
+    line_labels = fields.pop("line_labels", None)
+    result = SearchResult(**fields)
+    # Entries written before line labels were stored are classified again
+    result.line_records = (line_records_from_labels(result.content, bytes.fromhex(line_labels))
+                           if line_labels is not None else classify_content_lines(result.content))
+    return result
+
+class SharedResultCache(MutableMapping):
+    """Search result mapping over a cache server proxy, storing results as JSON bytes"""
+
+    def __init__(self, proxy: DictProxy):
+        self.proxy = proxy
+
+    def __getitem__(self, key: str) -> "SearchResult":
+        return decode_result(self.proxy[key])
+
+    def get(self, key: str, default=None):
+        # One round trip, without a KeyError raised through the manager for a miss
+        data = self.proxy.get(key)
+        return decode_result(data) if data is not None else default
+
+    def __setitem__(self, key: str, result: "CachedResult"):
+        self.proxy[key] = encode_result(result)
+
+    def __delitem__(self, key: str):
+        del self.proxy[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.proxy
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.proxy.keys())
+
+    def __len__(self) -> int:
+        return len(self.proxy)
+
+    def clear(self):
+        self.proxy.clear()
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Parse "host:port" into a manager address"""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def start_local_cache() -> Tuple[SharedCacheManager, SharedResultCache, bytes]:
+    """
+    Start a cache server in a child process for the workers of this machine
+
+    Returns:
+        The running manager (keep a reference to keep it alive), the cache, and the random
+        authentication key worker processes connect with
+    """
+    authkey = secrets.token_bytes(32)
+    manager = SharedCacheManager(address=("127.0.0.1", 0), authkey=authkey)
+    manager.start()
+    logger.info(f"Shared search cache started at {manager.address[0]}:{manager.address[1]}")
+    return manager, SharedResultCache(manager.get_cache()), authkey
+
+def connect_cache(address: str, authkey: Optional[bytes] = None) -> SharedResultCache:
+    """Connect to a running cache server and get the shared cache"""
+    manager = SharedCacheManager(address=parse_address(address), authkey=authkey or cache_authkey())
+    manager.connect()
+    return SharedResultCache(manager.get_cache())
+
+def serve_cache(address: str, authkey: Optional[bytes] = None):
+    """Run a standalone cache server until interrupted"""
+    manager = SharedCacheManager(address=parse_address(address), authkey=authkey or cache_authkey())
+    server = manager.get_server()
+    logger.info(f"Serving shared search cache on {address}")
+    server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared search cache server")
+    parser.add_argument("--address", default=DEFAULT_CACHE_ADDRESS,
+                        help="host:port to listen on (loopback by default; use a private address to share across hosts)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    serve_cache(args.address)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Live Streaming of Analysis Progress
+
+This module carries progress events of a running analysis from the workforce to the
+caller (the Streamlit app), so each specialist section can be shown as soon as it is
+ready instead of after the whole workforce finishes. Events are published to the stream
+of the current request, found through a context variable that the workforce's async
+tasks inherit.
+
+Section events are always published. Token events are published for specialist agents
+whose model backend streams; CAMEL's Mistral backend does not stream yet, so with it
+sections arrive whole as each specialist finishes.
+"""
+
+import contextvars
+import logging
+import queue
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional
+
+from planning import SECTION_AGENTS
+
+logger = logging.getLogger(__name__)
+
+class StreamEventType(Enum):
+    """Kinds of analysis progress events"""
+    SECTION_STARTED = "section_started"  # a specialist subtask was assigned
+    TOKEN = "token"                      # text generated so far for a section (streaming backends)
+    SECTION_DONE = "section_done"        # a specialist subtask finished with its result
+    DONE = "done"                        # the analysis finished; carries the structured analysis
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """Progress event of a running analysis"""
+    type: StreamEventType
+    section: Optional[str] = None        # query_state.Section value, None if unclassified
+    subtask_id: Optional[str] = None
+    text: str = ""
+    analysis: Optional[Dict[str, Any]] = None
+
+# Section produced by each specialist agent
+AGENT_SECTIONS = {agent_name: section.value for section, agent_name in SECTION_AGENTS.items()}
+
+class AnalysisStream:
+    """Thread-safe event queue between a running analysis and its consumer"""
+
+    def __init__(self):
+        self._events: "queue.Queue[StreamEvent]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+
+    def publish(self, event: StreamEvent):
+        self._events.put(event)
+
+    def close(self, analysis: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None):
+        """Finish the stream with the analysis result, or with the error the analysis raised"""
+        self._error = error
+        self._events.put(StreamEvent(StreamEventType.DONE, analysis=analysis))
+
+    def events(self) -> Iterator[StreamEvent]:
+        """
+        Yield events until the analysis finishes
+
+        Raises:
+            The error the analysis raised, after the final event
+        """
+        while True:
+            event = self._events.get()
+            if event.type == StreamEventType.DONE and self._error is not None:
+                raise self._error
+            yield event
+            if event.type == StreamEventType.DONE:
+                return
+
+# Stream of the request being processed (inherited by the workforce's async tasks)
+_current_stream: contextvars.ContextVar[Optional[AnalysisStream]] = contextvars.ContextVar(
+    "medforce_analysis_stream", default=None
+)
+
+@contextmanager
+def stream_scope(stream: Optional[AnalysisStream]) -> Iterator[Optional[AnalysisStream]]:
+    """Make a stream current for the code (and async tasks) run inside the scope"""
+    token = _current_stream.set(stream)
+    try:
+        yield stream
+    finally:
+        _current_stream.reset(token)
+
+def publish(event: StreamEvent):
+    """Publish an event to the current request's stream (no-op outside a streamed request)"""
+    stream = _current_stream.get()
+    if stream is None:
+        return
+    try:
+        stream.publish(event)
+    except Exception as e:
+        # Streaming must never break the analysis
+        logger.warning(f"Stream event dropped: {e}")
+
+class StreamingMixin:
+    """
+    Mixin for specialist ChatAgent subclasses that publishes streamed model output
+
+    When the model backend streams, astep returns a streaming response; its chunks are
+    passed through to the current request's stream as TOKEN events for the agent's section.
+    Combine with model_routing.ClonePreservingMixin so the workforce's pooled clones keep it.
+    """
+
+    async def astep(self, input_message, *args, **kwargs):
+        response = await super().astep(input_message, *args, **kwargs)
+        if _current_stream.get() is None or not hasattr(response, "__aiter__"):
+            return response
+
+        from camel.agents.chat_agent import AsyncStreamingChatAgentResponse
+
+        section = AGENT_SECTIONS.get(getattr(self, "agent_name", None))
+
+        async def publish_chunks():
+            text = ""
+            async for chunk in response:
+                content = chunk.msg.content if chunk.msg and chunk.msg.content else ""
+                # Backends either accumulate the content or send deltas
+                text = content if content.startswith(text) else text + content
+                publish(StreamEvent(StreamEventType.TOKEN, section=section, text=text))
+                yield chunk
+
+        return AsyncStreamingChatAgentResponse(publish_chunks())
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the tests offline and out of the user's query history
+os.environ.setdefault("MEDFORCE_MODEL_BACKEND", "stub")
+os.environ.setdefault("MEDFORCE_QUERY_HISTORY", "0")
+
+WORKER_REPLY = json.dumps({"content": "Analysis complete.", "failed": False})
+
+@pytest.fixture
+def tier_models():
+    """
+    Route model construction to stub models that record the tier of every call
+
+    Yields:
+        List of the tier values called, in call order
+    """
+    pytest.importorskip("camel")
+    from camel.models.stub_model import StubModel
+    from camel.types import ModelType
+    from model_routing import set_model_factory
+
+    calls = []
+
+    class TierStubModel(StubModel):
+        def __init__(self, tier):
+            super().__init__(ModelType.STUB)
+            self.tier = tier
+
+        def _reply(self, response):
+            calls.append(self.tier.value)
+            response.choices[0].message.content = WORKER_REPLY
+            return response
+
+        def _run(self, messages, response_format=None, tools=None):
+            return self._reply(super()._run(messages, response_format, tools))
+
+        async def _arun(self, messages, response_format=None, tools=None):
+            return self._reply(await super()._arun(messages, response_format, tools))
+
+    set_model_factory(lambda tier, temperature: TierStubModel(tier))
+    try:
+        yield calls
+    finally:
+        set_model_factory(None)
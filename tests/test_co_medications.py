@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from model_routing import ModelRouter, ModelTier
+from planning import parse_structured_query
+from query_state import QueryFields, Section, affected_sections
+
+QUERY = "Medicine: ibuprofen, Age: 70, Other medications: warfarin, omeprazole; lisinopril, Reason: back pain"
+
+def test_co_medications_round_trip():
+    fields = QueryFields("ibuprofen", 70, dosage="400 mg", reason="back pain",
+                         co_medications="warfarin, omeprazole; lisinopril")
+
+    parsed = parse_structured_query(fields.to_query())
+
+    assert parsed == fields
+    assert parsed.co_medication_list() == ["warfarin", "omeprazole", "lisinopril"]
+
+def test_co_medications_change_refreshes_interactions_only():
+    before = QueryFields("ibuprofen", 70, co_medications="warfarin")
+    after = QueryFields("ibuprofen", 70, co_medications="warfarin, aspirin")
+
+    assert affected_sections(before.changed_fields(after)) == [Section.INTERACTIONS, Section.VERIFICATION]
+
+def test_co_medications_escalate():
+    query = QueryFields("ibuprofen", 40, reason="back pain", co_medications="omeprazole").to_query()
+
+    decision = ModelRouter().route(query, cached_evidence=0)
+
+    assert decision.tier == ModelTier.MEDIUM
+    assert decision.reason == "multiple medicines"
+
+class FakeInteractionAgent:
+    def __init__(self):
+        self.calls = []
+
+    def analyze_interaction_matrix(self, medications, additional_context=""):
+        self.calls.append((list(medications), additional_context))
+        return "ibuprofen + warfarin: bleeding risk"
+
+@pytest.fixture
+def posted_tasks(monkeypatch, tier_models):
+    import agents
+    import main
+
+    posted = []
+
+    async def record_post(self, task, assignee_id):
+        posted.append(task.content)
+
+    workforce = main.create_pharmacy_workforce()
+    interaction_agent = FakeInteractionAgent()
+    monkeypatch.setitem(agents.COORDINATED_AGENTS, "WebSearchAgent", interaction_agent)
+    monkeypatch.setattr(main.Workforce, "_post_task", record_post)
+    yield workforce, interaction_agent, posted
+
+def make_subtask(section, user_query):
+    from camel.tasks import Task
+    from prompts import FAST_PATH_SUBTASK_TEMPLATES
+
+    content = FAST_PATH_SUBTASK_TEMPLATES[section.value].format(user_query=user_query)
+    return Task(content=content, id="1.3", additional_info={"user_query": user_query})
+
+def test_interactions_subtask_gets_matrix_once(posted_tasks):
+    workforce, interaction_agent, posted = posted_tasks
+    task = make_subtask(Section.INTERACTIONS, QUERY)
+
+    for _ in range(2):
+        asyncio.run(workforce._post_task(task, "worker"))
+
+    assert interaction_agent.calls == [(["ibuprofen", "warfarin", "omeprazole", "lisinopril"], "back pain")]
+    assert posted[0].endswith("ibuprofen + warfarin: bleeding risk")
+    assert posted[1] == posted[0]
+
+@pytest.mark.parametrize("section, user_query", [
+    (Section.INTERACTIONS, "Medicine: ibuprofen, Age: 70, Reason: back pain"),
+    (Section.DOSAGE, QUERY),
+])
+def test_matrix_only_for_interactions_with_co_medications(posted_tasks, section, user_query):
+    workforce, interaction_agent, posted = posted_tasks
+    task = make_subtask(section, user_query)
+    content = task.content
+
+    asyncio.run(workforce._post_task(task, "worker"))
+
+    assert interaction_agent.calls == []
+    assert posted == [content]
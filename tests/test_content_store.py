@@ -0,0 +1,70 @@
+import gc
+import pickle
+import time
+
+import content_store
+from content_store import SHARE_MIN_CHARS, ContentStore, content_digest
+from search_coordinator import CompactSearchResult, InformationType
+
+PAYLOAD = "Ibuprofen 200 mg to 400 mg every 4 to 6 hours as needed.\n" * 20
+
+def compact(content, store, compress_threshold=None, source="fda"):
+    return CompactSearchResult("ibuprofen dosage", source, content, time.time(), "DosageAgent",
+                               InformationType.DOSAGE, compress_threshold=compress_threshold,
+                               content_store=store)
+
+def test_first_copy_inline_repeats_shared():
+    store = ContentStore()
+
+    first, second, third = (compact(PAYLOAD, store, source=source) for source in ("fda", "mayo", "medline"))
+
+    assert first.content_blob is None
+    assert second.content_blob is not None and second.content_blob is third.content_blob
+    assert first.content == second.content == third.content == PAYLOAD
+    assert store.get_stats()["stored"] == 1 and store.get_stats()["deduplicated"] == 1
+
+def test_short_payloads_stay_inline():
+    store = ContentStore()
+    short = "x" * (SHARE_MIN_CHARS - 1)
+
+    assert store.share(short) is None and store.share(short) is None
+    assert len(store) == 0
+
+def test_compressed_blob():
+    store = ContentStore()
+
+    blob = store.put(PAYLOAD, compress_threshold=100)
+
+    assert blob.compressed and blob.stored_size < len(PAYLOAD)
+    assert blob.text == PAYLOAD
+    assert store.share(PAYLOAD) is blob
+
+def test_blobs_are_released_with_their_results():
+    store = ContentStore()
+    blob = store.put(PAYLOAD)
+    digest = blob.digest
+
+    del blob
+    gc.collect()
+
+    assert store.get(digest) is None
+
+def test_unpickled_blob_is_interned(monkeypatch):
+    store = ContentStore()
+    monkeypatch.setattr(content_store, "_content_store", store)
+    blob = store.put(PAYLOAD)
+
+    restored = pickle.loads(pickle.dumps(blob))
+
+    assert restored is blob
+    assert restored.digest == content_digest(PAYLOAD)
+
+def test_seen_filter_is_cleared_when_half_full(monkeypatch):
+    monkeypatch.setattr(content_store, "SEEN_FILTER_BITS", 64)
+    store = ContentStore()
+    payloads = [f"{index} {PAYLOAD}" for index in range(64)]
+
+    for payload in payloads:
+        store.share(payload)
+
+    assert store._seen_count <= 32
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from deadline import Deadline, deadline_scope
+
+def test_deadline_allows_work_that_fits():
+    deadline = Deadline(10)
+
+    assert deadline.allows(1.0)
+    assert not deadline.allows(60.0)
+    assert not Deadline(0).allows(None)
+
+@pytest.fixture
+def search_tool():
+    pytest.importorskip("camel")
+    from camel.toolkits import FunctionTool
+
+    calls = []
+
+    def search_wiki(entity: str) -> str:
+        """Search Wikipedia for an entity.
+
+        Args:
+            entity (str): Entity to search for.
+        """
+        calls.append(entity)
+        if entity == "slow":
+            time.sleep(0.5)
+        return f"article about {entity}"
+
+    yield FunctionTool(search_wiki), calls
+
+def test_bounded_tool_runs_outside_a_request(search_tool):
+    from search_coordinator import deadline_bounded_tool
+
+    tool, calls = search_tool
+    bounded = deadline_bounded_tool(tool)
+
+    assert bounded(entity="ibuprofen") == "article about ibuprofen"
+    assert bounded.get_openai_tool_schema() == tool.get_openai_tool_schema()
+
+def test_bounded_tool_skips_calls_after_the_deadline(search_tool):
+    from search_coordinator import DEADLINE_SKIPPED_MESSAGE, deadline_bounded_tool
+
+    tool, calls = search_tool
+    with deadline_scope(Deadline(0)):
+        assert deadline_bounded_tool(tool)(entity="ibuprofen") == DEADLINE_SKIPPED_MESSAGE
+    assert calls == []
+
+def test_bounded_tool_abandons_calls_at_the_deadline(search_tool):
+    from search_coordinator import DEADLINE_SKIPPED_MESSAGE, deadline_bounded_tool
+
+    tool, _ = search_tool
+    started = time.monotonic()
+    with deadline_scope(Deadline(0.05)):
+        result = deadline_bounded_tool(tool)(entity="slow")
+
+    assert result == DEADLINE_SKIPPED_MESSAGE
+    assert time.monotonic() - started < 0.4
+
+def test_cloned_agent_keeps_bounded_tool(search_tool, tier_models):
+    from camel.agents import ChatAgent
+    from model_routing import create_role_model
+    from search_coordinator import deadline_bounded_tool
+
+    tool, _ = search_tool
+    agent = ChatAgent(system_message="You are a pharmacist.", model=create_role_model("ValidatorAgent", 0.2),
+                      tools=[deadline_bounded_tool(tool)])
+
+    clone = agent.clone(with_memory=False)
+
+    with deadline_scope(Deadline(0)):
+        assert "deadline" in clone.tool_dict["search_wiki"](entity="ibuprofen")
+
+def test_queue_wait_counts_against_the_budget(monkeypatch):
+    pytest.importorskip("camel")
+    from main import analyze_pharmacy_query, request_deadline
+
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    deadline = request_deadline(30)
+    time.sleep(0.1)
+
+    analysis = analyze_pharmacy_query("Medicine: ibuprofen, Age: 40", deadline=deadline)
+
+    assert analysis["timings"]["queued_s"] >= 0.1
+    assert analysis["elapsed_s"] >= 0.1
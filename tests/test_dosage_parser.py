@@ -0,0 +1,79 @@
+import pytest
+
+import dosage_parser
+from dosage_parser import (
+    DoseBasis, check_doses_batch, check_dosage_pairs, evaluate_dose, parse_dosage,
+    parse_recommended_limits, parse_user_dose,
+)
+
+ANALYSIS = "Take 200-400 mg every 4 to 6 hours as needed. Maximum Daily Dose: 1,200 mg."
+
+@pytest.mark.parametrize("text, value, unit, per_day", [
+    ("500mg twice daily", 500, "mg", 1000),
+    ("0.5 g", 500, "mg", None),
+    ("250 mcg", 0.25, "mg", None),
+    ("2 tablets 3 times a day", 2, "tablet", 6),
+    ("5 ml every 6 hours", 5, "ml", 20),
+    ("4,000 mg per day", 4000, "mg", 4000),
+])
+def test_user_dose_in_canonical_units(text, value, unit, per_day):
+    dose = parse_user_dose(text)
+
+    assert dose.value == pytest.approx(value) and dose.unit == unit
+    assert dose.daily_total() == (pytest.approx(per_day) if per_day is not None else None)
+
+def test_range_and_weight_based_doses():
+    ranged, weighted = parse_dosage("325-650 mg, or 10 mg/kg")
+
+    assert (ranged.low, ranged.value) == (325, 650)
+    assert weighted.unit == "mg/kg"
+
+def test_recommended_limits():
+    limits = parse_recommended_limits(ANALYSIS)
+
+    assert limits.max_single.value == 400
+    assert limits.max_daily.value == 1200 and limits.max_daily.basis is DoseBasis.PER_DAY
+
+def test_labelled_single_dose_limit_takes_precedence():
+    limits = parse_recommended_limits("Usual dose 500 mg. Maximum single dose: 1000 mg. Up to 2000 mg twice daily.")
+
+    assert limits.max_single.value == 1000
+
+@pytest.mark.parametrize("user_text, warnings", [
+    ("400 mg", []),
+    ("500 mg", [("single_dose", "moderate")]),
+    ("800 mg", [("single_dose", "high")]),
+    ("400 mg four times daily", [("daily_dose", "critical")]),
+])
+def test_evaluate_dose(user_text, warnings):
+    found = evaluate_dose(parse_user_dose(user_text), parse_recommended_limits(ANALYSIS))
+
+    assert [(warning["type"], warning["severity"]) for warning in found] == warnings
+
+def test_tablet_count_uses_stated_strength():
+    limits = parse_recommended_limits("Available as 500 mg tablets. Maximum single dose: 1,000 mg. "
+                                      "Do not exceed 4,000 mg per day.")
+    user_dose = parse_user_dose("3 tablets 3 times daily")
+
+    dose = user_dose.in_units_of(limits.strength_for("tablet"))
+
+    assert (dose.value, dose.unit, dose.daily_total()) == (1500, "mg", 4500)
+    assert [warning["type"] for warning in evaluate_dose(user_dose, limits)] == ["single_dose", "daily_dose"]
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_check_matches_single_checks(monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(dosage_parser, "np", None)
+    nan = float("nan")
+
+    severities = check_doses_batch([400, 500, 800, 400, nan], [nan, nan, nan, 1600, nan],
+                                   [400, 400, 400, 400, 400], [1200, 1200, 1200, 1200, 1200])
+
+    assert severities == [None, "moderate", "high", "critical", None]
+
+def test_dosage_pairs():
+    pairs = [("400 mg", ANALYSIS), ("800 mg", ANALYSIS), ("2 puffs", ANALYSIS), ("10 ml", ANALYSIS)]
+
+    assert check_dosage_pairs(pairs) == [None, "high", None, None]
@@ -0,0 +1,41 @@
+import pytest
+
+from keyword_classifier import MEDICAL_LINE_CATEGORIES, KeywordClassifier, get_line_classifier
+
+LINES = [
+    "",
+    "Take 400 mg twice daily with food.",
+    "Serious side effects: severe bleeding, call emergency services.",
+    "FDA safety communication: recall of contaminated lots.",
+    "Avoid use with warfarin; monitor INR and adjust the dose.",
+    "Common and mild headache or nausea is temporary.",
+    "Drug-drug INTERACTION with aspirin is contraindicated.",
+    "no keywords in this line",
+]
+
+def expected_labels(text):
+    text = text.lower()
+    return [label for label, keywords in MEDICAL_LINE_CATEGORIES.items()
+            if any(keyword in text for keyword in keywords)]
+
+@pytest.mark.parametrize("line", LINES)
+def test_matches_keyword_substring_checks(line):
+    classifier = get_line_classifier()
+
+    assert classifier.labels(classifier.classify(line)) == expected_labels(line)
+
+def test_overlapping_keywords():
+    classifier = KeywordClassifier({"short": ["dose"], "long": ["dosage"], "inner": ["sag"]})
+
+    bits = classifier.classify("Dosage")
+
+    assert classifier.labels(bits) == ["long", "inner"]
+    assert classifier.labels(classifier.classify("overdose")) == ["short"]
+
+def test_classify_lines_and_has():
+    classifier = get_line_classifier()
+
+    dosage, serious = classifier.classify_lines(LINES[1:3])
+
+    assert classifier.has(dosage, "dosage") and not classifier.has(dosage, "serious")
+    assert classifier.has(serious, "serious") and classifier.has(serious, "symptom")
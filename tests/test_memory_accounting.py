@@ -0,0 +1,26 @@
+from memory_accounting import MemoryTracker, deep_sizeof
+
+def test_deep_sizeof_counts_shared_objects_once():
+    payload = "x" * 1000
+    seen = set()
+
+    first = deep_sizeof({"a": payload}, seen)
+    second = deep_sizeof({"b": payload}, seen)
+
+    assert first > len(payload)
+    assert second < len(payload)
+
+def test_deep_sizeof_walks_slots():
+    class Slotted:
+        __slots__ = ("value",)
+
+        def __init__(self, value):
+            self.value = value
+
+    assert deep_sizeof(Slotted("y" * 1000)) > 1000
+
+def test_disabled_tracker_reports_disabled():
+    tracker = MemoryTracker(enabled=False)
+    tracker.request_finished()
+
+    assert tracker.get_stats() == {"enabled": False}
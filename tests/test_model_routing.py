@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from model_routing import (
+    ClonePreservingMixin, ModelRouter, ModelTier, RoutingDecision, create_role_model,
+    install_router, routing_scope,
+)
+
+def make_routed_agent(role="DosageAgent"):
+    from camel.agents import ChatAgent
+
+    class RoutedAgent(ClonePreservingMixin, ChatAgent):
+        pass
+
+    agent = RoutedAgent(system_message="You are a pharmacist.", model=create_role_model(role, temperature=0.4))
+    agent.agent_name = role
+    install_router(agent, role)
+    return agent
+
+def run_worker_task(agent, tier):
+    from camel.societies.workforce.single_agent_worker import SingleAgentWorker
+    from camel.tasks import Task
+    from camel.tasks.task import TaskState
+
+    worker = SingleAgentWorker("Dosage specialist", worker=agent)
+    task = Task(content="Recommended dose of ibuprofen for a 30 year old", id="1")
+
+    async def process():
+        with routing_scope(RoutingDecision(tier, "test")):
+            return await worker._process_task(task, [])
+
+    assert asyncio.run(process()) == TaskState.DONE
+
+@pytest.mark.parametrize("tier", list(ModelTier))
+def test_cloned_worker_uses_routed_tier(tier_models, tier):
+    agent = make_routed_agent()
+
+    for _ in range(2):
+        run_worker_task(agent, tier)
+
+    assert tier_models == [tier.value, tier.value]
+
+def test_clone_keeps_subclass_attributes_and_router(tier_models):
+    agent = make_routed_agent()
+
+    clone = agent.clone(with_memory=False)
+
+    assert type(clone) is type(agent)
+    assert clone.agent_name == "DosageAgent"
+    assert clone.model_backend.scheduling_strategy.__name__ == "tier_router"
+
+def test_fixed_tier_role_is_not_routed(tier_models):
+    agent = make_routed_agent("ValidatorAgent")
+
+    run_worker_task(agent.clone(), ModelTier.SMALL)
+
+    assert tier_models == [ModelTier.MEDIUM.value]
+
+@pytest.mark.parametrize("query, tier", [
+    ("Medicine: ibuprofen, Age: 30, Dosage: 400 mg, Reason: headache", ModelTier.SMALL),
+    ("Medicine: ibuprofen, Age: 8, Dosage: 200 mg, Reason: fever", ModelTier.MEDIUM),
+    ("Medicine: ibuprofen, Age: 70, Dosage: 200 mg, Reason: back pain", ModelTier.MEDIUM),
+    ("Medicine: ibuprofen + paracetamol, Age: 30, Dosage: 400 mg, Reason: headache", ModelTier.MEDIUM),
+    ("Can I take ibuprofen while pregnant?", ModelTier.MEDIUM),
+    ("What is the dose of ibuprofen for my 5 year old?", ModelTier.MEDIUM),
+])
+def test_router_tiers(query, tier):
+    assert ModelRouter().route(query, cached_evidence=0).tier == tier
+
+def test_free_form_query_with_cached_evidence_uses_small_model():
+    assert ModelRouter().route("What is ibuprofen used for?", cached_evidence=2).tier == ModelTier.SMALL
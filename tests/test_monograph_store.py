@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from monograph_store import MonographStore, load_openfda_labels
+
+IBUPROFEN = {"dosage_and_administration": "Adults: 200 mg to 400 mg every 4 to 6 hours.",
+             "adverse_reactions": "Nausea, dyspepsia and gastrointestinal bleeding.",
+             "drug_interactions": "Warfarin increases the risk of bleeding."}
+
+@pytest.fixture
+def store():
+    store = MonographStore(":memory:")
+    store.add_monograph("ibu-1", ["ibuprofen", "Advil", "Pain Relief"], IBUPROFEN, generic_names=["ibuprofen"])
+    store.add_monograph("apap-1", ["acetaminophen", "Tylenol", "Pain Relief"],
+                        {"dosage_and_administration": "Do not exceed 4,000 mg in 24 hours."},
+                        generic_names=["acetaminophen"])
+    yield store
+    store.close()
+
+@pytest.mark.parametrize("query, drug", [
+    ("ibuprofen dosage for adults", "ibuprofen"),
+    ("pain relief with ibuprofen", "ibuprofen"),
+    ("Advil side effects", "advil"),
+    ("pain relief dosage", None),
+    ("Advil or Tylenol", None),
+    ("naproxen dosage", None),
+])
+def test_resolve_drug(store, query, drug):
+    assert store.resolve_drug(query) == drug
+
+def test_lookup_returns_sections_for_info_type(store):
+    text = store.lookup("Advil interactions", info_type="interactions")
+
+    assert text.startswith("Drug label: Ibuprofen")
+    assert "Warfarin increases the risk of bleeding." in text
+    assert "Nausea" not in text
+    assert store.lookup("naproxen dosage", info_type="dosage") == ""
+
+def test_newest_label_of_a_name_wins(store):
+    store.add_monograph("ibu-2", ["ibuprofen"], {"dosage_and_administration": "Updated label dosing."},
+                        generic_names=["ibuprofen"], effective_time="20990101")
+
+    assert "Updated label dosing." in store.lookup("ibuprofen", info_type="dosage")
+
+def test_search_text(store):
+    hits = store.search_text("warfarin bleeding", info_type="interactions")
+
+    assert [(hit["title"], hit["section"]) for hit in hits] == [("Ibuprofen", "drug_interactions")]
+    assert store.search_text("warfarin", info_type="dosage") == []
+
+def test_load_openfda_labels(tmp_path):
+    dump = tmp_path / "labels.json"
+    dump.write_text(json.dumps({"results": [
+        {"set_id": "nap-1", "effective_time": "20240101",
+         "openfda": {"generic_name": ["NAPROXEN"], "brand_name": ["ALEVE"]},
+         "dosage_and_administration": ["220 mg every 8 to 12 hours.", "Do not exceed 660 mg in 24 hours."]},
+        {"set_id": "no-names", "dosage_and_administration": ["Unnamed label."]},
+    ]}))
+    store = MonographStore(":memory:")
+
+    assert load_openfda_labels(store, [str(dump)]) == 1
+    assert "Do not exceed 660 mg in 24 hours." in store.lookup("Aleve dosage", info_type="dosage")
+    store.close()
@@ -0,0 +1,44 @@
+import pytest
+
+import planning
+from planning import PlanCache, query_shape
+
+@pytest.fixture(autouse=True)
+def no_monograph_store(monkeypatch):
+    monkeypatch.setattr(planning, "get_monograph_store", lambda: None)
+
+def test_queries_of_one_shape_share_a_key():
+    first = query_shape("What is the dose of ibuprofen for a 40 year old taking 200 mg?")
+    second = query_shape("What is the dose of naproxen for a 65 year old taking 220 mg?")
+
+    assert first.key == second.key == "what is the dose of {drug} for a {age} year old taking {dose1}?"
+    assert dict(second.values) == {"{drug}": "naproxen", "{age}": "65", "{dose1}": "220 mg"}
+
+def test_plan_templates_round_trip_between_queries():
+    first = query_shape("What is the dose of ibuprofen for a 40 year old?")
+    second = query_shape("What is the dose of naproxen for a 65 year old?")
+
+    template = first.templatize("Find the Ibuprofen dosing limits for age 40")
+
+    assert template == "Find the {drug} dosing limits for age {age}"
+    assert first.is_reusable(template)
+    assert second.instantiate(template) == "Find the naproxen dosing limits for age 65"
+
+def test_templates_with_query_values_are_not_reusable():
+    shape = query_shape("What is the dose of ibuprofen for a 40 year old?")
+
+    assert not shape.is_reusable("Find the {drug} dose for a patient aged forty (40)")
+    assert not shape.is_reusable("Check the {drug} dose against 3200 mg")
+
+def test_plan_cache_lru_and_ttl(monkeypatch):
+    cache = PlanCache(max_entries=2, ttl=60)
+    cache.put("a", ["plan a"])
+    cache.put("b", ["plan b"])
+    assert cache.get("a") == ("plan a",)
+
+    cache.put("c", ["plan c"])
+    assert cache.get("b") is None and cache.get("a") == ("plan a",)
+
+    now = planning.time.time()
+    monkeypatch.setattr(planning.time, "time", lambda: now + 60)
+    assert cache.get("a") is None
@@ -0,0 +1,62 @@
+import pytest
+
+from dosage_parser import parse_user_dose
+from model_routing import ModelRouter, ModelTier
+from planning import build_fast_path_plan, parse_structured_query
+from query_state import QueryFields, Section
+
+@pytest.mark.parametrize("fields", [
+    QueryFields("ibuprofen", 40),
+    QueryFields("ibuprofen", 40, dosage="400 mg"),
+    QueryFields("ibuprofen", 40, dosage="1,000 mg", reason="back pain"),
+    QueryFields("ibuprofen", 40, dosage="400 mg, twice daily", reason="pain, since Monday"),
+    QueryFields("ibuprofen, paracetamol", 40, reason="fever"),
+])
+def test_structured_query_round_trip(fields):
+    assert parse_structured_query(fields.to_query()) == fields
+
+@pytest.mark.parametrize("query", [
+    "",
+    "What is the dose of ibuprofen?",
+    "Medicine: ibuprofen",
+    "Medicine: ibuprofen, Age: forty",
+])
+def test_free_form_queries_are_not_structured(query):
+    assert parse_structured_query(query) is None
+
+@pytest.mark.parametrize("dosage, value, per_day", [
+    ("1,000 mg", 1000, None),
+    ("400 mg, twice daily", 400, 800),
+])
+def test_dosage_with_commas_reaches_dose_check(dosage, value, per_day):
+    fields = parse_structured_query(f"Medicine: ibuprofen, Age: 40, Dosage: {dosage}, Reason: pain")
+
+    dose = parse_user_dose(fields.dosage)
+
+    assert dose.value == value and dose.unit == "mg"
+    assert dose.daily_total() == per_day
+
+def test_comma_separated_medicines_escalate():
+    decision = ModelRouter().route("Medicine: ibuprofen, paracetamol, Age: 40, Reason: fever", cached_evidence=0)
+
+    assert decision.tier == ModelTier.MEDIUM
+    assert decision.reason == "multiple medicines"
+
+def test_fast_path_plan_keeps_comma_dosage(monkeypatch):
+    monkeypatch.setenv("MEDFORCE_FAST_PATH_PLANNER", "1")
+    query = "Medicine: ibuprofen, Age: 40, Dosage: 400 mg, twice daily, Reason: pain"
+
+    plan = build_fast_path_plan(query)
+
+    assert [subtask.section for subtask in plan] == [Section.DOSAGE, Section.SAFETY, Section.INTERACTIONS,
+                                                     Section.VERIFICATION]
+    assert plan[-1].depends_on == (Section.DOSAGE, Section.SAFETY, Section.INTERACTIONS)
+    assert all(query in subtask.content for subtask in plan)
+
+def test_fast_path_plan_limited_to_sections(monkeypatch):
+    monkeypatch.setenv("MEDFORCE_FAST_PATH_PLANNER", "1")
+
+    plan = build_fast_path_plan("Medicine: ibuprofen, Age: 40", sections=["verification", "dosage_analysis"])
+
+    assert [subtask.section for subtask in plan] == [Section.DOSAGE, Section.VERIFICATION]
+    assert plan[1].depends_on == (Section.DOSAGE,)
@@ -0,0 +1,53 @@
+import time
+
+from query_history import QueryHistoryStore, get_query_history, history_enabled
+
+def analysis(query="Medicine: Ibuprofen, Age: 40, Reason: back pain", status="success"):
+    return {"query": query, "status": status, "elapsed_s": 1.5, "timings": {"workforce_s": 1.2},
+            "search_activity": {"local_hits": 1, "web_searches": 2, "sources": {"fda": 1}}}
+
+def test_history_is_opt_in(monkeypatch):
+    monkeypatch.delenv("MEDFORCE_QUERY_HISTORY", raising=False)
+
+    assert not history_enabled()
+    assert get_query_history() is None
+
+def test_query_text_left_out_by_default(monkeypatch):
+    monkeypatch.delenv("MEDFORCE_QUERY_HISTORY_STORE_QUERIES", raising=False)
+    store = QueryHistoryStore(":memory:")
+    try:
+        store.record(analysis())
+        store.flush()
+
+        [record] = store.find()
+    finally:
+        store.close()
+
+    assert record["query"] == ""
+    assert record["medication"] == "ibuprofen"
+    assert record["timings"] == {"workforce_s": 1.2}
+
+def test_query_text_stored_when_enabled():
+    store = QueryHistoryStore(":memory:", store_queries=True)
+    try:
+        store.record(analysis())
+        store.flush()
+
+        assert store.find()[0]["query"] == analysis()["query"]
+    finally:
+        store.close()
+
+def test_rows_past_retention_are_deleted(monkeypatch):
+    import query_history
+
+    monkeypatch.setattr(query_history, "PRUNE_INTERVAL_S", 0.0)
+    store = QueryHistoryStore(":memory:", retention_days=1, store_queries=False)
+    try:
+        store._rows.put((time.time() - 2 * 86400, analysis(status="old")))
+        store.record(analysis())
+        store.flush()
+
+        assert [record["status"] for record in store.find()] == ["success"]
+        assert store.get_stats()["expired"] == 1
+    finally:
+        store.close()
@@ -0,0 +1,46 @@
+from query_state import QueryFields, QueryState, Section, classify_subtask
+
+def subtask(content, result, state="DONE"):
+    return {"id": content[:10], "content": content, "result": result, "state": state}
+
+ANALYSIS = {"response": "Full analysis", "status": "completed", "subtasks": [
+    subtask("Dosage analysis for ibuprofen", "400 mg every 6 hours"),
+    subtask("Side effect analysis for ibuprofen", "Nausea"),
+    subtask("Drug interaction research for ibuprofen", "Avoid with warfarin"),
+    subtask("Verification of the dosage and side effect findings", "Verified"),
+]}
+
+def test_verification_subtasks_classified_first():
+    assert classify_subtask("Verification of the dosage and side effect findings") is Section.VERIFICATION
+    assert classify_subtask("Summarize the findings") is None
+
+def test_dosage_change_refreshes_nothing():
+    state = QueryState.from_analysis(QueryFields("ibuprofen", 40, dosage="400 mg"), ANALYSIS)
+
+    assert state.sections_to_refresh(QueryFields("ibuprofen", 40, dosage="800 mg")) == []
+
+def test_age_change_refreshes_dependent_sections():
+    state = QueryState.from_analysis(QueryFields("ibuprofen", 40), ANALYSIS)
+
+    assert state.sections_to_refresh(QueryFields("ibuprofen", 70)) == [Section.DOSAGE, Section.SAFETY,
+                                                                       Section.VERIFICATION]
+
+def test_missing_sections_are_refreshed():
+    analysis = dict(ANALYSIS, subtasks=ANALYSIS["subtasks"][:1] + [
+        subtask("Side effect analysis for ibuprofen", "", state="FAILED")])
+    state = QueryState.from_analysis(QueryFields("ibuprofen", 40), analysis)
+
+    assert state.sections_to_refresh(QueryFields("ibuprofen", 40)) == [Section.SAFETY, Section.INTERACTIONS,
+                                                                       Section.VERIFICATION]
+
+def test_merge_replaces_refreshed_sections_only():
+    state = QueryState.from_analysis(QueryFields("ibuprofen", 40), ANALYSIS)
+    fields = QueryFields("ibuprofen", 40, reason="fever")
+    partial = {"response": "Partial", "status": "completed", "subtasks": [
+        subtask("Dosage analysis for ibuprofen", "200 mg for fever")]}
+
+    merged = state.merge(fields, partial, [Section.DOSAGE, Section.INTERACTIONS])
+
+    assert merged.fields == fields
+    assert merged.sections == {Section.DOSAGE: "200 mg for fever", Section.SAFETY: "Nausea",
+                               Section.VERIFICATION: "Verified"}
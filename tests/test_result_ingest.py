@@ -0,0 +1,50 @@
+import time
+
+import search_coordinator
+from content_store import ContentStore
+from search_coordinator import (
+    CompactSearchResult, InformationType, SearchResult, classify_content_lines, ingest_result,
+)
+
+PAYLOAD = ("Ibuprofen dosage: 200 mg to 400 mg every 4 to 6 hours.\n"
+           "  Serious bleeding may occur; seek emergency care.\n"
+           "FDA safety communication about heart attack risk.\n") * 10
+
+def compact(store, compress_threshold=None, source="fda"):
+    return CompactSearchResult("ibuprofen dosage", source, PAYLOAD, time.time(), "DosageAgent",
+                               InformationType.DOSAGE, compress_threshold=compress_threshold,
+                               content_store=store)
+
+def test_compact_result_rebuilds_line_records():
+    store = ContentStore()
+    result = compact(store, compress_threshold=100)
+
+    ingest_result(result, PAYLOAD, store)
+
+    assert result.compressed
+    assert result.line_records == classify_content_lines(PAYLOAD)
+    assert result.line_records[1].text == "Serious bleeding may occur; seek emergency care."
+    assert result.line_records[1].has("serious") and not result.line_records[1].has("regulatory")
+
+def test_regular_result_gets_line_records():
+    result = SearchResult("ibuprofen dosage", "fda", PAYLOAD, time.time(), "DosageAgent", InformationType.DOSAGE)
+
+    ingest_result(result, PAYLOAD, ContentStore())
+
+    assert result.line_records == classify_content_lines(PAYLOAD)
+
+def test_shared_payload_is_classified_once(monkeypatch):
+    store = ContentStore()
+    classified = []
+    classify = search_coordinator.classify_line_labels
+    monkeypatch.setattr(search_coordinator, "classify_line_labels",
+                        lambda content: classified.append(content) or classify(content))
+    results = [compact(store, source=source) for source in ("fda", "mayo", "medline")]
+
+    for result in results:
+        ingest_result(result, PAYLOAD, store)
+
+    # The first copy is held inline; the two sharing a blob share its labels
+    assert len(classified) == 2
+    assert results[1].line_labels is results[2].line_labels
+    assert all(result.line_records == classify_content_lines(PAYLOAD) for result in results)
@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from deadline import Deadline
+from scheduler import Priority, RequestScheduler, RequestShed, SingleFlight, normalize_query
+
+@pytest.fixture
+def scheduler():
+    scheduler = RequestScheduler(max_concurrent=1, max_queued=2, max_queue_wait=None, name="test")
+    yield scheduler
+    scheduler.shutdown()
+
+def block(scheduler):
+    """Occupy the scheduler's only run slot until the returned event is set"""
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    scheduler.submit(hold)
+    assert started.wait(5)
+    return release
+
+def test_queued_requests_run_by_priority(scheduler):
+    release = block(scheduler)
+    order = []
+    batch = scheduler.submit(order.append, "batch", priority=Priority.BATCH)
+    urgent = scheduler.submit(order.append, "urgent", priority=Priority.URGENT)
+
+    release.set()
+    batch.result(5), urgent.result(5)
+
+    assert order == ["urgent", "batch"]
+
+def test_full_queue_sheds_to_fallback(scheduler):
+    release = block(scheduler)
+    scheduler.submit(str, priority=Priority.URGENT)
+    scheduler.submit(str, priority=Priority.URGENT)
+
+    shed = scheduler.submit(str, priority=Priority.NORMAL, fallback=lambda: "fallback")
+    no_fallback = scheduler.submit(str, priority=Priority.NORMAL)
+    release.set()
+
+    assert shed.result(5) == "fallback"
+    with pytest.raises(RequestShed):
+        no_fallback.result(5)
+    assert scheduler.get_stats()["shed_queue_full"] == 2
+
+def test_urgent_request_displaces_batch(scheduler):
+    release = block(scheduler)
+    scheduler.submit(str, priority=Priority.NORMAL)
+    batch = scheduler.submit(str, priority=Priority.BATCH, fallback=lambda: "displaced")
+
+    urgent = scheduler.submit(lambda: "ran", priority=Priority.URGENT)
+    release.set()
+
+    assert batch.result(5) == "displaced"
+    assert urgent.result(5) == "ran"
+
+def test_request_whose_deadline_ran_out_in_queue_is_shed(scheduler):
+    release = block(scheduler)
+    ran = []
+    expired = scheduler.submit(ran.append, "expired", deadline=Deadline(0), fallback=lambda: "shed")
+    live = scheduler.submit(ran.append, "live", deadline=Deadline(30))
+
+    release.set()
+
+    assert expired.result(5) == "shed"
+    live.result(5)
+    assert ran == ["live"]
+    assert scheduler.get_stats()["shed_deadline"] == 1
+
+def test_single_flight_coalesces_identical_requests():
+    flight = SingleFlight(name="test")
+    run: Future = Future()
+    starts = []
+
+    def start():
+        starts.append(1)
+        return run
+
+    first, leader = flight.submit("ibuprofen", start)
+    second, follower = flight.submit("ibuprofen", start)
+    run.set_result("analysis")
+
+    assert (leader, follower) == (True, False)
+    assert first.result(5) == second.result(5) == "analysis"
+    assert starts == [1]
+    assert flight.get_stats()["in_flight"] == 0
+
+def test_single_flight_starts_new_run_for_higher_priority():
+    flight = SingleFlight(name="test")
+    batch_run, urgent_run = Future(), Future()
+
+    flight.submit("ibuprofen", lambda: batch_run, Priority.BATCH)
+    urgent, leader = flight.submit("ibuprofen", lambda: urgent_run, Priority.URGENT)
+    joined, joined_leader = flight.submit("ibuprofen", lambda: Future(), Priority.NORMAL)
+
+    assert leader and not joined_leader
+    urgent_run.set_result("urgent")
+    assert joined.result(5) == "urgent"
+
+def test_normalize_query():
+    assert normalize_query("  Ibuprofen   dose?  ") == normalize_query("ibuprofen dose") == "ibuprofen dose"
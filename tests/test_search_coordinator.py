@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from search_coordinator import SOURCE_SITE_FILTERS, InformationType, SearchCoordinator
+
+class FakeSearchTool:
+    """Search tool that answers instantly, except for queries sent to the slow source"""
+
+    def __init__(self, slow_source=None, delay=1.0):
+        self.slow_filter = SOURCE_SITE_FILTERS.get(slow_source)
+        self.delay = delay
+
+    def run(self, query):
+        if self.slow_filter and query.startswith(self.slow_filter):
+            time.sleep(self.delay)
+        return f"Ibuprofen 200 mg to 400 mg every 4 to 6 hours.\nResult for {query}"
+
+@pytest.fixture
+def coordinator():
+    coordinator = SearchCoordinator(cache_ttl=60, max_concurrent_requests=2)
+    for spec in coordinator.sources.values():
+        spec.rate_limit = 0.0
+    return coordinator
+
+def test_concurrent_requests_fire_hedges(coordinator):
+    for source in coordinator.sources:
+        for _ in range(coordinator.hedge_min_samples):
+            coordinator._record_source_outcome(source, 0.02, True)
+    tool = FakeSearchTool(slow_source="FDA")
+    results = []
+
+    def search(agent):
+        results.append(coordinator._hedged_search(agent, f"ibuprofen {agent}", "FDA",
+                                                  InformationType.INTERACTIONS, tool, exclude={"FDA"}))
+
+    # Two requests' worth of agents searching the slow source at once
+    threads = [threading.Thread(target=search, args=(f"agent{i}",)) for i in range(8)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert time.monotonic() - started < 0.8
+    assert len(results) == 8 and all(result.success and result.source != "FDA" for result in results)
+    assert coordinator.hedge_stats == {"issued": 8, "backup_won": 8}
+
+def test_no_hedge_without_latency_history(coordinator):
+    result = coordinator._hedged_search("DosageAgent", "ibuprofen", "FDA", InformationType.DOSAGE,
+                                        FakeSearchTool(), exclude={"FDA"})
+
+    assert result.success and result.source == "FDA"
+    assert coordinator.hedge_stats["issued"] == 0
+
+def record_history(coordinator, source, searches, latency=0.5):
+    for _ in range(searches):
+        coordinator._record_source_outcome(source, latency, True)
+
+def test_exploration_gives_last_slot_to_least_tried_source(coordinator):
+    coordinator.exploration_rate = 1.0
+    candidates = coordinator._get_optimal_sources(InformationType.GENERAL, limit=10)
+    for source in candidates[:-1]:
+        record_history(coordinator, source, 10)
+
+    selected = coordinator._get_optimal_sources(InformationType.GENERAL, limit=2)
+
+    assert selected[-1] == candidates[-1]
+
+def test_exploration_share(coordinator):
+    coordinator.exploration_rate = 0.2
+    coordinator._exploration_random.seed(7)
+    candidates = coordinator._get_optimal_sources(InformationType.GENERAL, limit=10)
+    for source in candidates[:-1]:
+        record_history(coordinator, source, 10)
+
+    explored = sum(candidates[-1] in coordinator._get_optimal_sources(InformationType.GENERAL, limit=2)
+                   for _ in range(500))
+
+    assert 60 < explored < 140
@@ -0,0 +1,41 @@
+from search_index import IndexHit, InvertedIndex, tokenize
+
+FDA = "Acetaminophen overdose warning.\nDo not exceed 4,000 mg per day.\nLiver damage may occur."
+MAYO = "Adults: 325-650 mg every 4 hours.\nMaximum 4000mg daily for acetaminophen."
+
+def make_index():
+    index = InvertedIndex()
+    index.add("fda", FDA)
+    index.add("mayo", MAYO)
+    return index
+
+def test_tokenize_splits_numbers_and_drops_stopwords():
+    assert tokenize("Do not exceed 4,000mg of the drug") == ["not", "exceed", "4000", "mg", "drug"]
+
+def test_search_all_terms():
+    assert make_index().search("4000 mg acetaminophen") == [IndexHit("mayo", 1, 3)]
+
+def test_search_min_matched_ranks_by_terms_found():
+    hits = make_index().search("4000 mg acetaminophen", min_matched=2)
+
+    assert hits == [IndexHit("mayo", 1, 3), IndexHit("fda", 1, 2)]
+
+def test_required_terms_must_appear():
+    index = make_index()
+
+    assert index.search("mg", required=["liver"]) == []
+    assert index.search("damage", required=["liver"]) == [IndexHit("fda", 2, 2)]
+
+def test_reindex_and_remove():
+    index = make_index()
+
+    index.add("fda", "Ibuprofen 400 mg.")
+    assert index.search("acetaminophen overdose") == []
+    assert index.search("ibuprofen") == [IndexHit("fda", 0, 1)]
+
+    index.remove("fda")
+    assert "fda" not in index and len(index) == 1
+    assert index.search("ibuprofen") == []
+
+    index.clear()
+    assert index.term_count == 0
@@ -0,0 +1,80 @@
+import json
+import time
+
+import pytest
+
+import search_coordinator
+from search_coordinator import InformationType, SearchCoordinator, SearchResult, classify_content_lines
+from shared_cache import SharedResultCache, decode_result, encode_result
+
+CONTENT = "Ibuprofen dosage: 200 mg to 400 mg every 4 to 6 hours.\nDo not exceed 1200 mg per day."
+
+class CountingProxy(dict):
+    """Stand-in for the cache server's DictProxy that counts round trips"""
+
+    def __init__(self):
+        super().__init__()
+        self.round_trips = 0
+
+    def get(self, key, default=None):
+        self.round_trips += 1
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self.round_trips += 1
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self.round_trips += 1
+        return super().__contains__(key)
+
+def make_result(timestamp=None):
+    result = SearchResult(query="ibuprofen", source="FDA", content=CONTENT,
+                          timestamp=timestamp or time.time(), agent_name="DosageAgent",
+                          info_type=InformationType.DOSAGE)
+    result.line_records = classify_content_lines(CONTENT)
+    return result
+
+def test_round_trip_keeps_line_labels():
+    result = make_result()
+
+    decoded = decode_result(encode_result(result))
+
+    assert decoded.content == CONTENT
+    assert decoded.line_records == result.line_records
+
+def test_entries_without_line_labels_are_classified():
+    fields = json.loads(encode_result(make_result()))
+    del fields["line_labels"]
+
+    assert decode_result(json.dumps(fields).encode()).line_records == classify_content_lines(CONTENT)
+
+@pytest.fixture
+def shared_coordinator():
+    coordinator = SearchCoordinator(cache_ttl=60)
+    proxy = CountingProxy()
+    coordinator.use_cache_backend(SharedResultCache(proxy))
+    return coordinator, proxy
+
+def test_cache_hit_fetches_and_decodes_once(shared_coordinator, monkeypatch):
+    coordinator, proxy = shared_coordinator
+    key = coordinator._generate_cache_key("ibuprofen", "FDA", InformationType.DOSAGE)
+    coordinator.cache[key] = make_result()
+    proxy.round_trips = 0
+    classified = []
+    monkeypatch.setattr(search_coordinator, "classify_content_lines",
+                        lambda content, *args: classified.append(content))
+
+    result = coordinator._get_valid_result(key)
+
+    assert result.content == CONTENT
+    assert proxy.round_trips == 1
+    assert classified == []
+
+def test_expired_and_missing_entries_are_not_returned(shared_coordinator):
+    coordinator, proxy = shared_coordinator
+    key = coordinator._generate_cache_key("ibuprofen", "FDA", InformationType.DOSAGE)
+    coordinator.cache[key] = make_result(timestamp=time.time() - 120)
+
+    assert coordinator._get_valid_result(key) is None
+    assert coordinator._get_valid_result("missing") is None
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from model_routing import ClonePreservingMixin, create_role_model, install_router
+from streaming import AGENT_SECTIONS, AnalysisStream, StreamEvent, StreamEventType, StreamingMixin, publish, stream_scope
+
+def test_events_end_with_done():
+    stream = AnalysisStream()
+    with stream_scope(stream):
+        publish(StreamEvent(StreamEventType.SECTION_STARTED, section="dosage"))
+    publish(StreamEvent(StreamEventType.SECTION_STARTED, section="dropped outside the scope"))
+    stream.close(analysis={"sections": {}})
+
+    events = list(stream.events())
+
+    assert [event.type for event in events] == [StreamEventType.SECTION_STARTED, StreamEventType.DONE]
+    assert events[-1].analysis == {"sections": {}}
+
+def test_events_reraise_analysis_error():
+    stream = AnalysisStream()
+    stream.close(error=TimeoutError("budget"))
+
+    with pytest.raises(TimeoutError):
+        list(stream.events())
+
+def test_cloned_agent_publishes_token_events(tier_models, monkeypatch):
+    from camel.agents import ChatAgent
+    from camel.agents.chat_agent import AsyncStreamingChatAgentResponse
+    from camel.messages import BaseMessage
+    from camel.responses import ChatAgentResponse
+
+    class StreamedAgent(ClonePreservingMixin, StreamingMixin, ChatAgent):
+        pass
+
+    agent = StreamedAgent(system_message="You are a pharmacist.",
+                          model=create_role_model("DosageAgent", temperature=0.4))
+    agent.agent_name = "DosageAgent"
+    install_router(agent, "DosageAgent")
+
+    async def streamed_astep(self, input_message, *args, **kwargs):
+        async def chunks():
+            for text in ("Take ", "400 mg"):
+                message = BaseMessage.make_assistant_message("DosageAgent", text)
+                yield ChatAgentResponse(msgs=[message], terminated=False, info={})
+        return AsyncStreamingChatAgentResponse(chunks())
+
+    monkeypatch.setattr(ChatAgent, "astep", streamed_astep)
+    stream = AnalysisStream()
+
+    async def consume(clone):
+        with stream_scope(stream):
+            async for _ in await clone.astep("Dose of ibuprofen"):
+                pass
+
+    asyncio.run(consume(agent.clone(with_memory=False)))
+    stream.close()
+
+    tokens = [event for event in stream.events() if event.type == StreamEventType.TOKEN]
+    assert [event.text for event in tokens] == ["Take ", "Take 400 mg"]
+    assert {event.section for event in tokens} == {AGENT_SECTIONS["DosageAgent"]}
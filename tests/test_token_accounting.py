@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from model_routing import (
+    ClonePreservingMixin, ModelTier, RoutingDecision, create_role_model, install_router, routing_scope,
+)
+from token_accounting import TokenAccountingMixin, estimate_tokens, get_token_accountant
+
+@pytest.fixture
+def accountant():
+    accountant = get_token_accountant()
+    accountant.reset()
+    yield accountant
+    accountant.reset()
+
+def run_pooled_worker(tier):
+    from camel.agents import ChatAgent
+    from camel.societies.workforce.single_agent_worker import SingleAgentWorker
+    from camel.tasks import Task
+
+    class AccountedAgent(ClonePreservingMixin, TokenAccountingMixin, ChatAgent):
+        pass
+
+    agent = AccountedAgent(system_message="You are a pharmacist.",
+                           model=create_role_model("DosageAgent", temperature=0.4))
+    agent.agent_name = "DosageAgent"
+    install_router(agent, "DosageAgent")
+    worker = SingleAgentWorker("Dosage specialist", worker=agent)
+
+    async def process():
+        with routing_scope(RoutingDecision(tier, "test")):
+            await worker._process_task(Task(content="Dose of ibuprofen", id="1"), [])
+
+    asyncio.run(process())
+
+def test_pooled_worker_calls_are_accounted(tier_models, accountant):
+    run_pooled_worker(ModelTier.SMALL)
+
+    stats = accountant.get_stats()["DosageAgent"]
+    assert stats["calls"] == 1
+    assert stats["estimated_calls"] == 0
+    assert stats["prompt_tokens"] == 10
+    assert list(accountant.get_tier_stats()) == [ModelTier.SMALL.value]
+
+def test_record_call_per_tier(accountant):
+    accountant.record_call("DosageAgent", 100, 20, 0.5, tier="small")
+    accountant.record_call("ValidatorAgent", 300, 40, 1.5, estimated=True, tier="medium")
+
+    assert accountant.get_stats()["ValidatorAgent"]["estimated_calls"] == 1
+    tiers = accountant.get_tier_stats()
+    assert tiers["small"]["prompt_tokens"] == 100
+    assert tiers["medium"]["mean_latency_s"] == 1.5
+    assert "system_prompt_tokens" not in tiers["medium"]
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Take 400 mg.") == 4
+    assert estimate_tokens("acetaminophen") == 3
@@ -0,0 +1,172 @@
+"""
+LLM Token Accounting for the Pharmacy Multi-Agent System
+
+This module records the prompt tokens, completion tokens and latency of every LLM call
+made by the workforce agents, so the cost of their system messages and task prompts can
+be measured per agent, and per model tier (see model_routing).
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from model_routing import tier_for_role
+
+logger = logging.getLogger(__name__)
+
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: Any) -> int:
+    """
+    Estimate the token count of text when the model does not report usage
+
+    Counts words and punctuation, with long words split roughly the way BPE
+    tokenizers split them (about one token per 6 characters).
+    """
+    if not text:
+        return 0
+    return sum(1 + len(piece) // 6 for piece in _PIECE_PATTERN.findall(str(text)))
+
+@dataclass
+class AgentTokenStats:
+    """Accumulated LLM usage of one agent"""
+    calls: int = 0
+    estimated_calls: int = 0      # calls without model-reported usage
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    system_prompt_tokens: int = 0
+
+    def record(self, prompt_tokens: int, completion_tokens: int, latency: float, estimated: bool):
+        self.calls += 1
+        self.estimated_calls += int(estimated)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def summary(self) -> Dict[str, Any]:
+        calls = self.calls or 1
+        stats = asdict(self)
+        stats.update({
+            "prompt_tokens_per_call": round(self.prompt_tokens / calls, 1),
+            "mean_latency_s": round(self.total_latency / calls, 3),
+            "total_latency": round(self.total_latency, 3),
+            "max_latency": round(self.max_latency, 3),
+        })
+        return stats
+
+class TokenAccountant:
+    """Thread-safe per-agent record of LLM calls"""
+
+    def __init__(self):
+        self._stats: Dict[str, AgentTokenStats] = {}
+        self._tier_stats: Dict[str, AgentTokenStats] = {}
+        self._lock = threading.Lock()
+
+    def _agent(self, agent_name: str) -> AgentTokenStats:
+        if agent_name not in self._stats:
+            self._stats[agent_name] = AgentTokenStats()
+        return self._stats[agent_name]
+
+    def set_system_prompt(self, agent_name: str, system_prompt: str):
+        """Record the size of an agent's system message (resent on every call)"""
+        with self._lock:
+            self._agent(agent_name).system_prompt_tokens = estimate_tokens(system_prompt)
+
+    def record_call(self, agent_name: str, prompt_tokens: int, completion_tokens: int,
+                    latency: float, estimated: bool = False, tier: Optional[str] = None):
+        """Record one LLM call (tier: model tier that served it)"""
+        with self._lock:
+            self._agent(agent_name).record(prompt_tokens, completion_tokens, latency, estimated)
+            if tier is not None:
+                self._tier_stats.setdefault(tier, AgentTokenStats()).record(
+                    prompt_tokens, completion_tokens, latency, estimated
+                )
+        logger.debug(f"LLM call by {agent_name}{f' ({tier})' if tier else ''}: {prompt_tokens} prompt + "
+                     f"{completion_tokens} completion tokens in {latency:.2f}s{' (estimated)' if estimated else ''}")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get usage per agent"""
+        with self._lock:
+            return {name: stats.summary() for name, stats in self._stats.items()}
+
+    def get_tier_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get usage per model tier"""
+        with self._lock:
+            tiers = {}
+            for tier, stats in self._tier_stats.items():
+                summary = stats.summary()
+                summary.pop("system_prompt_tokens")
+                tiers[tier] = summary
+            return tiers
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._tier_stats.clear()
+
+# Global accountant shared by all agents
+token_accountant = TokenAccountant()
+
+def get_token_accountant() -> TokenAccountant:
+    """Get the global token accountant"""
+    return token_accountant
+
+def _message_text(message: Any) -> str:
+    return getattr(message, "content", message) or ""
+
+def _reported_usage(response: Any) -> Optional[Tuple[int, int]]:
+    """Get (prompt_tokens, completion_tokens) reported by the model, if any"""
+    info = getattr(response, "info", None) or {}
+    usage = info.get("usage") if isinstance(info, dict) else None
+    if not usage or usage.get("prompt_tokens") is None:
+        return None
+    return int(usage["prompt_tokens"]), int(usage.get("completion_tokens") or 0)
+
+class TokenAccountingMixin:
+    """
+    Mixin for ChatAgent subclasses that records the tokens and latency of every step.
+
+    Uses the usage reported by the model when available and falls back to estimating
+    the system message plus input message.
+    """
+
+    accounting_name: Optional[str] = None
+
+    def _accounting_agent_name(self) -> str:
+        return self.accounting_name or getattr(self, "agent_name", None) or type(self).__name__
+
+    def step(self, input_message, *args, **kwargs):
+        started = time.perf_counter()
+        response = super().step(input_message, *args, **kwargs)
+        self._record_llm_call(input_message, response, time.perf_counter() - started)
+        return response
+
+    async def astep(self, input_message, *args, **kwargs):
+        started = time.perf_counter()
+        response = await super().astep(input_message, *args, **kwargs)
+        self._record_llm_call(input_message, response, time.perf_counter() - started)
+        return response
+
+    def _record_llm_call(self, input_message, response, latency: float):
+        try:
+            name = self._accounting_agent_name()
+            system_prompt = _message_text(getattr(self, "system_message", None))
+            usage = _reported_usage(response)
+            if usage is not None:
+                prompt_tokens, completion_tokens = usage
+            else:
+                prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(_message_text(input_message))
+                completion_tokens = sum(estimate_tokens(_message_text(msg))
+                                        for msg in getattr(response, "msgs", None) or [])
+            token_accountant.set_system_prompt(name, system_prompt)
+            token_accountant.record_call(name, prompt_tokens, completion_tokens, latency,
+                                         estimated=usage is None, tier=tier_for_role(name).value)
+        except Exception as e:
+            # Accounting must never break an LLM call
+            logger.warning(f"Token accounting failed: {e}")